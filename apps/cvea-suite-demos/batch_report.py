@@ -0,0 +1,192 @@
+# Reportes batch de escenarios de choque: KPIs y figuras de las suites sin mover los controles a mano
+#
+# Lee una grilla de escenarios (JSON o CSV, ver escenarios_ejemplo.json), evalúa cada escenario en
+# un pool de procesos y escribe `resumen.parquet` (una fila por escenario), un HTML estático por
+# escenario e `index.html` con la tabla resumen. La cartera de crédito se materializa una vez en la
+# caché en disco (`dataset_cache`) y cada worker la lee con memory-map en su inicialización, en
+# lugar de regenerarla por escenario.
+#
+#   python batch_report.py escenarios_ejemplo.json -o reportes/
+#   python batch_report.py escenarios.csv -o reportes/ --workers 8 --no-html
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import dataset_cache
+from cvea_core import bank
+from cvea_core.bank import bimonetary_series, generate_credit_portfolio
+from cvea_core.insurance import MODELOS_IBNR
+from cvea_core.scenarios import BaseData, ScenarioResult, evaluate_scenario, scenario_grid
+from dataset_cache import persistent_dataset
+
+PLOTLY_JS = "plotly.min.js"
+_BASE: BaseData | None = None  # datasets base del worker (uno por proceso)
+_MEMO: dict = {}  # ECL y ruina ya calculadas en este worker
+
+
+@persistent_dataset(depends=(bank,))
+def credit_portfolio(n=10_000):
+    return generate_credit_portfolio(n)
+
+
+def read_scenarios(path: Path) -> list[dict]:
+    """Escenarios normalizados desde un JSON (lista o grilla) o un CSV (una fila por escenario)."""
+    if path.suffix.lower() == ".csv":
+        return scenario_grid(pd.read_csv(path).to_dict("records"))
+    return scenario_grid(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _init_worker(n_cartera: int, series: pd.DataFrame, cache_dir: str) -> None:
+    global _BASE
+    dataset_cache.CACHE_DIR = Path(cache_dir)
+    _BASE = BaseData.build(credit_portfolio(n_cartera), series)
+
+
+def _slug(nombre: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", nombre).strip("_") or "escenario"
+
+
+def report_names(escenarios: list[dict]) -> dict[str, str]:
+    """Archivo HTML de cada escenario; los nombres que dan el mismo slug ("x y", "x_y") llevan sufijo -2, -3, …"""
+    usados = {"index"}  # en minúsculas: macOS y Windows no distinguen X_Y.html de x_y.html
+    nombres = {}
+    for e in escenarios:
+        base = _slug(e["escenario"])
+        slug, k = base, 1
+        while slug.lower() in usados:
+            k += 1
+            slug = f"{base}-{k}"
+        usados.add(slug.lower())
+        nombres[e["escenario"]] = f"{slug}.html"
+    return nombres
+
+
+def render_report(res: ScenarioResult, base: BaseData) -> str:
+    """HTML estático del escenario: parámetros, KPIs y las figuras de Bank, Insurance y Health."""
+    from figures import ecl_figure, goal_gauge, ibnr_origin_figure, ruin_fan_figure, ruin_time_figure
+
+    p = res.parametros
+    figuras = [
+        ("Bank — liquidez vs meta", goal_gauge(res.banco.liquidez, p["meta_liquidez"], "Liquidez vs meta")),
+        ("Bank — solvencia vs meta", goal_gauge(res.banco.solvencia, p["meta_solvencia"], "Solvencia vs meta interna")),
+        ("Bank — pérdida esperada (NIIF 9)", ecl_figure(res.ecl)),
+        (f"Insurance — IBNR ({MODELOS_IBNR[p['modelo_reserva']]})", ibnr_origin_figure(res.ibnr, base.triangulo.index)),
+        ("Health — patrimonio del fondo", ruin_fan_figure(res.ruina)),
+        ("Health — tiempo a la ruina", ruin_time_figure(res.ruina)),
+    ]
+    kpis = pd.Series(res.summary()).drop(["escenario", *p]).to_frame("valor")
+    cuerpo = "\n".join(
+        f"<h2>{html.escape(titulo)}</h2>\n{fig.to_html(full_html=False, include_plotlyjs=False)}" for titulo, fig in figuras
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Escenario {html.escape(res.escenario)}</title>
+<script src="{PLOTLY_JS}"></script></head>
+<body style="font-family: sans-serif; max-width: 1100px; margin: auto">
+<p><a href="index.html">← Resumen</a></p>
+<h1>Escenario {html.escape(res.escenario)}</h1>
+<h2>Parámetros</h2>
+{pd.Series(p).to_frame("valor").to_html()}
+<h2>KPIs</h2>
+{kpis.to_html()}
+{cuerpo}
+</body></html>
+"""
+
+
+def _run(escenario: dict, reporte: Path | None) -> dict:
+    t0 = time.perf_counter()
+    res = evaluate_scenario(escenario, _BASE, _MEMO)
+    fila = res.summary()
+    if reporte:
+        reporte.write_text(render_report(res, _BASE), encoding="utf-8")
+        fila["reporte"] = reporte.name
+    fila["segundos"] = time.perf_counter() - t0
+    return fila
+
+
+def write_index(resumen: pd.DataFrame, out_dir: Path) -> None:
+    """Tabla resumen con enlaces a los reportes de cada escenario."""
+    tabla = resumen.drop(columns=["segundos"]).copy()
+    if "reporte" in tabla:
+        tabla["escenario"] = [f'<a href="{html.escape(r)}">{html.escape(e)}</a>' for e, r in zip(tabla["escenario"], tabla.pop("reporte"))]
+    (out_dir / "index.html").write_text(f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>CVEA Suite — escenarios</title></head>
+<body style="font-family: sans-serif">
+<h1>CVEA Suite — resumen de {len(tabla)} escenarios</h1>
+{tabla.to_html(index=False, escape=False, float_format=lambda v: f"{v:,.4g}")}
+</body></html>
+""", encoding="utf-8")
+
+
+def run_batch(escenarios: list[dict], out_dir: Path, workers: int | None = None, n_cartera: int = 10_000,
+              html_reports: bool = True, log=None) -> pd.DataFrame:
+    """Evalúa los escenarios en paralelo y escribe resumen.parquet (y los HTML); devuelve el resumen."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    credit_portfolio(n_cartera)  # materializa la cartera en la caché en disco antes de abrir el pool
+    series = bimonetary_series()  # la misma fecha de corte para todos los workers
+    if html_reports:
+        from plotly.offline import get_plotlyjs
+
+        (out_dir / PLOTLY_JS).write_text(get_plotlyjs(), encoding="utf-8")
+    reportes = report_names(escenarios) if html_reports else {}
+    filas, errores = {}, {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(n_cartera, series, str(dataset_cache.CACHE_DIR))) as ex:
+        futuros = {
+            ex.submit(_run, e, out_dir / reportes[e["escenario"]] if html_reports else None): e["escenario"]
+            for e in escenarios
+        }
+        for fut in as_completed(futuros):
+            nombre = futuros[fut]
+            try:
+                filas[nombre] = fut.result()
+            except Exception as e:  # un escenario inválido no detiene el resto
+                errores[nombre] = f"{type(e).__name__}: {e}"
+            if log:
+                log(nombre, filas.get(nombre), errores.get(nombre))
+    resumen = pd.DataFrame([filas[e["escenario"]] for e in escenarios if e["escenario"] in filas])
+    resumen.to_parquet(out_dir / "resumen.parquet", index=False)
+    if html_reports and len(resumen):
+        write_index(resumen, out_dir)
+    if errores:
+        raise RuntimeError(f"{len(errores)} escenario(s) fallaron: " + "; ".join(f"{k}: {v}" for k, v in errores.items()))
+    return resumen
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reportes batch de escenarios de choque de la CVEA Suite.")
+    parser.add_argument("escenarios", type=Path, help="Grilla de escenarios (.json o .csv)")
+    parser.add_argument("-o", "--output", type=Path, default=Path("reportes"), help="Directorio de salida")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos del pool")
+    parser.add_argument("--n-cartera", type=int, default=10_000, help="Créditos de la cartera base (Bank)")
+    parser.add_argument("--no-html", action="store_true", help="Solo resumen.parquet, sin reportes HTML")
+    args = parser.parse_args(argv)
+
+    try:
+        escenarios = read_scenarios(args.escenarios)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    def log(nombre, fila, error):
+        estado = f"ERROR {error}" if error else f"{fila['segundos']:.1f} s"
+        print(f"{nombre:<30} {estado}", file=sys.stderr, flush=True)
+
+    try:
+        resumen = run_batch(escenarios, args.output, args.workers, args.n_cartera, not args.no_html, log=log)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{len(resumen)} escenarios → {args.output / 'resumen.parquet'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+# Benchmarks de escalamiento: tiempo y memoria pico de cada cálculo de las suites según el tamaño
+#
+# Cada caso prepara sus datos fuera del cronómetro y mide solo el cálculo que hace la página (los
+# mismos motores de `cvea_core` y del panel Insurtech). Por caso se recorre la escala de tamaños de
+# menor a mayor; cuando una medición supera `--max-seconds` se omiten los tamaños siguientes. La
+# columna `interactivo` marca si el cálculo cabe en `--interactive` segundos por rerun. Los casos con
+# `check` se validan antes de medir contra una implementación de referencia (estado "error" si difiere).
+#
+#   python benchmark.py                                  # todos los casos, 10³ … 10⁷ filas
+#   python benchmark.py bank health --sizes 1e3 1e5      # solo algunas suites y tamaños
+#   python benchmark.py -o bench.json --compare base.json  # falla (código 1) ante regresiones
+import argparse
+import functools
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+INSURTECH_DIR = APP_DIR.parent / "insurtech-streamlit"
+FILAS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+ANIOS_DESARROLLO = (10, 20, 40)
+
+
+@dataclass(frozen=True)
+class Case:
+    """Cálculo medible: `setup(n)` prepara el estado (sin cronómetro) y `run(estado)` es lo medido."""
+
+    nombre: str
+    suite: str
+    descripcion: str
+    setup: Callable
+    run: Callable
+    sizes: tuple[int, ...] = FILAS
+    unidad: str = "filas"
+    check: Callable | None = None  # check(estado) contra una implementación de referencia; lanza si difiere
+
+
+@dataclass
+class Measurement:
+    caso: str
+    suite: str
+    n: int
+    unidad: str
+    estado: str = "ok"  # ok | omitido | error
+    segundos: float | None = None  # mediana de las repeticiones
+    segundos_min: float | None = None
+    repeticiones: int = 0
+    setup_segundos: float | None = None
+    pico_mb: float | None = None  # pico de tracemalloc durante una ejecución
+    por_segundo: float | None = None
+    interactivo: bool | None = None
+    detalle: str = ""
+
+
+CASOS: dict[str, Case] = {}
+
+
+def case(nombre: str, descripcion: str, sizes: tuple[int, ...] = FILAS, unidad: str = "filas", setup: Callable = lambda n: n,
+         check: Callable | None = None):
+    """Registra `run` como caso de benchmark."""
+    def decorator(run):
+        CASOS[nombre] = Case(nombre, nombre.split(".")[0], descripcion, setup, run, sizes, unidad, check)
+        return run
+    return decorator
+
+
+# --- Bank ---------------------------------------------------------------------------------------
+
+@case("bank.cartera", "Generación de la cartera de crédito")
+def _cartera(n):
+    from cvea_core.bank import generate_credit_portfolio
+    return generate_credit_portfolio(n)
+
+
+@case("bank.ecl", "ECL NIIF 9 por estrato y stage", setup=_cartera)
+def _bank_ecl(df):
+    from cvea_core.ecl import portfolio_ecl
+    return portfolio_ecl(df, 0.45)
+
+
+# --- Insurance ----------------------------------------------------------------------------------
+
+def _triangulo(years):
+    from cvea_core.insurance import inflation_index, origin_premiums, runoff_triangle
+    return runoff_triangle(years), origin_premiums(years), inflation_index(years)
+
+
+def _ibnr(modelo):
+    def run(estado):
+        from cvea_core.insurance import project_ibnr
+        tri, primas, inflacion = estado
+        return project_ibnr(tri, modelo, premiums=primas, inflation=inflacion)
+    return run
+
+
+for _modelo in ("chain_ladder", "bf", "iacl"):
+    case(f"insurance.ibnr_{_modelo}", f"Proyección IBNR ({_modelo}) del triángulo", ANIOS_DESARROLLO,
+         "años de desarrollo", _triangulo)(_ibnr(_modelo))
+
+
+# --- Retail -------------------------------------------------------------------------------------
+
+def _transacciones(n):
+    from cvea_core.retail_data import generate_transactions
+    return generate_transactions(n)
+
+
+def _cubo(n):
+    # Por bloques: el cubo no depende del tamaño y así no se materializan 10⁷ líneas a la vez
+    from cvea_core.olap import SalesCube
+    from cvea_core.retail_data import iter_transactions
+    return SalesCube.from_chunks(iter_transactions(n))
+
+
+@case("retail.cubo", "Cubo OLAP desde las líneas POS", setup=_transacciones)
+def _retail_cubo(df):
+    from cvea_core.olap import SalesCube
+    return SalesCube.from_frame(df)
+
+
+@case("retail.kpis", "KPIs y treemap sobre el cubo (con filtro de región)", setup=_cubo)
+def _retail_kpis(cubo):
+    from cvea_core.retail import category_share, retail_kpis
+    filtros = {"region": cubo.labels["region"][:-1], "formato_tienda": cubo.labels["formato_tienda"]}
+    return retail_kpis(cubo, **filtros), category_share(cubo, **filtros)
+
+
+# --- Health -------------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _modelo_auditoria():
+    # Ajuste único con el tamaño de la página; lo medido es puntuar n facturas nuevas
+    from cvea_core.audit import fit_audit_model
+    from cvea_core.health_data import generate_claims
+    return fit_audit_model(generate_claims(22_000).to_frame())
+
+
+def _facturas(n):
+    from cvea_core.audit import audit_features
+    from cvea_core.health_data import generate_claims
+    return _modelo_auditoria(), audit_features(generate_claims(n, seed=2025).to_frame())
+
+
+@case("health.auditoria", "Puntaje Isolation Forest de facturas nuevas", setup=_facturas)
+def _health_auditoria(estado):
+    modelo, X = estado
+    return modelo.score(X)
+
+
+@case("health.ruina", "Monte Carlo de ruina a 5 años (un proceso)", unidad="trayectorias")
+def _health_ruina(n):
+    from cvea_core.ruin import simulate_ruin
+    return simulate_ruin(n_paths=n, workers=1)
+
+
+# --- Control ------------------------------------------------------------------------------------
+
+def _flota(n):
+    from cvea_core.control import generate_logistics_data
+    return generate_logistics_data(n)
+
+
+@case("control.flota", "KPIs logísticos y agregación por vehículo", setup=_flota)
+def _control_flota(df):
+    from cvea_core.control import fleet_kpis, fleet_vehicles
+    return fleet_kpis(df), fleet_vehicles(df)
+
+
+@case("control.rejilla", "Rejilla espacial multinivel de registros GPS", setup=_flota)
+def _control_rejilla(df):
+    from cvea_core.spatial import SpatialGrid
+    return SpatialGrid.from_frame(df)
+
+
+# --- Insurtech ----------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _insurtech():
+    """Módulo `app` del panel Insurtech (sus `main`/páginas no se ejecutan al importarlo)."""
+    sys.path.append(str(INSURTECH_DIR))
+    spec = importlib.util.spec_from_file_location("insurtech_app", INSURTECH_DIR / "app.py")
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _panel(n, meses=36):
+    # n filas = empresas × 36 meses, con las medidas del panel SUDEASEG
+    app = _insurtech()
+    rng = np.random.default_rng(7)
+    empresas = -(-n // meses)
+    df = pd.DataFrame({
+        "Empresa": np.repeat([f"Aseguradora {k}" for k in range(empresas)], meses)[:n],
+        "Fecha": np.tile(pd.date_range("2023-01-01", periods=meses, freq="MS"), empresas)[:n],
+    })
+    for m in app.MEDIDAS:
+        # ~1 % de montos faltantes, como las columnas ausentes o ilegibles de los boletines
+        df[m] = np.where(rng.random(n) < 0.01, np.nan, rng.normal(50_000, 15_000, n))
+    return app, df
+
+
+def _check_mercado(estado):
+    # Referencia: filtro por fechas + groupby().sum(), como hacía la página antes del índice
+    app, df = estado
+    idx = app.build_aggregate_index(df)
+    periodo = (idx.fechas[6], idx.fechas[-1])
+    ref = df[df["Fecha"].between(*periodo)].groupby("Empresa")[app.MEDIDAS].sum()
+    presentes = idx.present(periodo)
+    if set(np.asarray(idx.empresas, dtype=object)[presentes]) != set(ref.index):
+        raise AssertionError("las empresas con datos en el periodo difieren de groupby()")
+    if not np.allclose(idx.totals(periodo), ref.reindex(idx.empresas, fill_value=0).to_numpy()):
+        raise AssertionError("los totales del índice difieren de groupby().sum()")
+
+
+@case("insurtech.mercado", "Índice de sumas prefijas del panel y totales del periodo", setup=_panel, check=_check_mercado)
+def _insurtech_mercado(estado):
+    app, df = estado
+    idx = app.build_aggregate_index(df)
+    return idx.totals((idx.fechas[6], idx.fechas[-1]))
+
+
+def _cartera_tecnica(n):
+    import inspect
+    app = _insurtech()
+    pol, sin = inspect.unwrap(app.simulate_portfolio)(n)  # sin st.cache_data ni caché en disco
+    return app, pol, sin
+
+
+@case("insurtech.cartera", "Filtros y groupby por ramo de la cartera técnica", setup=_cartera_tecnica, unidad="pólizas")
+def _insurtech_cartera(estado):
+    app, pol, sin = estado
+    ramos = sorted(pol["Ramo"].unique())[:-1]
+    return app.portfolio_view(pol, sin, ramos, sorted(pol["Canal_Distribucion"].unique()))
+
+
+# --- Medición -----------------------------------------------------------------------------------
+
+def _timeit(run, estado, repeat: int, min_time: float) -> list[float]:
+    tiempos = []
+    while len(tiempos) < repeat and (len(tiempos) < 1 or sum(tiempos) < min_time):
+        t0 = time.perf_counter()
+        run(estado)
+        tiempos.append(time.perf_counter() - t0)
+    return tiempos
+
+
+def _peak_mb(run, estado) -> float:
+    tracemalloc.start()
+    try:
+        run(estado)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def measure(c: Case, n: int, repeat: int = 5, min_time: float = 0.5, interactive: float = 1.0, memory: bool = True) -> Measurement:
+    """Mide `c` en tamaño `n`: mediana de hasta `repeat` ejecuciones y pico de memoria de una más."""
+    m = Measurement(c.nombre, c.suite, n, c.unidad)
+    try:
+        t0 = time.perf_counter()
+        estado = c.setup(n)
+        m.setup_segundos = time.perf_counter() - t0
+        if c.check:
+            c.check(estado)
+        tiempos = _timeit(c.run, estado, repeat, min_time)
+        m.pico_mb = _peak_mb(c.run, estado) if memory else None
+    except MemoryError:
+        m.estado, m.detalle = "error", "MemoryError"
+        return m
+    except Exception as e:  # un caso roto no detiene el resto de la corrida
+        m.estado, m.detalle = "error", f"{type(e).__name__}: {e}"
+        return m
+    m.segundos, m.segundos_min, m.repeticiones = statistics.median(tiempos), min(tiempos), len(tiempos)
+    m.por_segundo = n / m.segundos if m.segundos > 0 else None
+    m.interactivo = m.segundos <= interactive
+    return m
+
+
+def run_cases(casos: list[Case], sizes: tuple[int, ...] | None = None, max_seconds: float = 30.0, log=None, **kwargs) -> list[Measurement]:
+    """Recorre cada caso de menor a mayor; tras una medición (setup + cálculo) > max_seconds omite el resto.
+
+    `sizes` reemplaza la escala de filas; los casos con otra unidad (años de desarrollo) conservan la suya.
+    """
+    resultados = []
+    for c in casos:
+        tope = False
+        for n in sorted(sizes if sizes and c.sizes == FILAS else c.sizes):
+            if tope:
+                m = Measurement(c.nombre, c.suite, n, c.unidad, estado="omitido", detalle=f"tamaño anterior > {max_seconds:g} s")
+            else:
+                m = measure(c, n, **kwargs)
+                costo = (m.setup_segundos or 0) + (m.segundos or 0) * max(m.repeticiones, 1)
+                tope = m.estado != "ok" or costo > max_seconds
+            resultados.append(m)
+            if log:
+                log(m)
+    return resultados
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """Contexto de la corrida para comparar resultados entre máquinas y versiones."""
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": _git_rev(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(resultados: list[dict], base: list[dict], tolerance: float = 0.25) -> list[dict]:
+    """Casos (caso, n) cuya mediana empeoró más de `tolerance` respecto de la corrida base."""
+    previos = {(r["caso"], r["n"]): r for r in base if r.get("estado") == "ok"}
+    regresiones = []
+    for r in resultados:
+        b = previos.get((r["caso"], r["n"]))
+        if r["estado"] == "ok" and b and r["segundos"] > b["segundos"] * (1 + tolerance):
+            regresiones.append({"caso": r["caso"], "n": r["n"], "base": b["segundos"], "actual": r["segundos"],
+                                "factor": r["segundos"] / b["segundos"]})
+    return regresiones
+
+
+def _fmt(m: Measurement) -> str:
+    if m.estado != "ok":
+        return f"{m.caso:<26} {m.n:>12,} {m.estado:>10}  {m.detalle}"
+    pico = f"{m.pico_mb:9.1f} MB" if m.pico_mb is not None else ""
+    marca = "" if m.interactivo else "  (no interactivo)"
+    return f"{m.caso:<26} {m.n:>12,} {m.segundos * 1000:10.1f} ms {pico}{marca}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Curvas de escalamiento (tiempo y memoria) de la CVEA Suite.")
+    parser.add_argument("casos", nargs="*", help="Casos o suites a medir (p. ej. bank, insurance.ibnr_bf); por defecto, todos")
+    parser.add_argument("--sizes", nargs="+", type=lambda s: int(float(s)), help="Tamaños en filas a medir (reemplaza la escala 10³ … 10⁷)")
+    parser.add_argument("--repeat", type=int, default=5, help="Máximo de repeticiones por tamaño")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Repetir hasta acumular estos segundos")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Omitir tamaños mayores tras una medición más lenta")
+    parser.add_argument("--interactive", type=float, default=1.0, help="Umbral (s) para considerar interactivo un cálculo")
+    parser.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria (tracemalloc)")
+    parser.add_argument("-o", "--output", type=Path, help="Archivo JSON de resultados")
+    parser.add_argument("--compare", type=Path, help="JSON de una corrida anterior; código 1 si hay regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Empeoramiento relativo tolerado en --compare")
+    parser.add_argument("--list", action="store_true", help="Listar los casos y salir")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for c in CASOS.values():
+            print(f"{c.nombre:<26} {c.descripcion} ({c.unidad}: {', '.join(f'{n:,}' for n in c.sizes)})")
+        return 0
+    pedidos = args.casos or list(CASOS)
+    casos = [c for c in CASOS.values() if any(c.nombre == p or c.suite == p for p in pedidos)]
+    if not casos:
+        parser.error(f"ningún caso coincide con {pedidos}; use --list")
+
+    log = lambda m: print(_fmt(m), file=sys.stderr, flush=True)
+    resultados = run_cases(casos, tuple(args.sizes) if args.sizes else None, args.max_seconds, log=log,
+                           repeat=args.repeat, min_time=args.min_time, interactive=args.interactive, memory=not args.no_memory)
+    salida = {"entorno": environment(), "umbral_interactivo_s": args.interactive, "resultados": [asdict(m) for m in resultados]}
+    if args.output:
+        args.output.write_text(json.dumps(salida, ensure_ascii=False, indent=1), encoding="utf-8")
+    else:
+        json.dump(salida, sys.stdout, ensure_ascii=False, indent=1)
+        print()
+
+    if args.compare:
+        base = json.loads(args.compare.read_text(encoding="utf-8"))["resultados"]
+        regresiones = compare(salida["resultados"], base, args.tolerance)
+        for r in regresiones:
+            print(f"REGRESIÓN {r['caso']} n={r['n']:,}: {r['base'] * 1000:.1f} → {r['actual'] * 1000:.1f} ms (×{r['factor']:.2f})", file=sys.stderr)
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
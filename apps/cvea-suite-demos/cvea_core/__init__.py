@@ -0,0 +1,12 @@
+# Motores de la CVEA Suite sin dependencia de Streamlit: funciones puras y resultados tipados
+#
+# Las páginas de `pages/` son vistas sobre estos módulos (solo cachean y grafican); los mismos
+# motores se usan desde jobs batch, workers y benchmarks:
+#
+#   from cvea_core.bank import generate_credit_portfolio
+#   from cvea_core.credit_var import simulate_credit_losses
+#   perdidas = simulate_credit_losses(generate_credit_portfolio(50_000), lgd=0.45)
+#
+# Un módulo por suite (bank, insurance, retail, health, control) con los generadores y KPIs de
+# cada página, más los motores compartidos (triangles, ecl, ruin, olap, …). No se importan aquí
+# para que cargar un motor no arrastre a los demás.
@@ -0,0 +1,66 @@
+# Motor de auditoría de facturas de salud: Isolation Forest ajustado una vez + índice ordenado de puntajes
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import IsolationForest
+
+FEATURES = ["costo_facturado_usd", "limite_baremo_usd", "ratio"]
+
+
+def audit_features(df: pd.DataFrame) -> np.ndarray:
+    """Matriz de variables de auditoría: costo, baremo y razón costo / (baremo + 1)."""
+    costo = df["costo_facturado_usd"].to_numpy(dtype=float)
+    baremo = df["limite_baremo_usd"].to_numpy(dtype=float)
+    return np.column_stack([costo, baremo, costo / (baremo + 1)])
+
+
+@dataclass(frozen=True)
+class AuditModel:
+    """Isolation Forest ajustado con los puntajes del dataset ordenados para consultas por umbral.
+
+    `scores` son los `score_samples` del bosque (menor = más anómalo). Con `contamination` = c,
+    IsolationForest marca las facturas con puntaje < percentil c; como el bosque no depende de c,
+    ese percentil se resuelve sobre el índice ordenado sin volver a ajustar.
+    """
+
+    forest: IsolationForest
+    sorted_scores: np.ndarray  # puntajes ascendentes (más anómalo primero)
+    order: np.ndarray  # posición de fila de cada puntaje ordenado
+
+    def threshold(self, contamination: float) -> float:
+        """Percentil `contamination` de los puntajes (interpolación lineal, igual que np.percentile)."""
+        s = self.sorted_scores
+        pos = np.clip(contamination, 0.0, 1.0) * (len(s) - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, len(s) - 1)
+        return float(s[lo] + (s[hi] - s[lo]) * (pos - lo))
+
+    def flagged(self, contamination: float) -> np.ndarray:
+        """Posiciones de fila marcadas para revisión, de la más anómala a la menos anómala."""
+        k = int(np.searchsorted(self.sorted_scores, self.threshold(contamination), side="left"))
+        return self.order[:k]
+
+    def score(self, X) -> np.ndarray:
+        """Puntajes de facturas nuevas con el bosque ya ajustado (sin re-entrenar)."""
+        return self.forest.score_samples(np.asarray(X, dtype=float))
+
+    def flag_new(self, X, contamination: float) -> np.ndarray:
+        """Máscara de facturas nuevas que superan el umbral de revisión vigente."""
+        return self.score(X) < self.threshold(contamination)
+
+
+def fit_audit_model(df: pd.DataFrame, random_state: int = 42, n_jobs: int = -1) -> AuditModel:
+    """Ajusta el Isolation Forest una sola vez (multinúcleo) e indexa los puntajes del dataset."""
+    from sklearn.ensemble import IsolationForest  # diferido: sklearn tarda más de 1 s en cargar
+
+    X = audit_features(df)
+    forest = IsolationForest(random_state=random_state, n_jobs=n_jobs).fit(X)
+    scores = forest.score_samples(X)
+    order = np.argsort(scores, kind="stable")
+    return AuditModel(forest=forest, sorted_scores=scores[order], order=order)
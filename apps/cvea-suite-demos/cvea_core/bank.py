@@ -0,0 +1,101 @@
+# Bank Suite sin Streamlit: cartera de crédito, series bimonetarias e indicadores de balance
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .ecl import STAGE_LABELS, assign_stage
+from .migration import MigrationTracker, simulate_snapshots
+
+
+def generate_credit_portfolio(n: int = 10_000, seed: int = 42) -> pd.DataFrame:
+    """Cartera simulada de `n` créditos (score, ingreso, monto, mora, PD, estrato, plazo)."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n + 1)
+    score = rng.integers(300, 851, size=n)
+    ingreso = np.clip(rng.lognormal(8, 0.8, n) * 500, 200, 50000)
+    monto = np.clip(rng.lognormal(9, 0.9, n) * 300, 500, 200000)
+    tasa = 0.04 + (850 - score) / 10000 + rng.uniform(-0.005, 0.01, n)
+    dias_mora = np.where(rng.random(n) < 0.92, 0, rng.exponential(45, n).astype(int))
+    # PD aproximada por score
+    pd_val = np.clip(1 / (1 + np.exp((score - 600) / 80)) * 0.15 + rng.uniform(0, 0.02, n), 0.001, 0.95)
+    estrato = pd.cut(ingreso, bins=[0, 500, 1500, 5000, 100000], labels=["Bajo", "Medio", "Medio-Alto", "Alto"])
+    plazo = rng.choice([12, 24, 36, 48, 60], size=n)
+    return pd.DataFrame({
+        "id_cliente": ids,
+        "score_crediticio": score,
+        "ingreso_mensual_usd": ingreso,
+        "monto_credito": monto,
+        "tasa_interes": tasa,
+        "dias_mora": dias_mora,
+        "probabilidad_default": pd_val,
+        "estrato_ingreso": estrato,
+        "plazo_meses": plazo,
+    })
+
+
+def credit_stage(df: pd.DataFrame) -> pd.Series:
+    """Etiqueta NIIF 9 por crédito: 1 Normal, 2 Riesgo significativo, 3 Default."""
+    return pd.Series(assign_stage(df["dias_mora"], df["probabilidad_default"]), name="stage").map(STAGE_LABELS)
+
+
+def stage_migration(df: pd.DataFrame, months: int = 12) -> MigrationTracker:
+    """Matriz empírica de migración sobre una historia simulada de cortes mensuales."""
+    # Cada corte nuevo solo se cruza con el anterior
+    tracker = MigrationTracker()
+    for corte in simulate_snapshots(df, months):
+        tracker.update_frame(corte)
+    return tracker
+
+
+def bimonetary_series(months: int = 12, seed: int = 123, end: pd.Timestamp | None = None) -> pd.DataFrame:
+    """Tasas en ME, liquidez y saldos en MN de los últimos `months` meses."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    dates = pd.date_range(end - pd.DateOffset(months=months), periods=months, freq="MS")
+    pasiva_me = 0.0419 + np.cumsum(rng.normal(0, 0.002, months))
+    activa_me = pasiva_me + 0.02 + rng.uniform(0, 0.01, months)
+    liquidez = 0.30 + np.cumsum(rng.normal(0, 0.01, months))
+    return pd.DataFrame({
+        "fecha": dates,
+        "tasa_pasiva_me": np.clip(pasiva_me, 0.02, 0.12),
+        "tasa_activa_me": np.clip(activa_me, 0.04, 0.18),
+        "liquidez_ratio": np.clip(liquidez, 0.1, 0.6),
+        "captaciones_mn": 1e6 * (80 + np.cumsum(rng.normal(2, 5, months))),
+        "cartera_bruta_mn": 1e6 * (70 + np.cumsum(rng.normal(1, 4, months))),
+    })
+
+
+def candlestick_data(days: int = 60, seed: int = 99, end: pd.Timestamp | None = None) -> pd.DataFrame:
+    """Velas OHLC diarias (días hábiles) de un índice que parte en 100."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    dates = pd.date_range(end=end, periods=days, freq="B")
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, days)))
+    open_ = np.roll(close, 1)
+    open_[0] = 100
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({"fecha": dates, "open": open_, "high": high, "low": low, "close": close})
+
+
+@dataclass(frozen=True)
+class BankIndicators:
+    """Indicadores del panel 360 tras un choque macroeconómico (fracción, p. ej. 0.05 = +5%)."""
+
+    choque: float
+    liquidez: float
+    solvencia: float
+    morosidad: float
+    intermediacion: float
+
+
+def bank_indicators(series: pd.DataFrame, choque: float = 0.0) -> BankIndicators:
+    """Liquidez (último mes de la serie), solvencia, morosidad e intermediación bajo `choque`."""
+    return BankIndicators(
+        choque=choque,
+        liquidez=float(series["liquidez_ratio"].iloc[-1]) * (1 - choque),
+        solvencia=0.1628 * (1 - choque * 0.5),
+        morosidad=0.0244 * (1 + choque * 2),
+        intermediacion=0.65 * (1 - choque * 0.3),
+    )
@@ -0,0 +1,120 @@
+# Minería de canastas (Apriori vertical sobre matriz dispersa ticket × SKU) y reglas de asociación
+#
+# El soporte de todos los candidatos de un nivel se cuenta con un único producto disperso
+# Vᵀ·X (V = indicadores de los itemsets frecuentes del nivel anterior), así que el costo crece
+# con los no-ceros de la matriz y no con el número de tickets × SKUs.
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+
+def basket_matrix(ticket_ids, item_codes, n_items: int | None = None) -> sparse.csr_matrix:
+    """Matriz binaria dispersa (tickets × ítems); líneas repetidas del mismo SKU cuentan una vez."""
+    from scipy import sparse  # diferido: solo la pestaña de canastas lo necesita
+
+    tickets, fila = np.unique(np.asarray(ticket_ids), return_inverse=True)
+    col = np.asarray(item_codes, dtype=np.int64)
+    if n_items is None:
+        n_items = int(col.max()) + 1 if len(col) else 0
+    X = sparse.csr_matrix((np.ones(len(col), dtype=np.int32), (fila, col)), shape=(len(tickets), n_items))
+    X.data[:] = 1
+    return X
+
+
+@dataclass(frozen=True)
+class BasketRules:
+    """Itemsets frecuentes y reglas minadas una vez al soporte mínimo de referencia.
+
+    `filter` solo enmascara las reglas ya calculadas, así que cambiar soporte o confianza por
+    encima del mínimo de minería no vuelve a recorrer las canastas.
+    """
+
+    itemsets: pd.DataFrame  # items (tupla de etiquetas), conteo, soporte, largo
+    rules: pd.DataFrame  # antecedente, consecuente, conteo, soporte, confianza, lift
+    n_baskets: int
+    min_support: float
+
+    def filter(self, min_support: float = 0.0, min_confidence: float = 0.0, top: int | None = None) -> pd.DataFrame:
+        """Reglas con soporte y confianza mínimos, ordenadas por lift."""
+        r = self.rules
+        out = r[(r["soporte"] >= min_support) & (r["confianza"] >= min_confidence)]
+        out = out.sort_values(["lift", "conteo"], ascending=False)
+        return out.head(top) if top else out
+
+
+def _frequent_levels(X: sparse.csr_matrix, min_count: int, max_len: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Apriori por niveles: lista de (itemsets k×len ordenados, conteos) para len = 1..max_len."""
+    X = X.tocsc()
+    cnt1 = np.asarray(X.sum(axis=0)).ravel()
+    items = np.flatnonzero(cnt1 >= min_count)
+    levels = [(items[:, None], cnt1[items])]
+    Xf = X[:, items].tocsr()  # solo columnas frecuentes (propiedad a priori)
+    V = Xf.tocsc()  # indicadores del nivel actual, en índices locales de `items`
+    sets = np.arange(len(items))[:, None]
+    for _ in range(1, max_len):
+        if len(sets) == 0:
+            break
+        C = (V.T @ Xf).tocoo()  # C[s, j] = tickets con el itemset s y el ítem j
+        ok = (C.data >= min_count) & (C.col > sets[C.row, -1])  # extender solo con ítems mayores
+        fila, col, conteo = C.row[ok], C.col[ok], C.data[ok]
+        nuevos = np.column_stack([sets[fila], col])
+        if len(sets[0]) > 1 and len(nuevos):
+            # Poda a priori: todo subconjunto de tamaño k debe ser frecuente
+            conocidos = {tuple(s) for s in sets}
+            keep = np.array([all(tuple(np.delete(s, i)) in conocidos for i in range(len(s) - 1)) for s in nuevos])
+            nuevos, fila, col, conteo = nuevos[keep], fila[keep], col[keep], conteo[keep]
+        if len(nuevos) == 0:
+            break
+        levels.append((items[nuevos], conteo))
+        # Indicador del itemset nuevo = indicador del padre × columna del ítem agregado
+        V = V[:, fila].multiply(Xf[:, col].tocsc()).tocsc()
+        sets = nuevos
+    return levels
+
+
+def mine_rules(X: sparse.csr_matrix, labels, min_support: float = 0.0001, max_len: int = 3) -> BasketRules:
+    """Itemsets frecuentes (soporte ≥ min_support) y todas sus reglas A → b con consecuente de un ítem."""
+    n = X.shape[0]
+    labels = np.asarray(labels, dtype=object)
+    min_count = max(2, int(np.ceil(min_support * n)))
+    levels = _frequent_levels(X, min_count, max_len)
+    conteo_de = {tuple(s): int(c) for sets, cnts in levels for s, c in zip(sets, cnts)}
+    itemsets = pd.DataFrame({
+        "items": [tuple(labels[list(s)]) for s in conteo_de],
+        "conteo": list(conteo_de.values()),
+        "largo": [len(s) for s in conteo_de],
+    })
+    itemsets["soporte"] = itemsets["conteo"] / n
+
+    filas = []
+    for sets, cnts in levels[1:]:
+        k = sets.shape[1]
+        for i in range(k):
+            ante = np.delete(sets, i, axis=1)
+            c_ante = np.array([conteo_de[tuple(a)] for a in ante])
+            c_cons = np.array([conteo_de[(int(b),)] for b in sets[:, i]])
+            filas.append(pd.DataFrame({
+                "antecedente": [" + ".join(labels[a]) for a in ante],
+                "consecuente": labels[sets[:, i]],
+                "conteo": cnts,
+                "soporte": cnts / n,
+                "confianza": cnts / c_ante,
+                "lift": cnts * n / (c_ante * c_cons),
+            }))
+    cols = ["antecedente", "consecuente", "conteo", "soporte", "confianza", "lift"]
+    rules = pd.concat(filas, ignore_index=True) if filas else pd.DataFrame(columns=cols)
+    return BasketRules(itemsets=itemsets, rules=rules, n_baskets=n, min_support=min_count / n if n else min_support)
+
+
+def mine_transactions(df: pd.DataFrame, min_support: float = 0.0001, max_len: int = 3) -> BasketRules:
+    """Reglas sobre un DataFrame de líneas POS (id_ticket, SKU categórico)."""
+    sku = pd.Categorical(df["SKU"])
+    X = basket_matrix(df["id_ticket"].to_numpy(), sku.codes, len(sku.categories))
+    return mine_rules(X, sku.categories, min_support, max_len)
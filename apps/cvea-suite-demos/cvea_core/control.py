@@ -0,0 +1,95 @@
+# Control Suite sin Streamlit: registros de flota, vehículos por zona/turno, KPIs y presupuesto
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+ZONAS = ["Z1", "Z2", "Z3", "Z4", "Z5"]
+TURNOS = ["Mañana", "Tarde", "Noche"]
+# Bandas fijas de latitud de las zonas (el área de operación de generate_logistics_data, 8°–12° N)
+BORDES_ZONA = np.linspace(8.0, 12.0, len(ZONAS) + 1)
+PRESUPUESTO = {
+    "Presupuesto total": 2_500_000,
+    "Diesel": -600_000,
+    "Peajes": -80_000,
+    "Mantenimiento flota": -120_000,
+    "Depreciación": -200_000,
+}
+
+
+def generate_logistics_data(n: int = 12_000, seed: int = 333) -> pd.DataFrame:
+    """Registros GPS simulados de la flota (posición, consumo, km, estado, costo)."""
+    rng = np.random.default_rng(seed)
+    # Venezuela bounds approx
+    lat = 10.0 + rng.uniform(-2, 2, n)
+    lon = -66.5 + rng.uniform(-3, 3, n)
+    consumo = rng.lognormal(3, 0.5, n)
+    km = rng.lognormal(6, 0.4, n)
+    estado = rng.choice(["Activo", "En Mantenimiento", "Detenido"], n, p=[0.85, 0.10, 0.05])
+    tiempo_ciclo = rng.lognormal(4, 0.6, n)
+    costo = rng.lognormal(8, 0.5, n)
+    ids = [f"V{i}" for i in range(1, n // 100 + 1)] * 100
+    rng.shuffle(ids)
+    ids = ids[:n]
+    return pd.DataFrame({
+        "id_vehiculo": ids,
+        "lat": lat,
+        "lon": lon,
+        "consumo_combustible_litros": consumo,
+        "kilometros_recorridos": km,
+        "estado_operativo": estado,
+        "tiempo_ciclo_produccion": tiempo_ciclo,
+        "costo_operativo_usd": costo,
+    })
+
+
+def fleet_vehicles(df: pd.DataFrame, seed: int = 55) -> pd.DataFrame:
+    """Un registro por vehículo: latitud media, zona base y turno asignado (fijo por vehículo).
+
+    La zona base es la más frecuente entre los registros del vehículo, con bandas fijas de latitud
+    (BORDES_ZONA); la latitud media de registros dispersos se concentra en el centro.
+    """
+    vehiculo = pd.Categorical(df["id_vehiculo"])
+    zona = np.clip(np.searchsorted(BORDES_ZONA, df["lat"].to_numpy(), side="right") - 1, 0, len(ZONAS) - 1)
+    conteo = np.bincount(vehiculo.codes.astype(np.int64) * len(ZONAS) + zona, minlength=len(vehiculo.categories) * len(ZONAS))
+    veh = df.groupby(vehiculo, observed=True).agg(lat=("lat", "mean")).rename_axis("id_vehiculo").reset_index()
+    veh["id_vehiculo"] = veh["id_vehiculo"].astype(str)
+    veh["zona"] = np.asarray(ZONAS)[conteo.reshape(-1, len(ZONAS)).argmax(axis=1)]
+    veh["turno"] = np.random.default_rng(seed).choice(TURNOS, len(veh))
+    return veh
+
+
+@dataclass(frozen=True)
+class FleetKPIs:
+    """KPIs logísticos con la variabilidad del combustible aplicada al costo."""
+
+    costo_km: float  # USD/km
+    rendimiento: float  # km/L
+    otif: float
+
+
+def fleet_kpis(df: pd.DataFrame, variabilidad_combustible: float = 0.0) -> FleetKPIs:
+    """Costo por kilómetro, rendimiento de combustible y OTIF simulado."""
+    km = df["kilometros_recorridos"].sum()
+    return FleetKPIs(
+        costo_km=df["costo_operativo_usd"].sum() / (km + 1) * (1 + variabilidad_combustible),
+        rendimiento=km / (df["consumo_combustible_litros"].sum() + 1),
+        otif=0.88 + np.random.RandomState(1).uniform(0, 0.05),
+    )
+
+
+def oee(seed: int = 44) -> float:
+    """OEE simulado (fracción)."""
+    return 0.72 + np.random.RandomState(seed).uniform(-0.05, 0.05)
+
+
+def failure_counts(historial: pd.DataFrame) -> pd.DataFrame:
+    """Fallas por zona (filas) y turno (columnas)."""
+    return historial.pivot_table(index="zona", columns="turno", values="evento", aggfunc="sum", fill_value=0)
+
+
+def budget_waterfall(partidas: dict | None = None) -> pd.Series:
+    """Partidas del presupuesto operativo más el margen operativo neto resultante."""
+    partidas = dict(PRESUPUESTO if partidas is None else partidas)
+    partidas["Margen operativo neto"] = sum(partidas.values())
+    return pd.Series(partidas, name="USD")
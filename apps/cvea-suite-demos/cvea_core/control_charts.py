@@ -0,0 +1,148 @@
+# Gráficos de control en línea (Shewhart, EWMA, CUSUM) para el costo de los siniestros de salud
+#
+# El monitor guarda acumuladores por grupo (Welford: n, media, M2) y por grupo × día (conteo y
+# suma). Cada `update` cuesta O(siniestros nuevos); los gráficos se arman sobre la rejilla
+# grupo × día, cuyo tamaño no depende del número de siniestros acumulados.
+import numpy as np
+import pandas as pd
+
+from .health_data import FECHA_BASE
+
+AGRUPACIONES = {"total": "Toda la cartera", "clinica": "Clínica proveedora", "servicio": "Tipo de servicio"}
+GRAFICOS = {"shewhart": "Shewhart (media diaria)", "ewma": "EWMA", "cusum": "CUSUM tabular"}
+
+
+class OnlineControlChart:
+    """Estadísticos en línea del costo por grupo para gráficos de control con tamaño de muestra variable.
+
+    La línea central y σ de cada grupo salen de un acumulador de Welford a nivel de siniestro
+    (fusionado por lotes con la fórmula de Chan). La media diaria x̄_d de n_d siniestros se
+    compara con μ ± k·σ/√n_d; EWMA y CUSUM trabajan sobre el estadístico estandarizado
+    (x̄_d − μ)/(σ/√n_d), de modo que sus límites no dependen de n_d.
+    """
+
+    def __init__(self, group_labels, n_days: int = 730, fecha_base: str = FECHA_BASE) -> None:
+        self.group_labels = tuple(group_labels)
+        self.fecha_base = fecha_base
+        g = len(self.group_labels)
+        self.n = np.zeros(g, dtype=np.int64)
+        self.mean = np.zeros(g)
+        self.m2 = np.zeros(g)
+        self.day_count = np.zeros((g, n_days), dtype=np.int64)
+        self.day_sum = np.zeros((g, n_days))
+
+    @classmethod
+    def from_store(cls, store, by: str = "clinica", chunk_size: int = 1_000_000) -> "OnlineControlChart":
+        """Monitor alimentado con un ClaimsStore en bloques, agrupado por total, clínica o servicio."""
+        labels = {"total": ("Total",), "clinica": store.clinica_labels, "servicio": store.servicio_labels}[by]
+        mon = cls(labels, n_days=int(store.dia_admision.max()) + 1 if len(store) else 1, fecha_base=store.fecha_base)
+        for k in range(0, len(store), chunk_size):
+            sl = slice(k, k + chunk_size)
+            grupos = np.zeros(len(store.id_paciente[sl]), dtype=np.int64) if by == "total" else getattr(store, by)[sl]
+            mon.update(grupos, store.dia_admision[sl], store.costo_facturado_usd[sl])
+        return mon
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.group_labels)
+
+    @property
+    def n_days(self) -> int:
+        return self.day_count.shape[1]
+
+    @property
+    def std(self) -> np.ndarray:
+        """Desviación estándar muestral por grupo a nivel de siniestro."""
+        return np.sqrt(np.divide(self.m2, self.n - 1, out=np.zeros_like(self.m2), where=self.n > 1))
+
+    def update(self, grupos, dias, costos) -> None:
+        """Incorpora un lote de siniestros (código de grupo, día desde fecha_base, costo)."""
+        grupos = np.asarray(grupos, dtype=np.int64)
+        dias = np.asarray(dias, dtype=np.int64)
+        costos = np.asarray(costos, dtype=float)
+        if len(costos) == 0:
+            return
+        if dias.max() >= self.n_days:
+            extra = max(int(dias.max()) + 1, 2 * self.n_days) - self.n_days
+            self.day_count = np.pad(self.day_count, ((0, 0), (0, extra)))
+            self.day_sum = np.pad(self.day_sum, ((0, 0), (0, extra)))
+        g = self.n_groups
+        # Welford por lotes: estadísticos del lote por grupo y fusión con el acumulado
+        n_b = np.bincount(grupos, minlength=g)
+        mean_b = np.divide(np.bincount(grupos, weights=costos, minlength=g), n_b, out=np.zeros(g), where=n_b > 0)
+        m2_b = np.bincount(grupos, weights=(costos - mean_b[grupos]) ** 2, minlength=g)
+        n_tot = self.n + n_b
+        delta = mean_b - self.mean
+        frac = np.divide(n_b, n_tot, out=np.zeros(g), where=n_tot > 0)
+        self.m2 += m2_b + delta**2 * self.n * frac
+        self.mean += delta * frac
+        self.n = n_tot
+        key = grupos * self.n_days + dias
+        self.day_count += np.bincount(key, minlength=g * self.n_days).reshape(g, self.n_days)
+        self.day_sum += np.bincount(key, weights=costos, minlength=g * self.n_days).reshape(g, self.n_days)
+
+    def _standardized(self) -> tuple[np.ndarray, np.ndarray]:
+        """Media diaria y estadístico z por grupo × día (NaN en días sin siniestros)."""
+        cnt = self.day_count
+        xbar = np.divide(self.day_sum, cnt, out=np.full(cnt.shape, np.nan), where=cnt > 0)
+        sigma = np.where(self.std > 0, self.std, 1.0)[:, None]
+        z = (xbar - self.mean[:, None]) / (sigma / np.sqrt(np.maximum(cnt, 1)))
+        return xbar, z
+
+    def _frame(self, grupo: int, valor, centro, lic, lsc, alarma) -> pd.DataFrame:
+        """DataFrame del gráfico sobre los días con siniestros del grupo (arreglos ya filtrados)."""
+        dias = np.flatnonzero(self.day_count[grupo] > 0)
+        return pd.DataFrame({
+            "fecha": np.datetime64(self.fecha_base, "D") + dias,
+            "valor": valor, "centro": centro, "LIC": lic, "LSC": lsc, "alarma": alarma,
+        })
+
+    def shewhart(self, grupo: int = 0, k: float = 2.0) -> pd.DataFrame:
+        """Media diaria con límites μ ± k·σ/√n_d."""
+        xbar, _ = self._standardized()
+        obs = self.day_count[grupo] > 0
+        x = xbar[grupo][obs]
+        half = k * self.std[grupo] / np.sqrt(self.day_count[grupo][obs])
+        lic, lsc = self.mean[grupo] - half, self.mean[grupo] + half
+        return self._frame(grupo, x, self.mean[grupo], lic, lsc, (x < lic) | (x > lsc))
+
+    def ewma(self, grupo: int = 0, lam: float = 0.2, L: float = 3.0) -> pd.DataFrame:
+        """EWMA del estadístico z con límites exactos ±L·√(λ/(2−λ)·(1−(1−λ)^{2t}))."""
+        _, z = self._standardized()
+        obs = z[grupo][self.day_count[grupo] > 0]
+        w = np.empty_like(obs)
+        acc = 0.0
+        for t, x in enumerate(obs):
+            acc = lam * x + (1 - lam) * acc
+            w[t] = acc
+        t = np.arange(1, len(obs) + 1)
+        half = L * np.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * t)))
+        return self._frame(grupo, w, 0.0, -half, half, np.abs(w) > half)
+
+    def cusum(self, grupo: int = 0, k: float = 0.5, h: float = 5.0) -> pd.DataFrame:
+        """CUSUM tabular sobre z: C⁺ en `valor`, −C⁻ en `valor_inferior`; alarma si alguno supera h."""
+        _, z = self._standardized()
+        obs = z[grupo][self.day_count[grupo] > 0]
+        hi = np.empty_like(obs)
+        lo = np.empty_like(obs)
+        c_hi = c_lo = 0.0
+        for t, x in enumerate(obs):
+            c_hi = max(0.0, c_hi + x - k)
+            c_lo = max(0.0, c_lo - x - k)
+            hi[t], lo[t] = c_hi, c_lo
+        df = self._frame(grupo, hi, 0.0, -h, h, (hi > h) | (lo > h))
+        df["valor_inferior"] = -lo
+        return df
+
+    def chart(self, tipo: str, grupo: int = 0, **params) -> pd.DataFrame:
+        return {"shewhart": self.shewhart, "ewma": self.ewma, "cusum": self.cusum}[tipo](grupo, **params)
+
+    def alarm_summary(self, tipo: str = "shewhart", **params) -> pd.DataFrame:
+        """Días en alarma por grupo para el gráfico elegido."""
+        return pd.DataFrame({
+            "grupo": self.group_labels,
+            "siniestros": self.n,
+            "media": self.mean,
+            "desv_std": self.std,
+            "dias_alarma": [int(self.chart(tipo, g, **params)["alarma"].sum()) for g in range(self.n_groups)],
+        })
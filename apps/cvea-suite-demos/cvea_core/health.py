@@ -0,0 +1,46 @@
+# Health Suite sin Streamlit: KPIs epidemiológicos y simulador de primas
+from dataclasses import dataclass
+
+from .health_data import ClaimsStore
+
+MODALIDADES = ["Tradicional", "Asistencia domiciliaria", "Telemedicina"]
+SINIESTRALIDAD_MODALIDAD = [0.72, 0.68, 0.55]
+
+
+@dataclass(frozen=True)
+class HealthKPIs:
+    """KPIs del monitoreo epidemiológico (porcentajes 0-100)."""
+
+    tasa_admision: float  # admisiones mensuales sobre la población cubierta
+    prevalencia_ent: float  # enfermedades no transmisibles (CIE-10 E, I)
+    telemedicina: float
+
+
+def health_kpis(claims: ClaimsStore, meses: int = 24, poblacion: int = 8000) -> HealthKPIs:
+    """KPIs sobre el almacén columnar de siniestros."""
+    return HealthKPIs(
+        tasa_admision=len(claims) / meses / poblacion * 100,
+        prevalencia_ent=claims.share_cie10_prefix(("E", "I")) * 100,
+        telemedicina=claims.share_service("Telemedicina") * 100,
+    )
+
+
+@dataclass(frozen=True)
+class PremiumQuote:
+    """Prima mensual ajustada y margen de suficiencia actuarial."""
+
+    prima: float
+    margen: float
+    margen_minimo: float = 0.15
+
+    @property
+    def sufficient(self) -> bool:
+        return self.margen >= self.margen_minimo
+
+
+def quote_premium(coaseguro: float, deducible: float, tope: float,
+                  prima_base: float = 80.0, costo_esperado: float = 60.0) -> PremiumQuote:
+    """Prima con coaseguro (%), deducible (USD) y tope de cobertura (USD)."""
+    prima = prima_base * (1 - coaseguro / 100) * (1 + deducible / 1000) * (tope / 10000) ** 0.1
+    margen = (prima - costo_esperado) / prima if prima > 0 else 0.0
+    return PremiumQuote(prima, margen)
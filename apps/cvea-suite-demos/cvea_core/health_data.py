@@ -0,0 +1,112 @@
+# Almacén columnar compacto de siniestros de salud para la Health Suite
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+CIE10 = ["E11", "I10", "J00", "K21", "M54", "R50", "Z00", "A09", "N39", "E66"]
+SERVICIOS = ["Consulta Triaje", "Ecograma Mamario", "Ecograma Prostático", "Telemedicina", "Consulta Especialista", "Laboratorio"]
+P_SERVICIOS = [0.25, 0.1, 0.08, 0.15, 0.25, 0.17]
+CLINICAS = [f"Clínica {chr(65 + i)}" for i in range(8)]
+FECHA_BASE = "2023-01-01"
+DIAS = 730
+
+# Presupuesto de memoria por siniestro: id_paciente int32 (4) + 3 códigos int8 (3)
+# + costo y baremo float64 (16) + día int32 (4) = 27 bytes, es decir ~27 MB por millón
+# de siniestros, frente a ~400 MB con columnas object construidas desde dicts.
+BYTES_POR_SINIESTRO = 27
+
+
+@dataclass(frozen=True)
+class ClaimsStore:
+    """Siniestros como arreglos NumPy: categorías en códigos enteros + diccionario, fechas en días."""
+
+    id_paciente: np.ndarray  # int32
+    cie10: np.ndarray  # int8, índice en cie10_labels
+    servicio: np.ndarray  # int8, índice en servicio_labels
+    clinica: np.ndarray  # int8, índice en clinica_labels
+    costo_facturado_usd: np.ndarray
+    limite_baremo_usd: np.ndarray
+    dia_admision: np.ndarray  # int32, días desde fecha_base
+    cie10_labels: tuple = tuple(CIE10)
+    servicio_labels: tuple = tuple(SERVICIOS)
+    clinica_labels: tuple = tuple(CLINICAS)
+    fecha_base: str = FECHA_BASE
+
+    def __len__(self) -> int:
+        return len(self.id_paciente)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, c).nbytes for c in (
+            "id_paciente", "cie10", "servicio", "clinica", "costo_facturado_usd", "limite_baremo_usd", "dia_admision"))
+
+    def fechas(self) -> np.ndarray:
+        """Materializa las fechas de admisión (datetime64[ns]) desde los desfases en días."""
+        return np.datetime64(self.fecha_base, "ns") + self.dia_admision.astype("timedelta64[D]")
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame con el esquema original; las categorías quedan como pandas Categorical."""
+        return pd.DataFrame({
+            "id_paciente": self.id_paciente,
+            "codigo_CIE10": pd.Categorical.from_codes(self.cie10, categories=list(self.cie10_labels)),
+            "tipo_servicio": pd.Categorical.from_codes(self.servicio, categories=list(self.servicio_labels)),
+            "clinica_proveedora": pd.Categorical.from_codes(self.clinica, categories=list(self.clinica_labels)),
+            "costo_facturado_usd": self.costo_facturado_usd,
+            "limite_baremo_usd": self.limite_baremo_usd,
+            "fecha_admision": self.fechas(),
+        })
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fecha_base: str = FECHA_BASE) -> "ClaimsStore":
+        """Inverso de `to_frame`: reutiliza los códigos de las columnas Categorical."""
+        cats = {c: pd.Categorical(df[c]) for c in ("codigo_CIE10", "tipo_servicio", "clinica_proveedora")}
+        dias = (df["fecha_admision"].to_numpy("datetime64[D]") - np.datetime64(fecha_base, "D")).astype(np.int32)
+        return cls(
+            id_paciente=df["id_paciente"].to_numpy(np.int32),
+            cie10=cats["codigo_CIE10"].codes.astype(np.int8),
+            servicio=cats["tipo_servicio"].codes.astype(np.int8),
+            clinica=cats["clinica_proveedora"].codes.astype(np.int8),
+            costo_facturado_usd=df["costo_facturado_usd"].to_numpy(float),
+            limite_baremo_usd=df["limite_baremo_usd"].to_numpy(float),
+            dia_admision=dias,
+            cie10_labels=tuple(cats["codigo_CIE10"].categories),
+            servicio_labels=tuple(cats["tipo_servicio"].categories),
+            clinica_labels=tuple(cats["clinica_proveedora"].categories),
+            fecha_base=fecha_base,
+        )
+
+    def volume_by_service_clinic(self) -> pd.DataFrame:
+        """Conteo servicio × clínica con un único bincount sobre los códigos combinados."""
+        n_s, n_c = len(self.servicio_labels), len(self.clinica_labels)
+        key = self.servicio.astype(np.int32) * n_c + self.clinica
+        counts = np.bincount(key, minlength=n_s * n_c).reshape(n_s, n_c)
+        return pd.DataFrame(counts, index=pd.Index(self.servicio_labels, name="tipo_servicio"),
+                            columns=pd.Index(self.clinica_labels, name="clinica_proveedora"))
+
+    def share_cie10_prefix(self, prefixes: tuple[str, ...] = ("E", "I")) -> float:
+        """Proporción de siniestros cuyo CIE-10 empieza por algún prefijo (evaluado sobre el diccionario)."""
+        if len(self) == 0:
+            return 0.0
+        flags = np.array([c.startswith(prefixes) for c in self.cie10_labels])
+        return float(flags[self.cie10].mean())
+
+    def share_service(self, servicio: str) -> float:
+        """Proporción de siniestros de un tipo de servicio."""
+        if len(self) == 0 or servicio not in self.servicio_labels:
+            return 0.0
+        return float(np.mean(self.servicio == self.servicio_labels.index(servicio)))
+
+
+def generate_claims(n: int = 22_000, seed: int = 111) -> ClaimsStore:
+    """Genera n siniestros simulados directamente en formato columnar."""
+    rng = np.random.default_rng(seed)
+    return ClaimsStore(
+        id_paciente=rng.integers(1, 8000, size=n, dtype=np.int32),
+        cie10=rng.integers(0, len(CIE10), size=n, dtype=np.int8),
+        servicio=rng.choice(len(SERVICIOS), size=n, p=P_SERVICIOS).astype(np.int8),
+        clinica=rng.integers(0, len(CLINICAS), size=n, dtype=np.int8),
+        costo_facturado_usd=np.clip(rng.lognormal(5, 1.2, n), 20, 3000),
+        limite_baremo_usd=np.clip(rng.lognormal(5, 0.9, n), 25, 2500),
+        dia_admision=rng.integers(0, DIAS, size=n, dtype=np.int32),
+    )
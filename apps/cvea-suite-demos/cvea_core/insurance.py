@@ -0,0 +1,128 @@
+# Insurance Suite sin Streamlit: triángulo de siniestros, IBNR, ramos/productos, estrés y cumplimiento
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .triangles import TriangleProjection, bornhuetter_ferguson_batch, chain_ladder_batch, extend_inflation_index, iacl_batch
+
+RAMOS = ["Automóviles", "Salud", "Personas", "Patrimoniales", "Fianzas"]
+PRODUCTOS = {
+    "Automóviles": ["Auto individual", "Flotas empresariales", "Taxis"],
+    "Salud": ["Plan individual", "Plan colectivo", "Ambulatorio"],
+    "Personas": ["Vida riesgo", "Accidentes personales", "Vida colectivo"],
+    "Patrimoniales": ["Incendio", "Robo", "RC General"],
+    "Fianzas": ["Fiel cumplimiento", "Anticipo", "Laboral"],
+}
+RESERVAS_SUDEASEG = [
+    ("Reserva de riesgos en curso", "Cobertura de la parte no devengada de las primas."),
+    ("Reserva de siniestros reportados", "Siniestros ocurridos y reportados, pendientes de pago."),
+    ("Reserva IBNR", "Siniestros ocurridos y no reportados."),
+    ("Reserva de desviación de siniestralidad", "Suavizar volatilidad de la siniestralidad futura."),
+    ("Reserva catastrófica", "Eventos de baja frecuencia y alta severidad."),
+    ("Reserva matemática de vida", "Compromisos de largo plazo en seguros de vida."),
+    ("Reserva de previsión", "Otras contingencias y ajustes prudenciales."),
+]
+MODELOS_IBNR = {
+    "chain_ladder": "Chain Ladder",
+    "bf": "Bornhuetter-Ferguson",
+    "iacl": "Chain Ladder Ajustado por Inflación (IACL)",
+}
+CATEGORIAS_CUMPLIMIENTO = ["Conozca a su cliente", "Intermediarios", "Reportes sistemáticos", "Formación", "Debida diligencia"]
+RATIO_IBNR_BASE = 0.734
+
+
+def runoff_triangle(years: int = 10, seed: int = 33) -> pd.DataFrame:
+    """Triángulo incremental de pagos: filas = año de ocurrencia, columnas = año de desarrollo."""
+    rng = np.random.default_rng(seed)
+    tri = np.zeros((years, years))
+    for i in range(years):
+        for j in range(years - i):
+            tri[i, j] = max(0, rng.lognormal(8 + i * 0.1, 0.5) * (1 + j * 0.15))
+    return pd.DataFrame(tri, index=[f"Año {y}" for y in range(1, years + 1)], columns=[f"Dev {d}" for d in range(1, years + 1)])
+
+
+def inflation_index(years: int = 10, seed: int = 44) -> np.ndarray:
+    """Índice acumulado de inflación por período calendario observado."""
+    return np.cumprod(1 + np.random.RandomState(seed).uniform(0.05, 0.35, years))
+
+
+def origin_premiums(years: int = 10, seed: int = 55) -> np.ndarray:
+    """Primas por año de origen en la escala del triángulo (base de la siniestralidad esperada BF)."""
+    return np.random.RandomState(seed).uniform(1e5, 2e5, years)
+
+
+def project_ibnr(tri, modelo: str = "chain_ladder", premiums=None, inflation=None,
+                 shock: float = 0.0, loss_ratio: float = 0.72) -> TriangleProjection:
+    """Proyección determinística con uno de MODELOS_IBNR; BF usa `premiums` e IACL `inflation` + `shock`."""
+    if modelo == "chain_ladder":
+        return chain_ladder_batch(tri)
+    if modelo == "bf":
+        return bornhuetter_ferguson_batch(tri, premiums, loss_ratio=loss_ratio)
+    if modelo == "iacl":
+        n_cal = sum(np.shape(tri)[-2:]) - 1
+        return iacl_batch(tri, extend_inflation_index(inflation, n_cal, shock=shock))
+    raise ValueError(f"Modelo IBNR desconocido: {modelo!r} (opciones: {', '.join(MODELOS_IBNR)})")
+
+
+def line_overview(seed: int = 123) -> pd.DataFrame:
+    """Primas cobradas, siniestros pagados y siniestralidad por ramo."""
+    rng = np.random.default_rng(seed)
+    primas = rng.uniform(1e6, 5e6, len(RAMOS))
+    siniestros = primas * rng.uniform(0.4, 0.9, len(RAMOS))
+    df = pd.DataFrame({"Ramo": RAMOS, "Primas_cobradas": primas, "Siniestros_pagados": siniestros})
+    df["Siniestralidad"] = df["Siniestros_pagados"] / df["Primas_cobradas"]
+    return df
+
+
+def product_lines(seed: int = 456) -> pd.DataFrame:
+    """Primas, siniestros pagados y siniestralidad por ramo y producto."""
+    rng = np.random.default_rng(seed)
+    filas = []
+    for ramo in RAMOS:
+        for prod in PRODUCTOS[ramo]:
+            prima = rng.uniform(100_000, 900_000)
+            sin_pago = prima * rng.uniform(0.3, 0.95)
+            filas.append({"Ramo": ramo, "Producto": prod, "Primas": prima, "Siniestros_pagados": sin_pago, "Siniestralidad": sin_pago / prima})
+    return pd.DataFrame(filas)
+
+
+@dataclass(frozen=True)
+class StressResult:
+    """Ratio IBNR/costos antes y después de un choque inflacionario."""
+
+    choque: float
+    base: float
+    post: float
+
+    @property
+    def change(self) -> float:
+        """Variación relativa del ratio."""
+        return (self.post - self.base) / self.base
+
+
+def stress_ratio(choque: float, base: float = RATIO_IBNR_BASE) -> StressResult:
+    """Prueba de estrés sobre patrimonio: el ratio crece a la mitad del choque."""
+    return StressResult(choque, base, base * (1 + choque * 0.5))
+
+
+@dataclass(frozen=True)
+class ComplianceScore:
+    """Calificación LC/FT/FPADM por categoría (0-100) y su nivel de riesgo."""
+
+    categorias: tuple[str, ...]
+    valores: np.ndarray
+
+    @property
+    def score(self) -> float:
+        return float(np.mean(self.valores))
+
+    @property
+    def riesgo(self) -> str:
+        """"bajo" (≥ 80), "medio" (≥ 60) o "alto"."""
+        return "bajo" if self.score >= 80 else "medio" if self.score >= 60 else "alto"
+
+
+def compliance_scores(seed: int = 88) -> ComplianceScore:
+    """Calificación simulada de cumplimiento SUDEASEG por categoría."""
+    return ComplianceScore(tuple(CATEGORIAS_CUMPLIMIENTO), np.random.RandomState(seed).uniform(60, 95, len(CATEGORIAS_CUMPLIMIENTO)))
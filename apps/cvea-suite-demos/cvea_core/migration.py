@@ -0,0 +1,101 @@
+# Matrices empíricas de migración entre stages NIIF 9 a partir de cortes mensuales de cartera
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .ecl import STAGE_LABELS, assign_stage
+
+N_STAGES = 3
+
+
+def simulate_snapshots(
+    cartera: pd.DataFrame,
+    months: int = 12,
+    seed: int = 77,
+    tasa_cancelacion: float = 0.01,
+) -> Iterator[pd.DataFrame]:
+    """Genera cortes mensuales (id_cliente, dias_mora, probabilidad_default, stage) desde una cartera base.
+
+    Cada mes: la PD deriva de forma multiplicativa, los créditos al día entran en mora con su PD
+    mensual, los morosos se curan o acumulan 30 días más, y una fracción se cancela (sale del corte).
+    Los ids se mantienen ordenados, lo que permite cruzar cortes sin reordenar.
+    """
+    rng = np.random.default_rng(seed)
+    ids = cartera["id_cliente"].to_numpy(dtype=np.int64)
+    orden = np.argsort(ids, kind="stable")
+    ids = ids[orden]
+    dias = cartera["dias_mora"].to_numpy()[orden].astype(np.int32)
+    pd_ = cartera["probabilidad_default"].to_numpy()[orden].astype(float)
+    fechas = pd.date_range(end=pd.Timestamp.now().normalize(), periods=months, freq="MS")
+    for k, fecha in enumerate(fechas):
+        if k > 0:
+            n = len(ids)
+            pd_ = np.clip(pd_ * np.exp(rng.normal(0, 0.1, n)), 0.001, 0.95)
+            pd_mes = 1 - (1 - pd_) ** (1 / 12)
+            al_dia = dias == 0
+            entra = al_dia & (rng.random(n) < pd_mes * 3)
+            cura = ~al_dia & (rng.random(n) < np.where(dias > 90, 0.05, 0.3))
+            dias = np.where(entra, rng.integers(1, 31, n), np.where(cura, 0, np.where(al_dia, 0, dias + 30))).astype(np.int32)
+            sigue = rng.random(n) >= tasa_cancelacion
+            ids, dias, pd_ = ids[sigue], dias[sigue], pd_[sigue]
+        yield pd.DataFrame({
+            "fecha": fecha,
+            "id_cliente": ids,
+            "dias_mora": dias,
+            "probabilidad_default": pd_,
+            "stage": assign_stage(dias, pd_),
+        })
+
+
+class MigrationTracker:
+    """Acumula conteos de transición stage_t → stage_t+1 corte a corte.
+
+    Solo guarda el último corte (ids ordenados y stages); cada `update` cruza el corte nuevo con
+    el anterior por id_cliente mediante búsqueda binaria, con costo proporcional al corte nuevo
+    y no a la historia acumulada.
+    """
+
+    def __init__(self) -> None:
+        self.counts = np.zeros((N_STAGES, N_STAGES), dtype=np.int64)
+        self.n_periods = 0
+        self._ids: np.ndarray | None = None
+        self._stages: np.ndarray | None = None
+
+    def update(self, ids, stages) -> np.ndarray:
+        """Agrega un corte mensual; devuelve los conteos de transición de ese mes."""
+        ids = np.asarray(ids, dtype=np.int64)
+        stages = np.asarray(stages, dtype=np.int8)
+        if len(ids) > 1 and np.any(ids[1:] < ids[:-1]):
+            orden = np.argsort(ids, kind="stable")
+            ids, stages = ids[orden], stages[orden]
+        month = np.zeros((N_STAGES, N_STAGES), dtype=np.int64)
+        if self._ids is not None and len(self._ids):
+            pos = np.searchsorted(self._ids, ids)
+            pos_c = np.minimum(pos, len(self._ids) - 1)
+            match = self._ids[pos_c] == ids
+            origen = self._stages[pos_c[match]].astype(np.int64) - 1
+            destino = stages[match].astype(np.int64) - 1
+            month = np.bincount(origen * N_STAGES + destino, minlength=N_STAGES**2).reshape(N_STAGES, N_STAGES)
+            self.counts += month
+            self.n_periods += 1
+        self._ids, self._stages = ids, stages
+        return month
+
+    def update_frame(self, snapshot: pd.DataFrame) -> np.ndarray:
+        return self.update(snapshot["id_cliente"], snapshot["stage"])
+
+    def matrix(self) -> np.ndarray:
+        """Matriz de transición mensual (filas = stage origen, suman 1)."""
+        filas = self.counts.sum(axis=1, keepdims=True)
+        return np.divide(self.counts, filas, out=np.eye(N_STAGES), where=filas > 0)
+
+    def matrix_frame(self) -> pd.DataFrame:
+        labels = list(STAGE_LABELS.values())
+        return pd.DataFrame(self.matrix(), index=labels, columns=labels)
+
+    def project(self, distribucion, periods: int = 12) -> np.ndarray:
+        """Distribución por stage en t = 0..periods aplicando potencias de la matriz."""
+        p = self.matrix()
+        d0 = np.asarray(distribucion, dtype=float)
+        return np.stack([d0 @ np.linalg.matrix_power(p, t) for t in range(periods + 1)])
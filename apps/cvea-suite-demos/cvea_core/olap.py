@@ -0,0 +1,105 @@
+# Cubo OLAP pre-agregado de ventas POS para los filtros de la Retail Suite
+#
+# Las líneas se agregan una sola vez en celdas densas (región × formato × categoría × marca ×
+# método × día) con medidas aditivas; cualquier filtro o agrupación posterior suma celdas, así
+# que su costo depende del tamaño del cubo (~160 mil celdas) y no del número de líneas.
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .retail_data import CATEGORIAS, FORMATOS, MARCAS, METODOS, REGIONES
+
+DIMENSIONES = ["region", "formato_tienda", "categoria_producto", "marca_tipo", "metodo_pago", "dia"]
+MEDIDAS = ["ventas_usd", "ventas_bs", "unidades", "lineas"]
+# El ticket es de una sola región, formato, método y día, pero abarca varias categorías/marcas:
+# su conteo es aditivo solo sobre estas dimensiones y se guarda en un sub-cubo aparte.
+DIMENSIONES_TICKET = ["region", "formato_tienda", "metodo_pago", "dia"]
+
+
+class SalesCube:
+    """Medidas aditivas por celda y conteo de tickets a nivel de ticket."""
+
+    def __init__(self, start: str = "2024-01-01", days: int = 365) -> None:
+        self.start = np.datetime64(start, "D")
+        self.labels = {
+            "region": list(REGIONES), "formato_tienda": list(FORMATOS), "categoria_producto": list(CATEGORIAS),
+            "marca_tipo": list(MARCAS), "metodo_pago": list(METODOS), "dia": list(self.start + np.arange(days)),
+        }
+        shape = tuple(len(self.labels[d]) for d in DIMENSIONES)
+        self.cells = {m: np.zeros(shape, dtype=np.int64 if m in ("unidades", "lineas") else float) for m in MEDIDAS}
+        self.tickets = np.zeros(tuple(len(self.labels[d]) for d in DIMENSIONES_TICKET), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, start: str = "2024-01-01", days: int = 365) -> "SalesCube":
+        return cls.from_chunks([df], start, days)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], start: str = "2024-01-01", days: int = 365) -> "SalesCube":
+        """Cubo a partir de un flujo de bloques de líneas (p. ej. retail_data.iter_transactions)."""
+        cube = cls(start, days)
+        for chunk in chunks:
+            cube.add(chunk)
+        return cube
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.cells["lineas"].shape
+
+    def _codes(self, df: pd.DataFrame, dims: list[str]) -> np.ndarray:
+        """Índice plano de celda de cada fila para las dimensiones dadas."""
+        codes = []
+        for d in dims:
+            if d == "dia":
+                dia = (df["fecha"].to_numpy().astype("datetime64[D]") - self.start).astype(np.int64)
+                if dia.min(initial=0) < 0 or dia.max(initial=0) >= len(self.labels["dia"]):
+                    raise ValueError("Fechas fuera del rango del cubo")
+                codes.append(dia)
+            else:
+                codes.append(pd.Categorical(df[d], categories=self.labels[d]).codes.astype(np.int64))
+        return np.ravel_multi_index(codes, tuple(len(self.labels[d]) for d in dims))
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Agrega un bloque de líneas POS (tickets completos) con bincount sobre índices de celda."""
+        key = self._codes(df, DIMENSIONES)
+        size = self.cells["lineas"].size
+        pesos = {"ventas_usd": df["precio_usd"], "ventas_bs": df["precio_bs"], "unidades": df["volumen_unidades"], "lineas": None}
+        for m, w in pesos.items():
+            w = None if w is None else w.to_numpy(dtype=float)
+            self.cells[m] += np.bincount(key, weights=w, minlength=size).reshape(self.shape).astype(self.cells[m].dtype)
+        primera = ~df["id_ticket"].duplicated().to_numpy()
+        key_t = self._codes(df[primera], DIMENSIONES_TICKET)
+        self.tickets += np.bincount(key_t, minlength=self.tickets.size).reshape(self.tickets.shape)
+
+    def _mask(self, dims: list[str], filtros: dict) -> tuple:
+        """Selector np.ix_ con las posiciones de cada dimensión que cumplen los filtros."""
+        pos = [
+            np.flatnonzero(np.isin(self.labels[d], list(filtros[d]))) if filtros.get(d) is not None
+            else np.arange(len(self.labels[d]))
+            for d in dims
+        ]
+        return np.ix_(*pos)
+
+    def total(self, medida: str, **filtros) -> float:
+        """Suma de una medida (o 'tickets') sobre las celdas que cumplen los filtros."""
+        if medida == "tickets":
+            return int(self.tickets[self._mask(DIMENSIONES_TICKET, filtros)].sum())
+        return self.cells[medida][self._mask(DIMENSIONES, filtros)].sum().item()
+
+    def rollup(self, dims: list[str], medidas: list[str] | None = None, **filtros) -> pd.DataFrame:
+        """Agregación por `dims` de las celdas filtradas (filas sin líneas se omiten)."""
+        medidas = medidas or MEDIDAS
+        dims = [d for d in DIMENSIONES if d in dims]  # mismo orden que los ejes del cubo
+        sel = self._mask(DIMENSIONES, filtros)
+        resto = tuple(i for i, d in enumerate(DIMENSIONES) if d not in dims)
+        idx = pd.MultiIndex.from_product(
+            [np.asarray(self.labels[d])[np.ravel(sel[DIMENSIONES.index(d)])] for d in dims], names=dims)
+        out = pd.DataFrame({m: self.cells[m][sel].sum(axis=resto).ravel() for m in medidas + ["lineas"]}, index=idx)
+        out = out[out["lineas"] > 0]
+        return out[medidas].reset_index()
+
+    def active_days(self, **filtros) -> np.ndarray:
+        """Fechas con al menos una línea bajo los filtros."""
+        sel = self._mask(DIMENSIONES, filtros)
+        por_dia = self.cells["lineas"][sel].sum(axis=tuple(range(len(DIMENSIONES) - 1)))
+        return np.asarray(self.labels["dia"])[np.ravel(sel[-1])][por_dia > 0]
@@ -0,0 +1,157 @@
+# Reservas estocásticas: bootstrap ODP (England-Verrall) y Mack sobre un triángulo de pagos incrementales
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .triangles import age_to_age_factors, chain_ladder_batch, observed_mask, to_cumulative
+
+MODELOS = {"odp": "Bootstrap ODP (England-Verrall)", "mack": "Bootstrap Mack"}
+
+
+@dataclass(frozen=True)
+class ReserveDistribution:
+    """Distribución simulada de la reserva IBNR y de los pagos futuros por período calendario."""
+
+    model: str
+    ibnr: np.ndarray  # (n_sims,)
+    cashflows: np.ndarray  # (n_sims, n_periodos_futuros)
+
+    @property
+    def n_sims(self) -> int:
+        return len(self.ibnr)
+
+    def percentile(self, q: float) -> float:
+        """Percentil q (0-100) de la reserva IBNR."""
+        return float(np.percentile(self.ibnr, q))
+
+    def cashflow_fan(self, qs=(2.5, 12.5, 50, 87.5, 97.5)) -> pd.DataFrame:
+        """Percentiles de pagos por período calendario futuro (filas) — base del fan chart."""
+        fan = np.percentile(self.cashflows, qs, axis=0).T
+        return pd.DataFrame(fan, index=pd.RangeIndex(1, fan.shape[0] + 1, name="periodo"),
+                            columns=[f"p{q:g}" for q in qs])
+
+
+def triangle_hash(tri) -> str:
+    """Huella estable del triángulo para usar como clave de caché."""
+    arr = np.ascontiguousarray(np.asarray(tri, dtype=np.float64))
+    return hashlib.sha1(str(arr.shape).encode() + arr.tobytes()).hexdigest()
+
+
+def _future_calendar_matrix(n_origin: int, n_dev: int) -> np.ndarray:
+    """Matriz (n_origen·n_dev, n_futuros) que suma celdas futuras por período calendario."""
+    cal = (np.arange(n_origin)[:, None] + np.arange(n_dev)[None, :]).ravel() - n_origin
+    m = np.zeros((n_origin * n_dev, n_dev - 1))
+    fut = cal >= 0
+    m[np.flatnonzero(fut), cal[fut]] = 1.0
+    return m
+
+
+def _fit_odp(tri: np.ndarray) -> dict:
+    """Ajuste GLM-equivalente: incrementales esperados hacia atrás desde la diagonal y residuos de Pearson."""
+    n_origin, n_dev = tri.shape
+    mask = observed_mask(n_origin, n_dev)
+    cum = to_cumulative(tri)[0]
+    f = age_to_age_factors(cum)[0]
+    last = np.minimum(n_origin - 1 - np.arange(n_origin), n_dev - 1)
+    # C_ij ajustado = C_i,last / Π_{k=j}^{last-1} f_k
+    cdf_to = np.concatenate([[1.0], np.cumprod(f)])  # Π_{k<j} f_k
+    fitted_cum = cum[np.arange(n_origin), last][:, None] * cdf_to[None, :] / cdf_to[last][:, None]
+    fitted = np.where(mask, np.diff(fitted_cum, axis=1, prepend=0.0), 0.0)
+    scale = np.sqrt(np.abs(fitted))
+    resid = np.divide(tri - fitted, scale, out=np.zeros_like(fitted), where=mask & (scale > 0))
+    n_obs = int(mask.sum())
+    n_par = n_origin + n_dev - 1
+    dof = max(n_obs - n_par, 1)
+    phi = float((resid[mask] ** 2).sum() / dof)
+    pool = resid[mask & (resid != 0)] * np.sqrt(n_obs / dof)
+    return {"fitted": fitted, "scale": scale, "mask": mask, "residuals": pool, "phi": max(phi, 1e-12)}
+
+
+def _fit_mack(tri: np.ndarray) -> dict:
+    """Factores de Chain Ladder y varianzas σ²_j de Mack (con extrapolación de la última)."""
+    n_origin, n_dev = tri.shape
+    mask = observed_mask(n_origin, n_dev)
+    cum = to_cumulative(tri)[0]
+    f = age_to_age_factors(cum)[0]
+    link = mask[:, 1:]  # orígenes con la columna j+1 observada
+    base = np.where(link, cum[:, :-1], 0.0)
+    ratios = np.divide(cum[:, 1:], cum[:, :-1], out=np.zeros_like(base), where=link & (cum[:, :-1] > 0))
+    n_links = link.sum(axis=0)
+    ss = (base * (ratios - f[None, :]) ** 2 * link).sum(axis=0)
+    sigma2 = np.divide(ss, n_links - 1, out=np.full_like(ss, np.nan), where=n_links > 1)
+    for j in np.flatnonzero(np.isnan(sigma2)):
+        prev = sigma2[:j][~np.isnan(sigma2[:j])]
+        sigma2[j] = min(prev[-1] ** 2 / prev[-2], prev[-2], prev[-1]) if len(prev) >= 2 else (prev[-1] if len(prev) else 0.0)
+    return {"cum": cum, "f": f, "sigma2": sigma2, "volume": base.sum(axis=0), "mask": mask}
+
+
+def _simulate_odp(fit: dict, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Incrementales futuros simulados (size, n_origen, n_dev) con error de parámetro y de proceso."""
+    mask, fitted, scale, pool, phi = fit["mask"], fit["fitted"], fit["scale"], fit["residuals"], fit["phi"]
+    draws = pool[rng.integers(0, len(pool), size=(size,) + mask.shape)]
+    pseudo = np.where(mask, fitted + draws * scale, 0.0)
+    mean = chain_ladder_batch(pseudo).incremental
+    future = ~mask
+    pos = future & (mean > 0)
+    shape = np.divide(mean, phi, out=np.ones_like(mean), where=pos)
+    return np.where(pos, rng.gamma(shape, phi), np.where(future, mean, 0.0))
+
+
+def _simulate_mack(fit: dict, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Proyección recursiva con factores perturbados (parámetro) y ruido normal de proceso."""
+    cum, f, sigma2, volume, mask = fit["cum"], fit["f"], fit["sigma2"], fit["volume"], fit["mask"]
+    n_origin, n_dev = cum.shape
+    proj = np.broadcast_to(cum, (size, n_origin, n_dev)).copy()
+    for j in range(1, n_dev):
+        sd_f = np.sqrt(sigma2[j - 1] / volume[j - 1]) if volume[j - 1] > 0 else 0.0
+        f_star = rng.normal(f[j - 1], sd_f, size=(size, 1))
+        prev = proj[:, :, j - 1]
+        new = prev * f_star + rng.standard_normal((size, n_origin)) * np.sqrt(sigma2[j - 1] * np.maximum(prev, 0.0))
+        proj[:, :, j] = np.where(mask[:, j], cum[:, j], new)
+    incremental = np.diff(proj, axis=2, prepend=0.0)
+    return np.where(mask, 0.0, incremental)
+
+
+def _simulate_chunk(task) -> tuple[np.ndarray, np.ndarray]:
+    model, fit, size, seed_seq, cal_matrix = task
+    rng = np.random.default_rng(seed_seq)
+    future = _simulate_odp(fit, size, rng) if model == "odp" else _simulate_mack(fit, size, rng)
+    flows = future.reshape(size, -1) @ cal_matrix
+    return flows.sum(axis=1), flows
+
+
+def bootstrap_reserves(
+    tri,
+    model: str = "odp",
+    n_sims: int = 10_000,
+    seed: int = 2024,
+    chunk_size: int = 5_000,
+    workers: int = 1,
+) -> ReserveDistribution:
+    """Simula la distribución de la reserva IBNR de un triángulo incremental.
+
+    Las simulaciones se dividen en bloques de `chunk_size` con flujos SeedSequence independientes;
+    con workers > 1 los bloques se reparten en un ProcessPoolExecutor. El resultado depende solo
+    de (triángulo, model, n_sims, seed, chunk_size), no del número de procesos.
+    """
+    if model not in MODELOS:
+        raise ValueError(f"Modelo no soportado: {model!r} (use {', '.join(MODELOS)})")
+    tri = np.asarray(tri, dtype=float)
+    fit = _fit_odp(tri) if model == "odp" else _fit_mack(tri)
+    cal_matrix = _future_calendar_matrix(*tri.shape)
+    sizes = [min(chunk_size, n_sims - k) for k in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(model, fit, size, ss, cal_matrix) for size, ss in zip(sizes, seeds)]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_simulate_chunk, tasks))
+    else:
+        parts = [_simulate_chunk(t) for t in tasks]
+    return ReserveDistribution(
+        model=model,
+        ibnr=np.concatenate([p[0] for p in parts]),
+        cashflows=np.concatenate([p[1] for p in parts]),
+    )
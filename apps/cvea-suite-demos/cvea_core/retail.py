@@ -0,0 +1,58 @@
+# Retail Suite sin Streamlit: KPIs comerciales sobre el cubo y curva de demanda multimoneda
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .olap import SalesCube
+
+
+@dataclass(frozen=True)
+class RetailKPIs:
+    """KPIs del panel comercial para una combinación de filtros del cubo."""
+
+    volumen_semanal: float  # unidades por semana en el rango de días con ventas
+    ticket_promedio: float  # USD por ticket
+    tickets: float
+
+
+def retail_kpis(cubo: SalesCube, **filtros) -> RetailKPIs:
+    """Volumen semanal y ticket promedio sumando celdas del cubo (sin re-escanear líneas)."""
+    dias = cubo.active_days(**filtros)
+    span = (dias.max() - dias.min()).astype(int) if len(dias) else 0
+    tickets = cubo.total("tickets", **filtros)
+    return RetailKPIs(
+        volumen_semanal=cubo.total("unidades", **filtros) / span * 7 if span else 0.0,
+        ticket_promedio=cubo.total("ventas_usd", **filtros) / tickets if tickets else 0.0,
+        tickets=tickets,
+    )
+
+
+def category_share(cubo: SalesCube, **filtros) -> pd.DataFrame:
+    """Ventas USD y participación por categoría y tipo de marca."""
+    part = cubo.rollup(["categoria_producto", "marca_tipo"], ["ventas_usd"], **filtros).rename(columns={"ventas_usd": "precio_usd"})
+    part["participacion"] = part["precio_usd"] / part["precio_usd"].sum()
+    return part
+
+
+@dataclass(frozen=True)
+class DemandCurve:
+    """Volumen proyectado por precio y pisos de precio a tipo de cambio oficial y paralelo."""
+
+    precios: np.ndarray
+    demanda: np.ndarray
+    p_min_oficial: float
+    p_min_paralelo: float
+
+    @property
+    def demand_destruction(self) -> bool:
+        """El piso paralelo supera en más de 50% al oficial: precio bajo el umbral de arbitraje."""
+        return self.p_min_paralelo > self.p_min_oficial * 1.5
+
+
+def demand_curve(costo_import: float, tc_oficial: float, tc_paralelo: float,
+                 precios: np.ndarray | None = None) -> DemandCurve:
+    """Curva de demanda lineal con restricciones P ≥ s_t·P* y P ≥ b_t·P*."""
+    precios = np.linspace(30, 80, 50) if precios is None else np.asarray(precios, dtype=float)
+    demanda = np.maximum(1000 - 8 * precios + 0.1 * tc_paralelo * precios, 0)
+    return DemandCurve(precios, demanda, tc_oficial * costo_import, tc_paralelo * costo_import)
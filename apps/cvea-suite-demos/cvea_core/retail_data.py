@@ -0,0 +1,116 @@
+# Generador columnar de transacciones POS para la Retail Suite
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+CATEGORIAS = ["Alimentos", "Bebidas", "Lácteos", "Higiene", "Limpieza", "Panadería"]
+P_CATEGORIAS = [0.25, 0.2, 0.15, 0.15, 0.15, 0.1]
+MARCAS = ["Tradicional", "Genérica"]
+P_MARCAS = [0.61, 0.39]
+METODOS = ["Divisas", "Bs", "Cripto"]
+P_METODOS = [0.5, 0.35, 0.15]
+REGIONES = ["Central", "Oriente", "Occidente", "Andes"]
+P_REGIONES = [0.4, 0.25, 0.2, 0.15]
+FORMATOS = ["Supermercado", "Farmacia", "Bodegón"]
+P_FORMATOS = [0.5, 0.3, 0.2]
+SKUS = [f"SKU-{k}" for k in range(1, 500)]
+
+# Canastas: líneas por ticket ~ 1 + Poisson(LINEAS_EXTRA_MEDIA); popularidad de SKU tipo Zipf y
+# un complemento fijo por SKU (p. ej. Harina → Margarina) que se agrega con P_COMPLEMENTO.
+LINEAS_EXTRA_MEDIA = 2.5
+P_COMPLEMENTO = 0.3
+_rank = np.arange(1, len(SKUS) + 1)
+P_SKUS = (_rank + 10.0) ** -1.1 / ((_rank + 10.0) ** -1.1).sum()
+COMPLEMENTO = np.random.default_rng(4242).permutation(len(SKUS)).astype(np.int16)
+
+COLUMNAS = [
+    "id_ticket", "fecha", "SKU", "categoria_producto", "marca_tipo", "precio_bs", "precio_usd",
+    "tasa_cambio_oficial", "tasa_cambio_paralela", "volumen_unidades", "metodo_pago",
+    "region", "formato_tienda",
+]
+
+
+def _categorical(rng: np.random.Generator, labels: list[str], n: int, p=None) -> pd.Categorical:
+    """Muestrea códigos enteros y los envuelve como Categorical sin crear objetos str por fila."""
+    codes = rng.choice(len(labels), size=n, p=p).astype(np.int16 if len(labels) > 127 else np.int8)
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def _baskets(rng: np.random.Generator, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Ticket (0..T-1) y SKU de cada una de las n líneas; el último ticket puede quedar truncado."""
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int16)
+    tamanos = 1 + rng.poisson(LINEAS_EXTRA_MEDIA, size=n // 2 + 1)
+    # n // 2 + 1 tickets suelen cubrir ~1,75·n líneas, pero no está garantizado: se agregan más
+    while tamanos.sum() < n:
+        tamanos = np.r_[tamanos, 1 + rng.poisson(LINEAS_EXTRA_MEDIA, size=n // 2 + 1)]
+    n_tickets = int(np.searchsorted(np.cumsum(tamanos), n)) + 1
+    ticket = np.repeat(np.arange(n_tickets), tamanos[:n_tickets])[:n]
+    inicio = np.r_[0, np.flatnonzero(np.diff(ticket)) + 1]
+    sku = rng.choice(len(SKUS), size=n, p=P_SKUS).astype(np.int16)
+    # Afinidad: las líneas siguientes del ticket toman el complemento del primer SKU con P_COMPLEMENTO
+    ancla = np.repeat(sku[inicio], np.diff(np.r_[inicio, n]))
+    comp = (rng.random(n) < P_COMPLEMENTO) & (np.arange(n) != inicio[ticket])
+    sku[comp] = COMPLEMENTO[ancla[comp]]
+    return ticket, sku
+
+
+def _transaction_columns(rng: np.random.Generator, n: int, first_id: int, start: str, days: int) -> pd.DataFrame:
+    """Construye un bloque de n líneas POS agrupadas en tickets, una columna a la vez.
+
+    Fecha, tasas, método de pago, región y formato son del ticket; SKU, categoría, marca, precio
+    y volumen son de la línea.
+    """
+    ticket, sku = _baskets(rng, n)
+    n_tickets = int(ticket[-1]) + 1 if n else 0
+    dia = rng.integers(0, days, size=n_tickets)[ticket]
+    fecha = np.datetime64(start, "ns") + dia.astype("timedelta64[D]")
+    precio_bs = rng.lognormal(3, 1.2, n) * 50
+    tasa_oficial = (36 + rng.uniform(0, 2, n_tickets))[ticket]
+    tasa_paralela = tasa_oficial * (1 + rng.uniform(0.05, 0.2, n_tickets))[ticket]
+
+    def _por_ticket(labels, p):
+        return pd.Categorical.from_codes(rng.choice(len(labels), size=n_tickets, p=p).astype(np.int8)[ticket], categories=labels)
+
+    return pd.DataFrame({
+        "id_ticket": first_id + ticket.astype(np.int64),
+        "fecha": fecha,
+        "SKU": pd.Categorical.from_codes(sku, categories=SKUS),
+        "categoria_producto": _categorical(rng, CATEGORIAS, n, P_CATEGORIAS),
+        "marca_tipo": _categorical(rng, MARCAS, n, P_MARCAS),
+        "precio_bs": precio_bs,
+        "precio_usd": precio_bs / tasa_paralela,
+        "tasa_cambio_oficial": tasa_oficial,
+        "tasa_cambio_paralela": tasa_paralela,
+        "volumen_unidades": rng.integers(1, 10, size=n, dtype=np.int16),
+        "metodo_pago": _por_ticket(METODOS, P_METODOS),
+        "region": _por_ticket(REGIONES, P_REGIONES),
+        "formato_tienda": _por_ticket(FORMATOS, P_FORMATOS),
+    }, columns=COLUMNAS)
+
+
+def generate_transactions(n: int = 55_000, seed: int = 101, start: str = "2024-01-01", days: int = 365) -> pd.DataFrame:
+    """Genera n líneas POS (≈ n / 3,5 tickets) de forma vectorizada (mismo esquema que la página Retail)."""
+    return _transaction_columns(np.random.default_rng(seed), n, 1, start, days)
+
+
+def iter_transactions(
+    n: int,
+    chunk_size: int = 1_000_000,
+    seed: int = 101,
+    start: str = "2024-01-01",
+    days: int = 365,
+) -> Iterator[pd.DataFrame]:
+    """Genera n líneas POS como flujo de bloques de tamaño fijo (memoria acotada por chunk_size).
+
+    Cada bloque usa un flujo aleatorio independiente derivado de `seed` con SeedSequence,
+    de modo que el resultado es reproducible para un mismo (n, chunk_size, seed). Los tickets
+    no cruzan bloques: los ids del bloque k parten de k·chunk_size + 1, así que son únicos.
+    """
+    n_chunks = -(-n // chunk_size) if n > 0 else 0
+    streams = np.random.SeedSequence(seed).spawn(n_chunks)
+    for k, ss in enumerate(streams):
+        first = k * chunk_size
+        size = min(chunk_size, n - first)
+        yield _transaction_columns(np.random.default_rng(ss), size, first + 1, start, days)
@@ -0,0 +1,132 @@
+# Motor Monte Carlo de probabilidad de ruina para el fondo de salud (Health Suite)
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+N_BINS = 4096
+
+
+@dataclass(frozen=True)
+class RuinResult:
+    """Resumen de una simulación de ruina: probabilidad, tiempos de ruina y bandas de cuantiles."""
+
+    n_paths: int
+    years: int
+    prob_ruin: float
+    ci: tuple[float, float]  # IC 95% (Wilson)
+    time_to_ruin: np.ndarray  # (years,) conteo de primeras ruinas en el año t = 1..years
+    quantiles: tuple[float, ...]
+    bands: np.ndarray  # (len(quantiles), years + 1)
+    mean_path: np.ndarray  # (years + 1,)
+    sample_paths: np.ndarray  # (n_muestra, years + 1) para graficar
+
+    def time_to_ruin_share(self) -> np.ndarray:
+        """Distribución del año de ruina condicionada a que ocurra."""
+        total = self.time_to_ruin.sum()
+        return self.time_to_ruin / total if total else np.zeros_like(self.time_to_ruin, dtype=float)
+
+    def mean_ruin_year(self) -> float | None:
+        """Año medio de ruina si ocurre; None si ninguna trayectoria se arruina."""
+        share = self.time_to_ruin_share()
+        return float((np.arange(1, self.years + 1) * share).sum()) if share.sum() else None
+
+
+def wilson_interval(k: int, n: int, z: float = 1.96) -> tuple[float, float]:
+    """Intervalo de confianza de Wilson para una proporción binomial."""
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    den = 1 + z**2 / n
+    centro = (p + z**2 / (2 * n)) / den
+    radio = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / den
+    return max(0.0, centro - radio), min(1.0, centro + radio)
+
+
+def _paths(params: dict, size: int, rng: np.random.Generator) -> np.ndarray:
+    """Trayectorias (size, years + 1) del patrimonio con ruina absorbente en 0."""
+    years = params["years"]
+    infl = (1 + params["inflacion_medica"]) ** np.arange(1, years + 1)
+    gastos = params["gastos_base"] * infl * (1 + rng.standard_normal((size, years)) * params["volatilidad"])
+    paths = np.empty((size, years + 1))
+    paths[:, 0] = params["patrimonio_inicial"]
+    np.cumsum(params["ingresos_anuales"] - gastos, axis=1, out=paths[:, 1:])
+    paths[:, 1:] += params["patrimonio_inicial"]
+    arruinado = np.maximum.accumulate(paths <= 0, axis=1)
+    paths[arruinado] = 0.0
+    return paths
+
+
+def _path_stats(paths: np.ndarray, years: int, edges: np.ndarray) -> tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    """Agregados de un bloque: ruinas, primeras ruinas por año, histograma por año y suma por año."""
+    ruined = paths[:, 1:] <= 0
+    first = np.where(ruined.any(axis=1), ruined.argmax(axis=1), -1)
+    time_counts = np.bincount(first[first >= 0], minlength=years)
+    idx = np.clip(np.searchsorted(edges, paths, side="right") - 1, 0, len(edges) - 2)
+    offsets = np.arange(paths.shape[1]) * (len(edges) - 1)
+    hist = np.bincount((idx + offsets).ravel(), minlength=paths.shape[1] * (len(edges) - 1))
+    return int((first >= 0).sum()), time_counts, hist.reshape(paths.shape[1], -1), paths.sum(axis=0)
+
+
+def _chunk_stats(task) -> tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    params, size, seed_seq, edges = task
+    return _path_stats(_paths(params, size, np.random.default_rng(seed_seq)), params["years"], edges)
+
+
+def _hist_quantiles(hist: np.ndarray, edges: np.ndarray, qs) -> np.ndarray:
+    """Cuantiles por año interpolando linealmente dentro del bin del histograma acumulado."""
+    cdf = np.cumsum(hist, axis=1) / hist.sum(axis=1, keepdims=True)
+    out = np.empty((len(qs), hist.shape[0]))
+    for t in range(hist.shape[0]):
+        out[:, t] = np.interp(qs, np.concatenate([[0.0], cdf[t]]), edges)
+    return out
+
+
+def simulate_ruin(
+    patrimonio_inicial: float = 5_000_000,
+    ingresos_anuales: float = 3_200_000,
+    gastos_base: float = 2_800_000,
+    inflacion_medica: float = 0.25,
+    years: int = 5,
+    volatilidad: float = 0.1,
+    n_paths: int = 1_000_000,
+    seed: int = 222,
+    chunk_size: int = 200_000,
+    workers: int = 1,
+    n_sample: int = 20,
+    quantiles: tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95),
+) -> RuinResult:
+    """Probabilidad de ruina del fondo con n_paths trayectorias en bloques de memoria acotada.
+
+    Cada bloque usa un Generator independiente (SeedSequence.spawn). Los cuantiles se obtienen de
+    un histograma por año cuyo rango se fija con el primer bloque, de modo que la memoria no crece
+    con n_paths. Con workers > 1 los bloques restantes se reparten entre procesos.
+    """
+    params = dict(patrimonio_inicial=patrimonio_inicial, ingresos_anuales=ingresos_anuales, gastos_base=gastos_base,
+                  inflacion_medica=inflacion_medica, years=years, volatilidad=volatilidad)
+    sizes = [min(chunk_size, n_paths - k) for k in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    # Bloque piloto: muestra para el gráfico y rango del histograma (el patrimonio es ≥ 0 por la
+    # ruina absorbente; el máximo se amplía para cubrir la cola superior de los demás bloques)
+    pilot = _paths(params, sizes[0], np.random.default_rng(seeds[0]))
+    edges = np.linspace(0.0, max(float(pilot.max()), 1.0) * 1.5, N_BINS + 1)
+    parts = [_path_stats(pilot, years, edges)]
+    tasks = [(params, size, ss, edges) for size, ss in zip(sizes[1:], seeds[1:])]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts += list(ex.map(_chunk_stats, tasks))
+    else:
+        parts += [_chunk_stats(t) for t in tasks]
+    ruinas = sum(p[0] for p in parts)
+    hist = sum(p[2] for p in parts)
+    return RuinResult(
+        n_paths=n_paths,
+        years=years,
+        prob_ruin=ruinas / n_paths,
+        ci=wilson_interval(ruinas, n_paths),
+        time_to_ruin=sum(p[1] for p in parts),
+        quantiles=tuple(quantiles),
+        bands=_hist_quantiles(hist, edges, quantiles),
+        mean_path=sum(p[3] for p in parts) / n_paths,
+        sample_paths=pilot[:n_sample].copy(),
+    )
@@ -0,0 +1,145 @@
+# Escenarios de choque: los controles de las páginas como parámetros y los KPIs resultantes por suite
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .bank import BankIndicators, bank_indicators
+from .ecl import portfolio_ecl
+from .insurance import MODELOS_IBNR, StressResult, inflation_index, origin_premiums, project_ibnr, runoff_triangle, stress_ratio
+from .ruin import RuinResult, simulate_ruin
+from .triangles import TriangleProjection
+
+# Valores por defecto = posición inicial de los controles (fracciones, no porcentajes)
+PARAMETROS = {
+    "choque_macro": 0.0,  # Bank: choque macroeconómico
+    "meta_liquidez": 0.30,
+    "meta_solvencia": 0.15,
+    "lgd": 0.45,
+    "choque_infl": 0.0,  # Insurance: choque inflacionario exógeno (IACL y estrés)
+    "modelo_reserva": "chain_ladder",
+    "inflacion_medica": 0.25,  # Health: inflación médica anual del fondo
+    "n_paths": 1_000_000,
+}
+
+
+@dataclass(frozen=True)
+class BaseData:
+    """Datasets que no cambian entre escenarios: se cargan una vez y se reutilizan."""
+
+    cartera: pd.DataFrame
+    series: pd.DataFrame
+    triangulo: pd.DataFrame
+    primas: np.ndarray
+    inflacion: np.ndarray
+
+    @classmethod
+    def build(cls, cartera: pd.DataFrame, series: pd.DataFrame, years: int = 10) -> "BaseData":
+        return cls(cartera, series, runoff_triangle(years), origin_premiums(years), inflation_index(years))
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """KPIs de todas las suites para un escenario."""
+
+    escenario: str
+    parametros: dict
+    banco: BankIndicators
+    ecl: pd.DataFrame
+    ibnr: TriangleProjection
+    estres: StressResult
+    ruina: RuinResult
+
+    def summary(self) -> dict:
+        """Una fila plana: parámetros y KPIs, para tablas y Parquet."""
+        ecl, ead = float(self.ecl["ECL"].sum()), float(self.ecl["EAD"].sum())
+        return {
+            "escenario": self.escenario,
+            **self.parametros,
+            "liquidez": self.banco.liquidez,
+            "solvencia": self.banco.solvencia,
+            "morosidad": self.banco.morosidad,
+            "intermediacion": self.banco.intermediacion,
+            "cumple_liquidez": self.banco.liquidez >= self.parametros["meta_liquidez"],
+            "cumple_solvencia": self.banco.solvencia >= self.parametros["meta_solvencia"],
+            "ecl": ecl,
+            "cobertura_ecl": ecl / ead if ead else 0.0,
+            "ibnr": max(0.0, float(self.ibnr.ibnr[0])),
+            "ratio_ibnr_post": self.estres.post,
+            "variacion_ratio_ibnr": self.estres.change,
+            "prob_ruina": self.ruina.prob_ruin,
+            "prob_ruina_ic_inf": self.ruina.ci[0],
+            "prob_ruina_ic_sup": self.ruina.ci[1],
+            "anio_medio_ruina": self.ruina.mean_ruin_year(),
+        }
+
+
+def normalize(params: dict) -> dict:
+    """Completa con PARAMETROS y valida nombres y modelo de reserva (clave o etiqueta de MODELOS_IBNR)."""
+    desconocidos = set(params) - set(PARAMETROS)
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(desconocidos))} (válidos: {', '.join(PARAMETROS)})")
+    out = {**PARAMETROS, **{k: v for k, v in params.items() if not (isinstance(v, float) and np.isnan(v))}}
+    modelo = out["modelo_reserva"]
+    if modelo not in MODELOS_IBNR:
+        por_etiqueta = {v: k for k, v in MODELOS_IBNR.items()}
+        if modelo not in por_etiqueta:
+            raise ValueError(f"Modelo de reserva desconocido: {modelo!r} (opciones: {', '.join(MODELOS_IBNR)})")
+        out["modelo_reserva"] = por_etiqueta[modelo]
+    for k, v in PARAMETROS.items():
+        if k != "modelo_reserva":
+            out[k] = type(v)(out[k])
+    return out
+
+
+def scenario_grid(spec) -> list[dict]:
+    """Escenarios desde una lista de dicts o desde {"base": {...}, "grid": {param: [valores]}} (producto cartesiano).
+
+    Cada escenario lleva `escenario` (nombre); si falta, se numera en orden.
+    """
+    if isinstance(spec, dict):
+        base = spec.get("base", {})
+        grid = spec.get("grid", {})
+        nombres = list(grid)
+        filas = [{**base, **dict(zip(nombres, valores))} for valores in itertools.product(*grid.values())]
+        filas += [{**base, **f} for f in spec.get("escenarios", [])]
+    else:
+        filas = list(spec)
+    escenarios = []
+    for i, fila in enumerate(filas, 1):
+        fila = dict(fila)
+        nombre = str(fila.pop("escenario", None) or f"esc-{i:03d}")
+        escenarios.append({"escenario": nombre, **normalize(fila)})
+    nombres = [e["escenario"] for e in escenarios]
+    repetidos = sorted({n for n in nombres if nombres.count(n) > 1})
+    if repetidos:
+        raise ValueError(f"Nombres de escenario repetidos: {', '.join(repetidos)}")
+    return escenarios
+
+
+def _memo(memo: dict | None, clave: tuple, calc):
+    if memo is None:
+        return calc()
+    if clave not in memo:
+        memo[clave] = calc()
+    return memo[clave]
+
+
+def evaluate_scenario(escenario: dict, base: BaseData, memo: dict | None = None) -> ScenarioResult:
+    """KPIs de Bank, Insurance y Health para un escenario ya normalizado.
+
+    Con `memo` (un dict por proceso) la ECL y la simulación de ruina se reutilizan entre
+    escenarios que solo difieren en otros parámetros.
+    """
+    p = {k: v for k, v in escenario.items() if k != "escenario"}
+    return ScenarioResult(
+        escenario=escenario["escenario"],
+        parametros=p,
+        banco=bank_indicators(base.series, p["choque_macro"]),
+        ecl=_memo(memo, ("ecl", p["lgd"]), lambda: portfolio_ecl(base.cartera, p["lgd"])),
+        ibnr=project_ibnr(base.triangulo, p["modelo_reserva"], premiums=base.primas, inflation=base.inflacion, shock=p["choque_infl"]),
+        estres=stress_ratio(p["choque_infl"]),
+        ruina=_memo(memo, ("ruina", p["inflacion_medica"], p["n_paths"]),
+                    lambda: simulate_ruin(inflacion_medica=p["inflacion_medica"], n_paths=p["n_paths"])),
+    )
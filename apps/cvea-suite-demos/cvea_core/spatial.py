@@ -0,0 +1,80 @@
+# Agregación espacial en rejilla multi-resolución para el mapa de flota de la Control Suite
+#
+# Los registros GPS se acumulan una vez en la rejilla más fina (bincount por celda); cada nivel
+# más grueso suma bloques 2×2 del anterior. El mapa recibe solo las celdas no vacías del nivel
+# elegido, así que el tamaño del payload depende de la resolución y no del número de puntos.
+import numpy as np
+import pandas as pd
+
+ESTADOS = ["Activo", "En Mantenimiento", "Detenido"]
+MEDIDAS = ["consumo_combustible_litros", "costo_operativo_usd", "kilometros_recorridos"]
+
+
+class SpatialGrid:
+    """Rejilla cuadrada lat/lon con `levels` resoluciones: el nivel k tiene 4·2^k celdas por lado."""
+
+    def __init__(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float, levels: int = 6) -> None:
+        self.lat_min, self.lat_max = lat_min, lat_max
+        self.lon_min, self.lon_max = lon_min, lon_max
+        self.levels = levels
+        self.n = 4 * 2 ** (levels - 1)  # celdas por lado en el nivel más fino
+        self.count = np.zeros((self.n, self.n), dtype=np.int64)
+        self.sums = {m: np.zeros((self.n, self.n)) for m in MEDIDAS}
+        self.estados = np.zeros((len(ESTADOS), self.n, self.n), dtype=np.int64)
+        self._cache: dict[int, pd.DataFrame] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, levels: int = 6, chunk_size: int = 1_000_000, margin: float = 1e-9) -> "SpatialGrid":
+        """Rejilla con los límites de `df` alimentada por bloques de registros."""
+        grid = cls(df["lat"].min() - margin, df["lat"].max() + margin, df["lon"].min() - margin, df["lon"].max() + margin, levels)
+        for k in range(0, len(df), chunk_size):
+            grid.add(df.iloc[k:k + chunk_size])
+        return grid
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Acumula un bloque de registros (lat, lon, medidas, estado_operativo) en la rejilla fina."""
+        n = self.n
+        fila = ((df["lat"].to_numpy() - self.lat_min) / (self.lat_max - self.lat_min) * n).astype(np.int64)
+        col = ((df["lon"].to_numpy() - self.lon_min) / (self.lon_max - self.lon_min) * n).astype(np.int64)
+        dentro = (fila >= 0) & (fila < n) & (col >= 0) & (col < n)
+        key = fila[dentro] * n + col[dentro]
+        self.count += np.bincount(key, minlength=n * n).reshape(n, n)
+        for m in MEDIDAS:
+            self.sums[m] += np.bincount(key, weights=df[m].to_numpy(dtype=float)[dentro], minlength=n * n).reshape(n, n)
+        estado = pd.Categorical(df["estado_operativo"], categories=ESTADOS).codes.astype(np.int64)[dentro]
+        ok = estado >= 0
+        self.estados += np.bincount(estado[ok] * n * n + key[ok], minlength=len(ESTADOS) * n * n).reshape(len(ESTADOS), n, n)
+        self._cache.clear()
+
+    def _coarsen(self, arr: np.ndarray, level: int) -> np.ndarray:
+        f = 2 ** (self.levels - 1 - level)
+        m = self.n // f
+        return arr.reshape(*arr.shape[:-2], m, f, m, f).sum(axis=(-3, -1))
+
+    def cells(self, level: int) -> pd.DataFrame:
+        """Celdas no vacías del nivel (0 = más grueso) con polígono, conteo, medidas y mezcla de estados."""
+        if level not in self._cache:
+            count = self._coarsen(self.count, level)
+            m = count.shape[0]
+            fila, col = np.nonzero(count)
+            dlat = (self.lat_max - self.lat_min) / m
+            dlon = (self.lon_max - self.lon_min) / m
+            lat0 = self.lat_min + fila * dlat
+            lon0 = self.lon_min + col * dlon
+            c = count[fila, col]
+            out = pd.DataFrame({"lat": lat0 + dlat / 2, "lon": lon0 + dlon / 2, "registros": c})
+            for med in MEDIDAS:
+                out[med] = self._coarsen(self.sums[med], level)[fila, col]
+            out["consumo_medio"] = out["consumo_combustible_litros"] / c
+            estados = self._coarsen(self.estados, level)[:, fila, col]
+            for k, e in enumerate(ESTADOS):
+                out[f"pct_{e}"] = estados[k] / c
+            out["poligono"] = [
+                [[lo, la], [lo + dlon, la], [lo + dlon, la + dlat], [lo, la + dlat]] for la, lo in zip(lat0, lon0)
+            ]
+            self._cache[level] = out
+        return self._cache[level]
+
+    def cell_size_km(self, level: int) -> float:
+        """Lado aproximado de la celda (km, en latitud) del nivel."""
+        return (self.lat_max - self.lat_min) / (4 * 2**level) * 111.0
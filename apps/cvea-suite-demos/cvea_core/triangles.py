@@ -0,0 +1,146 @@
+# Motor vectorizado de triángulos de desarrollo (Chain Ladder, BF e IACL) para la Insurance Suite
+#
+# Todas las funciones trabajan sobre un arreglo apilado de triángulos incrementales con forma
+# (n_triangulos, n_origen, n_desarrollo). La celda [t, i, j] se considera observada si
+# i + j < n_origen (diagonal más reciente = último período calendario); el resto se ignora.
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class TriangleProjection:
+    """Resultado de proyectar un lote de triángulos."""
+
+    factors: np.ndarray  # (n_tri, n_dev - 1) factores edad a edad
+    cumulative: np.ndarray  # (n_tri, n_origen, n_dev) acumulados proyectados
+    incremental: np.ndarray  # (n_tri, n_origen, n_dev) pagos incrementales proyectados
+    ultimate: np.ndarray  # (n_tri, n_origen) siniestralidad última por año de origen
+    ibnr: np.ndarray  # (n_tri,) total proyectado − total observado
+
+    def to_frame(self, k: int = 0, index=None, columns=None) -> pd.DataFrame:
+        """Triángulo incremental proyectado k como DataFrame (mismo formato que la página)."""
+        return pd.DataFrame(self.incremental[k], index=index, columns=columns)
+
+
+def stack_triangles(triangles) -> np.ndarray:
+    """Apila DataFrames o arreglos 2D del mismo tamaño en un arreglo (n_tri, n_origen, n_dev)."""
+    return np.stack([np.asarray(t, dtype=float) for t in triangles])
+
+
+def _as_batch(tri) -> np.ndarray:
+    arr = np.asarray(tri, dtype=float)
+    return arr[None] if arr.ndim == 2 else arr
+
+
+def observed_mask(n_origin: int, n_dev: int) -> np.ndarray:
+    """Máscara booleana (n_origen, n_dev) de celdas observadas."""
+    i = np.arange(n_origin)[:, None]
+    j = np.arange(n_dev)[None, :]
+    return i + j < n_origin
+
+
+def to_cumulative(tri) -> np.ndarray:
+    """Acumula pagos incrementales observados a lo largo del eje de desarrollo (celdas futuras en 0)."""
+    tri = _as_batch(tri)
+    mask = observed_mask(*tri.shape[1:])
+    return np.cumsum(np.where(mask, tri, 0.0), axis=2)
+
+
+def age_to_age_factors(cum: np.ndarray) -> np.ndarray:
+    """Factores edad a edad ponderados por volumen, calculados una sola vez por columna.
+
+    f_j = Σ_i C[i, j] / Σ_i C[i, j-1] sobre los orígenes con la columna j observada.
+    Devuelve (n_tri, n_dev - 1); si el denominador es 0 el factor es 1.
+    """
+    cum = _as_batch(cum)
+    mask = observed_mask(*cum.shape[1:])[None, :, 1:]
+    num = np.where(mask, cum[:, :, 1:], 0.0).sum(axis=1)
+    den = np.where(mask, cum[:, :, :-1], 0.0).sum(axis=1)
+    return np.divide(num, den, out=np.ones_like(num), where=den > 0)
+
+
+def _latest(cum: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Índice de la última edad observada por origen y acumulado en la diagonal."""
+    n_origin, n_dev = cum.shape[1:]
+    last = np.minimum(n_origin - 1 - np.arange(n_origin), n_dev - 1)
+    return last, cum[:, np.arange(n_origin), last]
+
+
+def _result(tri: np.ndarray, factors: np.ndarray, cum_proj: np.ndarray) -> TriangleProjection:
+    incremental = np.diff(cum_proj, axis=2, prepend=0.0)
+    mask = observed_mask(*tri.shape[1:])
+    observed_total = np.where(mask, tri, 0.0).sum(axis=(1, 2))
+    return TriangleProjection(
+        factors=factors,
+        cumulative=cum_proj,
+        incremental=incremental,
+        ultimate=cum_proj[:, :, -1],
+        ibnr=cum_proj[:, :, -1].sum(axis=1) - observed_total,
+    )
+
+
+def chain_ladder_batch(tri) -> TriangleProjection:
+    """Chain Ladder sobre un lote de triángulos incrementales en una sola pasada por columna."""
+    tri = _as_batch(tri)
+    cum = to_cumulative(tri)
+    factors = age_to_age_factors(cum)
+    mask = observed_mask(*tri.shape[1:])
+    proj = cum.copy()
+    for j in range(1, tri.shape[2]):
+        proj[:, :, j] = np.where(mask[:, j], cum[:, :, j], proj[:, :, j - 1] * factors[:, j - 1, None])
+    return _result(tri, factors, proj)
+
+
+def bornhuetter_ferguson_batch(tri, premium, loss_ratio=0.72) -> TriangleProjection:
+    """Bornhuetter-Ferguson: diagonal observada + siniestralidad esperada no emergida.
+
+    `premium` tiene forma (n_origen,) o (n_tri, n_origen); `loss_ratio` es escalar o (n_tri,).
+    El patrón de emergencia es 1 / CDF con los factores Chain Ladder del propio triángulo.
+    """
+    tri = _as_batch(tri)
+    cum = to_cumulative(tri)
+    factors = age_to_age_factors(cum)
+    n_tri, n_origin, n_dev = tri.shape
+    # CDF a última por edad: producto de los factores restantes; q = proporción emergida
+    cdf = np.concatenate([np.cumprod(factors[:, ::-1], axis=1)[:, ::-1], np.ones((n_tri, 1))], axis=1)
+    emerged = np.divide(1.0, cdf, out=np.ones_like(cdf), where=cdf > 0)
+    expected = np.broadcast_to(np.asarray(premium, dtype=float), (n_tri, n_origin)) \
+        * np.asarray(loss_ratio, dtype=float).reshape(-1, 1)
+    last, latest = _latest(cum)
+    mask = observed_mask(n_origin, n_dev)
+    emerged_last = emerged[:, last]  # (n_tri, n_origen)
+    bf = latest[:, :, None] + expected[:, :, None] * (emerged[:, None, :] - emerged_last[:, :, None])
+    proj = np.where(mask, cum, bf)
+    return _result(tri, factors, proj)
+
+
+def extend_inflation_index(index, n_periods: int, shock: float = 0.0) -> np.ndarray:
+    """Extiende un índice de inflación por período calendario hasta n_periods.
+
+    Los períodos futuros crecen a la última tasa observada más `shock`.
+    """
+    index = np.asarray(index, dtype=float)
+    if len(index) >= n_periods:
+        return index[:n_periods]
+    rate = index[-1] / index[-2] - 1 if len(index) > 1 else 0.0
+    growth = np.cumprod(np.full(n_periods - len(index), 1 + rate + shock))
+    return np.concatenate([index, index[-1] * growth])
+
+
+def iacl_batch(tri, inflation_index) -> TriangleProjection:
+    """Chain Ladder ajustado por inflación.
+
+    Deflacta cada pago por el índice de su período calendario (i + j), proyecta en términos
+    reales y reinfla los pagos futuros. `inflation_index` tiene forma (n_cal,) o (n_tri, n_cal)
+    con n_cal ≥ n_origen + n_dev − 1.
+    """
+    tri = _as_batch(tri)
+    n_tri, n_origin, n_dev = tri.shape
+    cal = np.arange(n_origin)[:, None] + np.arange(n_dev)[None, :]
+    idx = np.atleast_2d(np.asarray(inflation_index, dtype=float))[:, cal]  # (1|n_tri, n_origen, n_dev)
+    real = chain_ladder_batch(tri / idx)
+    incremental = real.incremental * idx
+    proj = np.cumsum(incremental, axis=2)
+    return _result(tri, real.factors, proj)
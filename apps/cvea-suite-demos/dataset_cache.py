@@ -0,0 +1,110 @@
+# Caché persistente de datasets en disco, compartida entre procesos y reinicios del servidor
+#
+# Cada resultado se guarda como archivo Arrow IPC sin compresión, identificado por función,
+# argumentos y versión de código (hash del fuente de la función y de los módulos de los que
+# depende). La carga es un memory-map: los workers de una misma máquina comparten la copia del
+# page cache del sistema y un arranque en frío lee el archivo en lugar de volver a simular.
+import functools
+import hashlib
+import inspect
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+CACHE_DIR = Path(os.environ.get("CVEA_CACHE_DIR", Path(tempfile.gettempdir()) / "cvea-suite-cache"))
+_PARTES = b"cvea_partes"
+
+
+def code_version(func, depends: tuple = ()) -> str:
+    """Hash del código fuente de `func` y de sus dependencias (módulos o funciones)."""
+    h = hashlib.sha256()
+    for obj in (func, *depends):
+        try:
+            h.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            h.update(repr(obj).encode())
+    return h.hexdigest()[:12]
+
+
+def _write_table(table: pa.Table, path: Path) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)  # atómico: otro proceso nunca ve un archivo a medio escribir
+
+
+def _read_table(path: Path) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    # split_blocks evita consolidar columnas: las numéricas sin nulos se leen sin copia del mmap
+    return table.to_pandas(split_blocks=True)
+
+
+def store(result, path: Path) -> None:
+    """Guarda un DataFrame o una tupla de DataFrames; la parte 0 se escribe al final (confirma)."""
+    partes = result if isinstance(result, tuple) else (result,)
+    for i, df in reversed(list(enumerate(partes))):
+        table = pa.Table.from_pandas(df)
+        if i == 0:
+            meta = dict(table.schema.metadata or {})
+            meta[_PARTES] = str(len(partes) if isinstance(result, tuple) else 0).encode()
+            table = table.replace_schema_metadata(meta)
+        _write_table(table, path if i == 0 else path.with_name(f"{path.stem}.{i}{path.suffix}"))
+
+
+def load(path: Path):
+    """Lee lo guardado por `store` con memory-map; None si no existe o está incompleto."""
+    try:
+        first = _read_table(path)
+        n = int(first.schema.metadata[_PARTES])
+        if n == 0:
+            return _to_frame(first)
+        resto = [_read_table(path.with_name(f"{path.stem}.{i}{path.suffix}")) for i in range(1, n)]
+    except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+        return None
+    return tuple(_to_frame(t) for t in (first, *resto))
+
+
+def persistent_dataset(depends: tuple = (), cache_dir: Path | None = None):
+    """Decorador: cachea en disco el DataFrame (o tupla de DataFrames) que devuelve la función.
+
+    La clave combina nombre de la función, versión de código y argumentos normalizados (con los
+    valores por defecto aplicados). Al escribir una versión nueva se borran las anteriores de la
+    misma función. Si el directorio no es escribible se calcula sin caché.
+    """
+    def decorator(func):
+        version = code_version(func, depends)
+        firma = inspect.signature(func)
+        origen = Path(inspect.getsourcefile(func) or func.__module__).stem
+        prefijo = f"{origen}.{func.__qualname__}".replace("<", "").replace(">", "")
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            directorio = Path(cache_dir or CACHE_DIR)
+            bound = firma.bind(*args, **kwargs)
+            bound.apply_defaults()
+            clave = hashlib.sha256(repr(sorted(bound.arguments.items())).encode()).hexdigest()[:16]
+            path = directorio / f"{prefijo}-{version}-{clave}.arrow"
+            cached = load(path)
+            if cached is not None:
+                return cached
+            result = func(*args, **kwargs)
+            try:
+                directorio.mkdir(parents=True, exist_ok=True)
+                for viejo in directorio.glob(f"{prefijo}-*.arrow"):
+                    if not viejo.name.startswith(f"{prefijo}-{version}-"):
+                        viejo.unlink(missing_ok=True)
+                store(result, path)
+            except OSError:
+                pass
+            return result
+
+        wrapper.cache_version = version
+        return wrapper
+
+    return decorator
@@ -0,0 +1,201 @@
+# Registro de datasets de solo lectura compartidos por todas las sesiones del proceso
+#
+# `st.cache_data` serializa y copia su resultado en cada llamada: con N sesiones hay N copias del
+# frame de transacciones. Aquí cada dataset se materializa una vez por versión (código + argumentos)
+# y cada sesión recibe una copia superficial: con Copy-on-Write las columnas son los mismos
+# arreglos (en la práctica, los del Arrow leído con memory-map de la caché en disco) y una escritura
+# en la sesión copia solo la columna tocada. Las columnas derivadas (stage, zona, turno, …) son
+# overlays calculados una vez por versión del dataset base, no mutaciones del frame compartido.
+# El registro es un LRU acotado en bytes (`CVEA_SHARED_MB`): tamaños poco usados (p. ej. la flota
+# de 3M registros del mapa) se liberan en lugar de quedar fijados mientras viva el servidor.
+import functools
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import code_version
+
+MAX_BYTES = int(float(os.environ.get("CVEA_SHARED_MB", 1024)) * 1e6)
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # En pandas 3 es el comportamiento por defecto; sin él una copia superficial comparte escrituras
+    pd.set_option("mode.copy_on_write", True)
+
+
+def freeze(obj):
+    """Marca como no escribibles los arreglos NumPy de un DataFrame, Series o ndarray."""
+    if isinstance(obj, pd.DataFrame):
+        for c in obj.columns:
+            freeze(obj[c])
+    elif isinstance(obj, pd.Series):
+        if obj.dtype.kind in "biufcmM":
+            freeze(np.asarray(obj.array))
+    elif isinstance(obj, np.ndarray):
+        # Cada acceso a una columna es una vista nueva: se bloquea el arreglo base (el bloque)
+        while isinstance(obj.base, np.ndarray):
+            obj = obj.base
+        obj.flags.writeable = False
+    return obj
+
+
+def _shallow(obj):
+    return obj.copy(deep=False) if isinstance(obj, (pd.DataFrame, pd.Series)) else obj
+
+
+def _nbytes(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=False, deep=False).sum())
+    return int(getattr(obj, "nbytes", 0))
+
+
+@dataclass
+class _Entry:
+    version: str
+    value: object
+    overlays: dict = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        return _nbytes(self.value) + sum(_nbytes(o) for o in self.overlays.values())
+
+
+class DatasetRegistry:
+    """Datasets por nombre con una sola versión viva; los overlays se descartan con su versión base.
+
+    Cuando el total supera `max_bytes` se liberan los datasets usados hace más tiempo (el recién
+    pedido siempre se conserva); las sesiones que ya tienen una copia la siguen usando. `loader()` y
+    `compute()` corren fuera del lock global: materializar un dataset grande no bloquea a los demás,
+    y las llamadas concurrentes por la misma clave esperan a una sola construcción.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        self._lock = threading.RLock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._pending: dict[tuple, Future] = {}
+        self.max_bytes = max_bytes
+
+    def _once(self, key: tuple, lookup, build, publish):
+        """`lookup()` bajo el lock; si falla, `build()` sin lock (una vez por clave) y `publish(valor)` bajo el lock."""
+        with self._lock:
+            hit = lookup()
+            if hit is not None:
+                return hit
+            futuro = self._pending.get(key)
+            propio = futuro is None
+            if propio:
+                futuro = self._pending[key] = Future()
+        if not propio:
+            return futuro.result()  # otra sesión ya lo está construyendo
+        try:
+            value = build()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            futuro.set_exception(e)
+            raise
+        with self._lock:
+            publish(value)
+            del self._pending[key]
+            self._evict()
+        futuro.set_result(value)
+        return value
+
+    def _entry(self, name: str, version: str, loader) -> _Entry:
+        def lookup():
+            entry = self._entries.get(name)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(name)
+            return entry
+
+        def publish(entry):
+            self._entries[name] = entry  # la versión anterior y sus overlays se liberan
+            self._entries.move_to_end(name)
+
+        return self._once((name, version), lookup, lambda: _Entry(version, freeze(loader())), publish)
+
+    def _evict(self) -> None:
+        total = sum(e.nbytes for e in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.nbytes
+
+    def get(self, name: str, version: str, loader):
+        """Dataset `name` en la versión pedida; `loader()` se llama solo si no está materializado."""
+        return _shallow(self._entry(name, version, loader).value)
+
+    def overlay(self, name: str, version: str, loader, overlay: str, compute):
+        """Columna(s) derivada(s) de `name`: `compute(base)` una vez por versión del dataset base."""
+        entry = self._entry(name, version, loader)
+        value = self._once(
+            (name, version, overlay),
+            lambda: entry.overlays.get(overlay),
+            lambda: freeze(compute(_shallow(entry.value))),
+            lambda v: entry.overlays.__setitem__(overlay, v),
+        )
+        return _shallow(value)
+
+    def stats(self) -> pd.DataFrame:
+        """Memoria compartida por dataset y overlays (MB), para monitoreo."""
+        with self._lock:
+            return pd.DataFrame([
+                {"dataset": n, "version": e.version, "mb": _nbytes(e.value) / 1e6,
+                 "overlays": len(e.overlays), "mb_overlays": sum(_nbytes(o) for o in e.overlays.values()) / 1e6}
+                for n, e in self._entries.items()
+            ], columns=["dataset", "version", "mb", "overlays", "mb_overlays"])
+
+
+REGISTRY = DatasetRegistry()
+
+
+def _key(func, version: str, args, kwargs) -> tuple[str, str]:
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    firma = hashlib.sha256(repr(sorted(bound.arguments.items())).encode()).hexdigest()[:16]
+    origen = Path(inspect.getsourcefile(inspect.unwrap(func)) or func.__module__).stem
+    return f"{origen}.{func.__qualname__}:{firma}", version
+
+
+def shared_dataset(func):
+    """Decorador: el resultado de `func` queda en REGISTRY, compartido y de solo lectura.
+
+    La versión es la del código de la función (la de `persistent_dataset` si está debajo). Cada
+    llamada devuelve una copia superficial: agregar columnas no afecta a otras sesiones.
+    """
+    version = getattr(func, "cache_version", None) or code_version(func)
+
+    def _resolve(args, kwargs):
+        name, v = _key(func, version, args, kwargs)
+        return name, v, lambda: func(*args, **kwargs)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return REGISTRY.get(*_resolve(args, kwargs))
+
+    wrapper.resolve = _resolve
+    wrapper.cache_version = version
+    return wrapper
+
+
+def overlay(base):
+    """Decorador de columnas derivadas: `@overlay(get_x) def f(df): …` se llama con los argumentos de `get_x`."""
+    def decorator(compute):
+        nombre = f"{compute.__qualname__}:{code_version(compute)}"
+
+        @functools.wraps(compute)
+        def wrapper(*args, **kwargs):
+            name, version, loader = base.resolve(args, kwargs)
+            return REGISTRY.overlay(name, version, loader, nombre, compute)
+
+        wrapper.cache_version = f"{base.cache_version}+{nombre}"
+        return wrapper
+
+    return decorator
@@ -0,0 +1,119 @@
+# Decimación de gráficos: el tamaño del payload Plotly queda acotado sin importar el tamaño de la cartera
+#
+# La estrategia se elige por volumen de datos: por debajo del umbral se dibujan los puntos tal
+# cual; por encima, las series de tiempo pasan por LTTB, los scatter se rasterizan en el servidor
+# (histograma 2D) y las distribuciones se envían como resúmenes de cuantiles.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+MAX_PUNTOS_SERIE = 2_000
+MAX_PUNTOS_SCATTER = 5_000
+MAX_PUNTOS_DISTRIBUCION = 5_000
+
+
+def _as_float(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Índices elegidos por Largest-Triangle-Three-Buckets (conserva picos y forma de la serie).
+
+    Se conservan el primer y el último punto; de cada cubeta intermedia se toma el punto que
+    forma el triángulo de mayor área con el punto elegido antes y el promedio de la cubeta siguiente.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf, yf = _as_float(x), np.asarray(y, dtype=float)
+    bordes = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out − 2 cubetas entre extremos
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bordes[i], bordes[i + 1]
+        sig_lo, sig_hi = hi, bordes[i + 2] if i + 2 < len(bordes) else n
+        cx, cy = xf[sig_lo:sig_hi].mean(), yf[sig_lo:sig_hi].mean()
+        area = np.abs((xf[a] - cx) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (cy - yf[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def density_raster(x, y, bins: int = 200, range_=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Histograma 2D (bins × bins) y centros de celda en x e y."""
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+    counts, xe, ye = np.histogram2d(x, y, bins=bins, range=range_)
+    return counts.T, (xe[:-1] + xe[1:]) / 2, (ye[:-1] + ye[1:]) / 2
+
+
+def quantile_summary(values, groups=None) -> pd.DataFrame:
+    """Cuartiles, bigotes de Tukey (1,5·IQR acotado a los datos), media y n por grupo."""
+    s = pd.Series(np.asarray(values, dtype=float))
+    g = s.groupby(np.asarray(groups) if groups is not None else np.zeros(len(s)), observed=True, sort=True)
+    q = g.quantile([0.0, 0.25, 0.5, 0.75, 1.0]).unstack()
+    q.columns = ["min", "q1", "mediana", "q3", "max"]
+    iqr = q["q3"] - q["q1"]
+    q["bigote_inf"] = np.maximum(q["min"], q["q1"] - 1.5 * iqr)
+    q["bigote_sup"] = np.minimum(q["max"], q["q3"] + 1.5 * iqr)
+    q["media"] = g.mean()
+    q["n"] = g.size()
+    return q.rename_axis("grupo").reset_index()
+
+
+def series_trace(x, y, max_points: int = MAX_PUNTOS_SERIE, **kwargs) -> go.Scatter:
+    """Traza de línea; con más de `max_points` puntos se reduce con LTTB."""
+    import plotly.graph_objects as go
+
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) > max_points:
+        idx = lttb(x, y, max_points)
+        x, y = x[idx], y[idx]
+    return go.Scatter(x=x, y=y, **kwargs)
+
+
+def scatter_figure(df: pd.DataFrame, x: str, y: str, max_points: int = MAX_PUNTOS_SCATTER, bins: int = 200,
+                   title: str | None = None, **px_kwargs) -> go.Figure:
+    """Scatter con todos los puntos si son pocos; si no, imagen de densidad calculada en el servidor.
+
+    `px_kwargs` (color, opacity, …) solo aplican al modo de puntos.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if len(df) <= max_points:
+        return px.scatter(df, x=x, y=y, title=title, **px_kwargs)
+    counts, xc, yc = density_raster(df[x], df[y], bins)
+    fig = go.Figure(go.Heatmap(
+        x=xc, y=yc, z=np.where(counts > 0, np.log10(counts, where=counts > 0, out=np.zeros_like(counts)) + 1, np.nan),
+        customdata=counts, colorscale="Blues", colorbar=dict(title="log₁₀ n"),
+        hovertemplate=f"{x}: %{{x:.3g}}<br>{y}: %{{y:.3g}}<br>n = %{{customdata:,.0f}}<extra></extra>",
+    ))
+    fig.update_layout(title=f"{title or ''} — densidad de {len(df):,} puntos".strip(" —"), xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def distribution_figure(df: pd.DataFrame, x: str, y: str, max_points: int = MAX_PUNTOS_DISTRIBUCION,
+                        title: str | None = None, **px_kwargs) -> go.Figure:
+    """Violín con puntos crudos si son pocos; si no, cajas desde cuantiles precalculados por grupo."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if len(df) <= max_points:
+        return px.violin(df, x=x, y=y, box=True, points="outliers", title=title, **px_kwargs)
+    q = quantile_summary(df[y], df[x])
+    fig = go.Figure(go.Box(
+        x=q["grupo"], q1=q["q1"], median=q["mediana"], q3=q["q3"], lowerfence=q["bigote_inf"],
+        upperfence=q["bigote_sup"], mean=q["media"], name=y,
+    ))
+    fig.update_layout(title=f"{title or ''} — cuantiles de {len(df):,} registros".strip(" —"), xaxis_title=x, yaxis_title=y)
+    return fig
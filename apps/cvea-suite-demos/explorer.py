@@ -0,0 +1,176 @@
+# Exploración self-service con los datos en el servidor (PyGWalker + motor de agregación DuckDB)
+#
+# En lugar de serializar todas las filas en el HTML del walker, el servidor responde las
+# agregaciones: con el renderer de PyGWalker en modo kernel (DuckDB dentro del proceso) o, si no
+# está disponible, agregando aquí y enviando al navegador solo la tabla agregada. Los filtros del
+# sidebar viajan como predicado SQL sobre el frame compartido; no se materializa una copia filtrada.
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - pygwalker ya depende de duckdb
+    duckdb = None
+
+AGREGACIONES = {"sum": "Suma", "avg": "Promedio", "count": "Conteo", "min": "Mínimo", "max": "Máximo"}
+
+
+def _clean(filtros: dict | None) -> dict:
+    return {c: list(v) for c, v in (filtros or {}).items() if v is not None}
+
+
+def _signature(filtros: dict | None) -> str:
+    return repr(sorted((c, sorted(map(str, v))) for c, v in _clean(filtros).items()))
+
+
+def _sql_literal(x) -> str:
+    x = x.item() if hasattr(x, "item") else x
+    if isinstance(x, (bool, int, float)):
+        return repr(x)
+    return "'" + str(x).replace("'", "''") + "'"
+
+
+def _quote(c: str) -> str:
+    return '"' + c.replace('"', '""') + '"'
+
+
+def filter_frame(df: pd.DataFrame, filtros: dict | None) -> pd.DataFrame:
+    """Filas de `df` cuyas columnas toman alguno de los valores de `filtros` ({columna: valores})."""
+    filtros = _clean(filtros)
+    if not filtros:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for c, v in filtros.items():
+        mask &= df[c].isin(v).to_numpy()
+    return df[mask]
+
+
+class AggregationEngine:
+    """Consultas GROUP BY sobre un DataFrame registrado como tabla Arrow en DuckDB (o pandas)."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self.dimensions = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c]) or df[c].nunique() <= 24]
+        self.measures = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        self._con = None
+        if duckdb is not None:
+            self._table = pa.Table.from_pandas(df, preserve_index=False)
+            self._con = duckdb.connect()
+
+    def aggregate(self, dims: list[str], measures: list[str], agg: str = "sum", filtros: dict | None = None) -> pd.DataFrame:
+        """Agregación `agg` de `measures` por `dims`, con filtros {columna: valores}."""
+        if agg not in AGREGACIONES:
+            raise ValueError(f"Agregación no soportada: {agg}")
+        desconocidas = set(dims) | set(measures) | set(filtros or {})
+        desconocidas -= set(self.df.columns)
+        if desconocidas:
+            raise KeyError(f"Columnas inexistentes: {sorted(desconocidas)}")
+        filtros = _clean(filtros)
+        if self._con is None:
+            return self._aggregate_pandas(dims, measures, agg, filtros)
+        q = _quote
+        cols = [q(d) for d in dims] + [f"{agg}({q(m)}) AS {q(m)}" for m in measures]
+        where = " AND ".join(f"{q(c)} IN ({', '.join('?' * len(v))})" for c, v in filtros.items()) or "TRUE"
+        sql = f"SELECT {', '.join(cols) or 'count(*) AS n'} FROM datos WHERE {where}"
+        if dims:
+            sql += f" GROUP BY {', '.join(q(d) for d in dims)} ORDER BY {', '.join(q(d) for d in dims)}"
+        params = [x.item() if hasattr(x, "item") else x for v in filtros.values() for x in v]
+        # Un cursor por consulta (la conexión se comparte entre sesiones); la tabla Arrow no se copia
+        cur = self._con.cursor()
+        cur.register("datos", self._table)
+        return cur.execute(sql, params).df()
+
+    def _aggregate_pandas(self, dims, measures, agg, filtros) -> pd.DataFrame:
+        df = filter_frame(self.df, filtros)
+        func = {"avg": "mean", "count": "count"}.get(agg, agg)
+        if not dims:
+            return df[measures].agg(func).to_frame().T if measures else pd.DataFrame({"n": [len(df)]})
+        return df.groupby(dims, observed=True)[measures].agg(func).reset_index()
+
+
+_WALKER_CON = None
+_WALKER_LOCK = threading.Lock()
+
+
+def _walker_query(df: pd.DataFrame, where: str, sql: str) -> list[dict]:
+    """Consulta de PyGWalker sobre `df` con el predicado `where` (vista temporal del cursor, sin copia)."""
+    global _WALKER_CON
+    with _WALKER_LOCK:
+        if _WALKER_CON is None:
+            _WALKER_CON = duckdb.connect()
+        cur = _WALKER_CON.cursor()
+    cur.execute("SET TimeZone = 'UTC'")
+    cur.register("datos", df)
+    cur.execute(f"CREATE TEMP VIEW pygwalker_mid_table AS SELECT * FROM datos WHERE {where}")
+    res = cur.execute(sql)
+    cols = [d[0] for d in res.description]
+    return [dict(zip(cols, fila)) for fila in res.fetchall()]
+
+
+def kernel_renderer(df: pd.DataFrame, filtros: dict | None = None, gid: str | None = None):
+    """Renderer de PyGWalker con cómputo en el servidor; None si no está disponible en el entorno.
+
+    Con `filtros`, cada consulta del walker corre sobre una vista filtrada de `df` en lugar de
+    recibir una copia con las filas filtradas.
+    """
+    try:
+        from pygwalker.api.streamlit import StreamlitRenderer
+    except Exception:
+        return None
+    renderer = StreamlitRenderer(df, gid=gid, kernel_computation=True)
+    _filter_queries(renderer.walker.data_parser, filtros)
+    return renderer
+
+
+def _filter_queries(parser, filtros: dict | None) -> None:
+    """Hace que las consultas SQL del parser de PyGWalker vean solo las filas de `filtros`."""
+    filtros = _clean(filtros)
+    if not filtros or duckdb is None:
+        return
+    # PyGWalker renombra las columnas al registrar el frame; el predicado usa sus nombres
+    nombres = dict(zip(parser.origin_df.columns, parser.df.columns))
+    where = " AND ".join(
+        f"{_quote(nombres[c])} IN ({', '.join(map(_sql_literal, v)) or 'NULL'})" for c, v in filtros.items()
+    )
+    # get_datas_by_payload y las consultas en lote pasan por get_datas_by_sql del parser
+    parser.get_datas_by_sql = lambda sql: _walker_query(parser.df, where, sql)
+
+
+@st.cache_resource(show_spinner=False)
+def _engine(version: str, _df: pd.DataFrame) -> AggregationEngine:
+    return AggregationEngine(_df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _renderer(version: str, firma: str, _df: pd.DataFrame, _filtros: dict | None):
+    # Un renderer liviano por combinación de filtros (gid propio para su canal de consultas), todos
+    # sobre el mismo frame compartido
+    gid = hashlib.sha256(f"{version}|{firma}".encode()).hexdigest()[:16]
+    return kernel_renderer(_df, _filtros, gid=gid)
+
+
+def render_explorer(df: pd.DataFrame, version: str, key: str, filtros: dict | None = None, height: int = 700) -> None:
+    """Pestaña self-service: agregación en el servidor, en caché por versión del dataset.
+
+    `version` identifica el contenido de `df` (motor, renderer y HTML se reutilizan mientras no
+    cambie; usar la `cache_version` del dataset). Los `filtros` del sidebar se aplican en la consulta
+    del motor y, con PyGWalker, como predicado de las consultas del walker. Sin PyGWalker se
+    muestra la tabla agregada por el motor.
+    """
+    renderer = _renderer(version, _signature(filtros), df, filtros)
+    if renderer is not None:
+        renderer.explorer(key=f"{key}_walker")
+        return
+    engine = _engine(version, df)
+    c1, c2, c3 = st.columns([2, 2, 1])
+    dims = c1.multiselect("Dimensiones", engine.dimensions, default=engine.dimensions[:1], key=f"{key}_dims")
+    measures = c2.multiselect("Medidas", engine.measures, default=engine.measures[:1], key=f"{key}_medidas")
+    agg = c3.selectbox("Agregación", list(AGREGACIONES), format_func=AGREGACIONES.get, key=f"{key}_agg")
+    agregado = engine.aggregate(dims, measures, agg, filtros)
+    st.caption(f"{len(df):,} filas en el servidor → {len(agregado):,} filas agregadas enviadas al navegador.")
+    st.dataframe(agregado, hide_index=True, height=min(height, 35 * (len(agregado) + 1) + 3))
@@ -0,0 +1,98 @@
+# Figuras que dependen del escenario, compartidas por las páginas y los reportes batch (batch_report.py)
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+    from cvea_core.ruin import RuinResult
+    from cvea_core.triangles import TriangleProjection
+
+
+def goal_gauge(valor: float, meta: float, titulo: str) -> go.Figure:
+    """Tacómetro de un ratio (fracción) contra su meta: rojo bajo la meta, amarillo hasta 1,5×, verde."""
+    import plotly.graph_objects as go
+
+    return go.Figure(
+        go.Indicator(
+            mode="gauge+number",
+            value=valor * 100,
+            number={"suffix": "%"},
+            gauge={
+                "axis": {"range": [0, meta * 200]},
+                "bar": {"color": "#38666A"},
+                "steps": [
+                    {"range": [0, meta * 100], "color": "#f4cccc"},
+                    {"range": [meta * 100, meta * 150], "color": "#ffe599"},
+                    {"range": [meta * 150, meta * 200], "color": "#d9ead3"},
+                ],
+                "threshold": {
+                    "line": {"color": "red", "width": 4},
+                    "value": meta * 100,
+                },
+            },
+            title={"text": titulo},
+        )
+    )
+
+
+def ecl_figure(ecl_seg: pd.DataFrame) -> go.Figure:
+    """ECL por estrato de ingreso y stage."""
+    import plotly.express as px
+
+    return px.bar(ecl_seg, x="estrato_ingreso", y="ECL", color="stage",
+                  title="ECL por estrato de ingreso y stage (12 meses en Stage 1, vida remanente en Stages 2–3)")
+
+
+def ibnr_origin_figure(proy: TriangleProjection, origenes, titulo: str = "IBNR por año de ocurrencia") -> go.Figure:
+    """IBNR proyectado por año de origen: última menos lo ya pagado (diagonal observada)."""
+    import plotly.express as px
+
+    from cvea_core.triangles import observed_mask
+
+    observado = observed_mask(*proy.incremental.shape[1:])
+    ibnr = proy.ultimate[0] - np.where(observado, proy.incremental[0], 0).sum(axis=1)
+    fig = px.bar(x=list(origenes), y=ibnr, labels={"x": "Año de ocurrencia", "y": "IBNR"}, title=titulo)
+    fig.update_layout(height=350)
+    return fig
+
+
+def ruin_fan_figure(ruina: RuinResult) -> go.Figure:
+    """Trayectorias de muestra, bandas entre cuantiles extremos / segundo par y media del patrimonio.
+
+    Las bandas salen de `ruina.quantiles`: la externa va del mínimo al máximo y la interna, si hay
+    al menos cuatro cuantiles, del segundo menor al segundo mayor.
+    """
+    import plotly.graph_objects as go
+
+    if len(ruina.quantiles) < 2:
+        raise ValueError(f"Se necesitan al menos 2 cuantiles para las bandas; hay {len(ruina.quantiles)}")
+    orden = np.argsort(ruina.quantiles)
+    qs = [ruina.quantiles[i] for i in orden]
+    bands = ruina.bands[orden]
+    pares = [(0, len(qs) - 1, 0.15)]
+    if len(qs) >= 4:
+        pares.append((1, len(qs) - 2, 0.35))
+    x = list(range(ruina.years + 1))
+    fig = go.Figure()
+    for path in ruina.sample_paths:
+        fig.add_trace(go.Scatter(x=x, y=path, mode="lines", line=dict(width=1, color="lightblue"), showlegend=False))
+    for lo, hi, alpha in pares:
+        fig.add_trace(go.Scatter(x=x, y=bands[hi], mode="lines", line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=x, y=bands[lo], mode="lines", fill="tonexty", line=dict(width=0),
+                                 fillcolor=f"rgba(56,102,106,{alpha})", name=f"P{qs[lo] * 100:g}–P{qs[hi] * 100:g}"))
+    fig.add_trace(go.Scatter(x=x, y=ruina.mean_path, mode="lines", line=dict(width=3, color="darkblue"), name="Media"))
+    fig.update_layout(xaxis_title="Año", yaxis_title="Patrimonio (USD)", title="Proyección patrimonio (inflación médica aplicada)", height=400)
+    return fig
+
+
+def ruin_time_figure(ruina: RuinResult) -> go.Figure:
+    """Distribución del año de ruina, condicionada a que ocurra."""
+    import plotly.express as px
+
+    return px.bar(x=np.arange(1, ruina.years + 1), y=ruina.time_to_ruin_share(),
+                  labels={"x": "Año de ruina", "y": "Proporción de ruinas"}, title="Distribución del tiempo a la ruina")
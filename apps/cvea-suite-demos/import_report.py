@@ -0,0 +1,85 @@
+# Reporte de tiempo de importación por página (estilo `python -X importtime`) para el primer render
+#
+# Cada página se ejecuta en un proceso nuevo con `-X importtime` mediante el AppTest de Streamlit.
+# Solo se cuentan los módulos importados a partir del render de la página (no los del arnés), y se
+# agrupan por paquete raíz. Por defecto se mide la pestaña inicial; `--tab` elige otra.
+#
+#   python import_report.py                       # tabla por página
+#   python import_report.py --json > imports.json # salida para seguimiento en CI
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+MARCA = "--- cvea: inicio de la página ---"
+_LINEA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_RUNNER = """
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({page!r}, default_timeout={timeout})
+if {tab!r} is not None:
+    at.session_state[{key!r}] = {tab!r}
+sys.stderr.write({marca!r} + "\\n")
+sys.stderr.flush()
+at.run()
+"""
+
+
+def _tabs_key(page: Path) -> str | None:
+    m = re.search(r'lazy_tabs\(.*?key="([^"]+)"\)', page.read_text(encoding="utf-8"), re.S)
+    return m.group(1) if m else None
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Agrupa las líneas de `-X importtime` posteriores a la marca por paquete raíz (µs acumulados)."""
+    lineas = stderr.split(MARCA, 1)[-1].splitlines()
+    entradas = [(int(m.group(2)), len(m.group(3)), m.group(4)) for m in map(_LINEA.match, lineas) if m]
+    if not entradas:
+        return {"total_ms": 0.0, "paquetes": {}}
+    nivel = min(e[1] for e in entradas)  # las entradas de primer nivel ya incluyen a sus hijas
+    paquetes = defaultdict(int)
+    for acumulado, sangria, nombre in entradas:
+        if sangria == nivel:
+            paquetes[nombre.split(".")[0]] += acumulado
+    ordenados = dict(sorted(((k, v / 1000) for k, v in paquetes.items()), key=lambda kv: -kv[1]))
+    return {"total_ms": sum(ordenados.values()), "paquetes": ordenados}
+
+
+def measure_page(page: Path, tab: str | None = None, timeout: int = 300) -> dict:
+    """Importaciones que dispara el render de `page` en un intérprete recién iniciado."""
+    codigo = _RUNNER.format(page=str(page), timeout=timeout, tab=tab, key=_tabs_key(page), marca=MARCA)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=APP_DIR, capture_output=True, text=True, timeout=timeout + 60,
+    )
+    return {"pagina": page.name, "pestana": tab, **parse_importtime(proc.stderr)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de importación por página de la CVEA Suite.")
+    parser.add_argument("pages", nargs="*", help="Páginas a medir (por defecto, todas)")
+    parser.add_argument("--tab", help="Etiqueta de la pestaña abierta (por defecto, la inicial)")
+    parser.add_argument("--top", type=int, default=8, help="Paquetes a listar por página")
+    parser.add_argument("--json", action="store_true", help="Salida JSON legible por máquina")
+    args = parser.parse_args(argv)
+
+    pages = [Path(p).resolve() for p in args.pages] or sorted((APP_DIR / "pages").glob("*.py"))
+    resultados = [measure_page(p, args.tab) for p in pages]
+    if args.json:
+        json.dump(resultados, sys.stdout, ensure_ascii=False, indent=1)
+        print()
+        return 0
+    for r in resultados:
+        print(f"{r['pagina']:<28} {r['total_ms']:9.1f} ms")
+        for nombre, ms in list(r["paquetes"].items())[:args.top]:
+            print(f"    {nombre:<24} {ms:9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,19 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from theme import cvea_header
+from theme import cvea_header, lazy_import, lazy_tabs, tab_open
+from dataset_cache import persistent_dataset
+from datasets import overlay, shared_dataset
+from decimation import scatter_figure, series_trace
+from figures import ecl_figure, goal_gauge
+from cvea_core import bank
+from cvea_core.bank import bank_indicators, bimonetary_series, candlestick_data, credit_stage, generate_credit_portfolio, stage_migration
+from cvea_core.ecl import STAGE_LABELS, portfolio_ecl
+from cvea_core.credit_var import RHO_ESTRATO, simulate_credit_losses
+from cvea_core.market_risk import ESTIMADORES, MarketRiskEngine, simulate_returns
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title="CVEA Bank Suite (CVEA-BS)", page_icon="🏦", layout="wide")
 cvea_header(
@@ -13,64 +22,45 @@ cvea_header(
     "Credit & Market Risk Desk — NIIF 9 · Datos simulados",
 )
 
-@st.cache_data
+@shared_dataset
+@persistent_dataset(depends=(bank,))
 def get_credit_portfolio(n=10_000):
-    rng = np.random.default_rng(42)
-    ids = np.arange(1, n + 1)
-    score = rng.integers(300, 851, size=n)
-    ingreso = np.clip(rng.lognormal(8, 0.8, n) * 500, 200, 50000)
-    monto = np.clip(rng.lognormal(9, 0.9, n) * 300, 500, 200000)
-    tasa = 0.04 + (850 - score) / 10000 + rng.uniform(-0.005, 0.01, n)
-    dias_mora = np.where(rng.random(n) < 0.92, 0, rng.exponential(45, n).astype(int))
-    # PD aproximada por score
-    pd_val = np.clip(1 / (1 + np.exp((score - 600) / 80)) * 0.15 + rng.uniform(0, 0.02, n), 0.001, 0.95)
-    estrato = pd.cut(ingreso, bins=[0, 500, 1500, 5000, 100000], labels=["Bajo", "Medio", "Medio-Alto", "Alto"])
-    return pd.DataFrame({
-        "id_cliente": ids,
-        "score_crediticio": score,
-        "ingreso_mensual_usd": ingreso,
-        "monto_credito": monto,
-        "tasa_interes": tasa,
-        "dias_mora": dias_mora,
-        "probabilidad_default": pd_val,
-        "estrato_ingreso": estrato,
-    })
+    return generate_credit_portfolio(n)
+
+@overlay(get_credit_portfolio)
+def get_credit_stage(df):
+    return credit_stage(df)
+
+@st.cache_data
+def get_score_pd_figure(n=10_000):
+    # Toda la cartera: puntos si es pequeña, imagen de densidad calculada en el servidor si no
+    return scatter_figure(get_credit_portfolio(n), "score_crediticio", "probabilidad_default", color="estrato_ingreso",
+                          title="Credit Score vs PD (por estrato de ingreso)", opacity=0.6)
+
+@st.cache_data
+def get_ecl_summary(lgd, n=10_000):
+    return portfolio_ecl(get_credit_portfolio(n), lgd)
+
+@st.cache_data(show_spinner="Simulando pérdidas de la cartera…")
+def get_credit_var(lgd, rho_items, n_scenarios, n=10_000):
+    return simulate_credit_losses(get_credit_portfolio(n), lgd=lgd, rho=dict(rho_items), n_scenarios=n_scenarios)
+
+@st.cache_data
+def get_stage_migration(n=10_000, months=12):
+    # Historia de cortes mensuales: cada corte nuevo solo se cruza con el anterior
+    return stage_migration(get_credit_portfolio(n), months)
 
 @st.cache_data
 def get_series_bimonetarias(months=12):
-    rng = np.random.default_rng(123)
-    dates = pd.date_range(pd.Timestamp.now() - pd.DateOffset(months=months), periods=months, freq="MS")
-    pasiva_me = 0.0419 + np.cumsum(rng.normal(0, 0.002, months))
-    activa_me = pasiva_me + 0.02 + rng.uniform(0, 0.01, months)
-    liquidez = 0.30 + np.cumsum(rng.normal(0, 0.01, months))
-    return pd.DataFrame({
-        "fecha": dates,
-        "tasa_pasiva_me": np.clip(pasiva_me, 0.02, 0.12),
-        "tasa_activa_me": np.clip(activa_me, 0.04, 0.18),
-        "liquidez_ratio": np.clip(liquidez, 0.1, 0.6),
-        "captaciones_mn": 1e6 * (80 + np.cumsum(rng.normal(2, 5, months))),
-        "cartera_bruta_mn": 1e6 * (70 + np.cumsum(rng.normal(1, 4, months))),
-    })
+    return bimonetary_series(months)
 
 @st.cache_data
 def get_candlestick_data(days=60):
-    rng = np.random.default_rng(99)
-    dates = pd.date_range(end=pd.Timestamp.now(), periods=days, freq="B")
-    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, days)))
-    open_ = np.roll(close, 1)
-    open_[0] = 100
-    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, days)))
-    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, days)))
-    return pd.DataFrame({"fecha": dates, "open": open_, "high": high, "low": low, "close": close})
+    return candlestick_data(days)
 
 @st.cache_data
-def get_correlation_matrix():
-    rng = np.random.default_rng(7)
-    n = 6
-    rets = rng.standard_normal((120, n)) * 0.01
-    rets[:, 0] += 0.0005
-    corr = np.corrcoef(rets.T)
-    return pd.DataFrame(corr, index=[f"Cartera {i+1}" for i in range(n)], columns=[f"Cartera {i+1}" for i in range(n)])
+def get_market_engine(n_carteras=6, n_days=500):
+    return MarketRiskEngine.from_history(simulate_returns(n_carteras, n_days))
 
 # Sidebar
 st.sidebar.header("Controles globales")
@@ -81,124 +71,118 @@ meta_solvencia = st.sidebar.slider("Meta de solvencia interna (%)", 10.0, 40.0,
 
 df_cred = get_credit_portfolio()
 series = get_series_bimonetarias()
-# Aplicar choque a ratios
-series["liquidez_ratio"] = series["liquidez_ratio"] * (1 - choque_macro)
-liquidez_actual = float(series["liquidez_ratio"].iloc[-1])
-solvencia_sim = 0.1628 * (1 - choque_macro * 0.5)
-morosidad_sim = 0.0244 * (1 + choque_macro * 2)
-intermed_sim = 0.65 * (1 - choque_macro * 0.3)
+ind = bank_indicators(series, choque_macro)
 
-tab1, tab2, tab3 = st.tabs(["Visión general", "Riesgo de crédito (NIIF 9)", "Riesgo de mercado y tesorería"])
+tab1, tab2, tab3 = lazy_tabs(["Visión general", "Riesgo de crédito (NIIF 9)", "Riesgo de mercado y tesorería"], key="bank_tabs")
 
 with tab1:
-    st.subheader("Visión 360 — panel de indicadores")
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Liquidez", f"{liquidez_actual:.2%}", f"{choque_macro*100:+.1f}% choque")
-    c2.metric("Solvencia", f"{solvencia_sim:.2%}", "—")
-    c3.metric("Índice de morosidad", f"{morosidad_sim:.2%}", "—")
-    c4.metric("Nivel intermediación financiera", f"{intermed_sim:.1%}", "—")
-
-    # Tacómetros de cumplimiento de metas
-    col_g1, col_g2 = st.columns(2)
-    with col_g1:
-        cumplimiento_liq = min(liquidez_actual / meta_liquidez if meta_liquidez > 0 else 0, 2.0)
-        fig_g1 = go.Figure(
-            go.Indicator(
-                mode="gauge+number",
-                value=liquidez_actual * 100,
-                number={"suffix": "%"},
-                gauge={
-                    "axis": {"range": [0, meta_liquidez * 200]},
-                    "bar": {"color": "#38666A"},
-                    "steps": [
-                        {"range": [0, meta_liquidez * 100], "color": "#f4cccc"},
-                        {"range": [meta_liquidez * 100, meta_liquidez * 150], "color": "#ffe599"},
-                        {"range": [meta_liquidez * 150, meta_liquidez * 200], "color": "#d9ead3"},
-                    ],
-                    "threshold": {
-                        "line": {"color": "red", "width": 4},
-                        "value": meta_liquidez * 100,
-                    },
-                },
-                title={"text": "Liquidez vs meta"},
-            )
-        )
-        st.plotly_chart(fig_g1)
-
-    with col_g2:
-        fig_g2 = go.Figure(
-            go.Indicator(
-                mode="gauge+number",
-                value=solvencia_sim * 100,
-                number={"suffix": "%"},
-                gauge={
-                    "axis": {"range": [0, meta_solvencia * 200]},
-                    "bar": {"color": "#38666A"},
-                    "steps": [
-                        {"range": [0, meta_solvencia * 100], "color": "#f4cccc"},
-                        {"range": [meta_solvencia * 100, meta_solvencia * 150], "color": "#ffe599"},
-                        {"range": [meta_solvencia * 150, meta_solvencia * 200], "color": "#d9ead3"},
-                    ],
-                    "threshold": {
-                        "line": {"color": "red", "width": 4},
-                        "value": meta_solvencia * 100,
-                    },
-                },
-                title={"text": "Solvencia vs meta interna"},
-            )
-        )
-        st.plotly_chart(fig_g2)
-
-    st.subheader("Evolución del fondeo (últimos 12 meses)")
-    fig_fondo = go.Figure()
-    fig_fondo.add_trace(go.Scatter(x=series["fecha"], y=series["captaciones_mn"], name="Captaciones", line=dict(color="blue")))
-    fig_fondo.add_trace(go.Scatter(x=series["fecha"], y=series["cartera_bruta_mn"], name="Cartera bruta", line=dict(color="green")))
-    fig_fondo.update_layout(xaxis_title="Fecha", yaxis_title="Monto (MN)", height=400)
-    st.plotly_chart(fig_fondo)
+    if tab_open(tab1):
+        st.subheader("Visión 360 — panel de indicadores")
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Liquidez", f"{ind.liquidez:.2%}", f"{choque_macro*100:+.1f}% choque")
+        c2.metric("Solvencia", f"{ind.solvencia:.2%}", "—")
+        c3.metric("Índice de morosidad", f"{ind.morosidad:.2%}", "—")
+        c4.metric("Nivel intermediación financiera", f"{ind.intermediacion:.1%}", "—")
+
+        # Tacómetros de cumplimiento de metas
+        col_g1, col_g2 = st.columns(2)
+        col_g1.plotly_chart(goal_gauge(ind.liquidez, meta_liquidez, "Liquidez vs meta"))
+        col_g2.plotly_chart(goal_gauge(ind.solvencia, meta_solvencia, "Solvencia vs meta interna"))
+
+        st.subheader("Evolución del fondeo (últimos 12 meses)")
+        fig_fondo = go.Figure()
+        fig_fondo.add_trace(series_trace(series["fecha"], series["captaciones_mn"], name="Captaciones", line=dict(color="blue")))
+        fig_fondo.add_trace(series_trace(series["fecha"], series["cartera_bruta_mn"], name="Cartera bruta", line=dict(color="green")))
+        fig_fondo.update_layout(xaxis_title="Fecha", yaxis_title="Monto (MN)", height=400)
+        st.plotly_chart(fig_fondo)
 
 with tab2:
-    st.subheader("Migración de cartera (NIIF 9 — Stages)")
-    # Stages: 1 Normal, 2 Riesgo significativo, 3 Default
-    df_cred["stage"] = np.where(df_cred["dias_mora"] > 90, "Stage 3: Default",
-                         np.where((df_cred["dias_mora"] > 30) | (df_cred["probabilidad_default"] > 0.15), "Stage 2: Riesgo significativo", "Stage 1: Normal"))
-    stage_counts = df_cred["stage"].value_counts()
-    # Sankey: Stage1 -> Stage2 -> Stage3 (simplificado con flujos simulados)
-    s1, s2, s3 = stage_counts.get("Stage 1: Normal", 0), stage_counts.get("Stage 2: Riesgo significativo", 0), stage_counts.get("Stage 3: Default", 0)
-    nodes = ["Stage 1\nNormal", "Stage 2\nRiesgo sign.", "Stage 3\nDefault"]
-    source = [0, 0, 1]
-    target = [1, 2, 2]
-    value = [int(s1 * 0.08), int(s1 * 0.02), int(s2 * 0.25)]
-    fig_sankey = go.Figure(data=[go.Sankey(
-        node=dict(label=nodes, pad=15, thickness=20),
-        link=dict(source=source, target=target, value=value),
-    )])
-    fig_sankey.update_layout(title="Migración entre estadios de riesgo", height=400)
-    st.plotly_chart(fig_sankey)
-
-    st.subheader("Score crediticio vs Probabilidad de incumplimiento (PD)")
-    fig_scatter = px.scatter(df_cred.sample(min(2000, len(df_cred))), x="score_crediticio", y="probabilidad_default", color="estrato_ingreso",
-                             title="Credit Score vs PD (por estrato de ingreso)", opacity=0.6)
-    st.plotly_chart(fig_scatter)
-
-    st.subheader("Cálculo ECL (Pérdida esperada) — EAD × PD × LGD")
-    lgd_default = 0.45
-    lgd = st.data_editor(pd.DataFrame([{"LGD (Loss Given Default)": lgd_default}]), hide_index=True)
-    lgd_val = float(lgd.iloc[0].iloc[0])
-    if lgd_val < 0 or lgd_val > 1:
-        lgd_val = 0.45
-    ead = df_cred["monto_credito"].sum()
-    pd_avg = df_cred["probabilidad_default"].mean()
-    ecl = ead * pd_avg * lgd_val
-    st.metric("Pérdida esperada (ECL) USD", f"{ecl:,.0f}", f"LGD = {lgd_val:.0%}")
-    st.latex(r"ECL = EAD \times PD \times LGD")
+    if tab_open(tab2):
+        st.subheader("Migración de cartera (NIIF 9 — Stages)")
+        stage_counts = get_credit_stage().value_counts()
+        # Sankey: flujos esperados a un mes = cartera actual por stage × matriz empírica de migración
+        migracion = get_stage_migration()
+        matriz = migracion.matrix()
+        actual = np.array([stage_counts.get(lbl, 0) for lbl in STAGE_LABELS.values()], dtype=float)
+        flujos = actual[:, None] * matriz
+        nodes = ["Stage 1\nNormal", "Stage 2\nRiesgo sign.", "Stage 3\nDefault"]
+        source, target = np.nonzero(flujos > 0)
+        fig_sankey = go.Figure(data=[go.Sankey(
+            node=dict(label=[f"{n} (t)" for n in nodes] + [f"{n} (t+1)" for n in nodes], pad=15, thickness=20),
+            link=dict(source=source.tolist(), target=(target + 3).tolist(), value=flujos[source, target].round(0).tolist()),
+        )])
+        fig_sankey.update_layout(title=f"Migración entre estadios de riesgo (matriz empírica, {migracion.n_periods} meses)", height=400)
+        st.plotly_chart(fig_sankey)
+        st.dataframe(migracion.matrix_frame().style.format("{:.2%}"))
+        proy = pd.DataFrame(migracion.project(actual, 12), columns=list(STAGE_LABELS.values()))
+        proy.index.name = "Mes"
+        fig_proy = px.area(proy, title="Proyección de la cartera por stage (potencias de la matriz de migración)")
+        fig_proy.update_layout(xaxis_title="Meses", yaxis_title="Número de créditos", height=350)
+        st.plotly_chart(fig_proy)
+
+        st.subheader("Score crediticio vs Probabilidad de incumplimiento (PD)")
+        fig_scatter = get_score_pd_figure()
+        st.plotly_chart(fig_scatter)
+
+        st.subheader("Cálculo ECL (Pérdida esperada) — EAD × PD × LGD")
+        lgd_default = 0.45
+        lgd = st.data_editor(pd.DataFrame([{"LGD (Loss Given Default)": lgd_default}]), hide_index=True)
+        lgd_val = float(lgd.iloc[0].iloc[0])
+        if lgd_val < 0 or lgd_val > 1:
+            lgd_val = 0.45
+        ecl_seg = get_ecl_summary(lgd_val)
+        ecl = ecl_seg["ECL"].sum()
+        st.metric("Pérdida esperada (ECL) USD", f"{ecl:,.0f}", f"LGD = {lgd_val:.0%} · cobertura {ecl / ecl_seg['EAD'].sum():.2%}")
+        st.latex(r"ECL = \sum_{t} EAD_t \times PD^{marg}_t \times LGD \times (1 + EIR)^{-t}")
+        st.plotly_chart(ecl_figure(ecl_seg))
+        st.dataframe(ecl_seg.style.format({"EAD": "{:,.0f}", "ECL": "{:,.0f}", "cobertura": "{:.2%}"}), hide_index=True)
+
+        st.subheader("VaR de crédito — modelo de un factor (Vasicek)")
+        col_rho, col_esc = st.columns([2, 1])
+        rho_tab = col_rho.data_editor(
+            pd.DataFrame({"Estrato": list(RHO_ESTRATO), "Correlación de activos (ρ)": list(RHO_ESTRATO.values())}),
+            hide_index=True, disabled=["Estrato"],
+        )
+        rho_items = tuple((e, float(np.clip(r, 0.0, 0.99))) for e, r in zip(rho_tab.iloc[:, 0], rho_tab.iloc[:, 1]))
+        n_esc = col_esc.select_slider("Escenarios", [10_000, 50_000, 100_000, 250_000], value=100_000)
+        cvar = get_credit_var(lgd_val, rho_items, n_esc)
+        resumen = cvar.summary()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Pérdida esperada (simulada)", f"{cvar.expected_loss:,.0f}")
+        c2.metric("VaR 99,9%", f"{cvar.var(0.999):,.0f}", f"ES {cvar.es(0.999):,.0f}")
+        c3.metric("Capital no esperado 99,9%", f"{cvar.var(0.999) - cvar.expected_loss:,.0f}")
+        frec, bordes = np.histogram(cvar.losses, bins=120)
+        fig_loss = go.Figure(go.Bar(x=(bordes[:-1] + bordes[1:]) / 2, y=frec, marker_color="#38666A"))
+        fig_loss.update_layout(title="Distribución de pérdidas de la cartera", xaxis_title="Pérdida (USD)", yaxis_title="Escenarios", bargap=0)
+        for _, fila in resumen.iterrows():
+            fig_loss.add_vline(x=fila["VaR"], line_dash="dash", line_color="red", annotation_text=f"VaR {fila['nivel']}")
+        st.plotly_chart(fig_loss)
+        contrib = cvar.contributions()
+        fmt = {c: "{:,.0f}" for c in contrib.columns if c not in ("estrato_ingreso", "stage")}
+        st.dataframe(contrib.style.format(fmt), hide_index=True)
 
 with tab3:
-    st.subheader("Índice bursátil / bonos (velas japonesas)")
-    cand = get_candlestick_data()
-    fig_candle = go.Figure(data=[go.Candlestick(x=cand["fecha"], open=cand["open"], high=cand["high"], low=cand["low"], close=cand["close"])])
-    fig_candle.update_layout(xaxis_rangeslider_visible=False, height=400)
-    st.plotly_chart(fig_candle)
-    st.subheader("Mapa de calor de correlaciones entre carteras")
-    corr_df = get_correlation_matrix()
-    fig_corr = px.imshow(corr_df, text_auto=".2f", aspect="auto", color_continuous_scale="RdBu_r", zmin=-1, zmax=1)
-    st.plotly_chart(fig_corr)
+    if tab_open(tab3):
+        st.subheader("Índice bursátil / bonos (velas japonesas)")
+        cand = get_candlestick_data()
+        fig_candle = go.Figure(data=[go.Candlestick(x=cand["fecha"], open=cand["open"], high=cand["high"], low=cand["low"], close=cand["close"])])
+        fig_candle.update_layout(xaxis_rangeslider_visible=False, height=400)
+        st.plotly_chart(fig_candle)
+        st.subheader("VaR / ES de mercado")
+        col_n, col_est, col_conf = st.columns(3)
+        n_carteras = col_n.select_slider("Número de carteras", [6, 25, 100, 300], value=6)
+        estimador = col_est.selectbox("Covarianza", list(ESTIMADORES), format_func=ESTIMADORES.get)
+        alpha = col_conf.select_slider("Confianza", [0.95, 0.975, 0.99, 0.995], value=0.99)
+        posicion = st.number_input("Posición total (USD, pesos iguales por cartera)", 1e5, 1e9, 1e7, 1e5)
+        motor = get_market_engine(n_carteras)
+        pesos = np.full(n_carteras, posicion / n_carteras)
+        cifras = [motor.historical(pesos, alpha), motor.parametric(pesos, alpha, estimador), motor.monte_carlo(pesos, alpha, estimador)]
+        cols = st.columns(len(cifras))
+        for col, cifra in zip(cols, cifras):
+            col.metric(f"VaR {cifra.metodo} ({alpha:.1%}, 1 día)", f"{cifra.var:,.0f}", f"ES {cifra.es:,.0f}", delta_color="off")
+        if estimador == "ledoit_wolf":
+            st.caption(f"Intensidad de shrinkage Ledoit-Wolf: {motor.ledoit_wolf()[1]:.3f} · ventana {motor.t} días")
+        st.subheader("Mapa de calor de correlaciones entre carteras")
+        corr_df = motor.correlation(estimador)
+        fig_corr = px.imshow(corr_df, text_auto=".2f" if n_carteras <= 12 else False, aspect="auto", color_continuous_scale="RdBu_r", zmin=-1, zmax=1)
+        st.plotly_chart(fig_corr)
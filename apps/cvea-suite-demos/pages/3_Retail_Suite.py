@@ -2,9 +2,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from theme import cvea_header
+from theme import cvea_header, lazy_import, lazy_tabs, tab_open
+from dataset_cache import persistent_dataset
+from datasets import overlay, shared_dataset
+from cvea_core import retail_data
+from cvea_core.retail_data import generate_transactions
+from cvea_core.baskets import mine_transactions
+from cvea_core.olap import SalesCube
+from cvea_core.retail import category_share, demand_curve, retail_kpis
+from explorer import render_explorer
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title="CVEA Retail Suite (CVEA-RS)", page_icon="🛒", layout="wide")
 cvea_header(
@@ -12,120 +21,94 @@ cvea_header(
     "Inteligencia comercial, elasticidad de precios, canastas y Self-Service BI — Datos simulados",
 )
 
-@st.cache_data
+@shared_dataset
+@persistent_dataset(depends=(retail_data,))
 def get_transactions(n=55_000):
-    rng = np.random.default_rng(101)
-    dates = pd.date_range("2024-01-01", periods=365, freq="D")
-    categories = ["Alimentos", "Bebidas", "Lácteos", "Higiene", "Limpieza", "Panadería"]
-    marcas = ["Tradicional", "Genérica"]
-    metodos = ["Divisas", "Bs", "Cripto"]
-    tickets = []
-    for i in range(n):
-        d = rng.choice(dates)
-        cat = rng.choice(categories, p=[0.25, 0.2, 0.15, 0.15, 0.15, 0.1])
-        marca = rng.choice(marcas, p=[0.61, 0.39])
-        precio_bs = rng.lognormal(3, 1.2) * 50
-        tasa_oficial = 36 + rng.uniform(0, 2)
-        tasa_paralela = tasa_oficial * (1 + rng.uniform(0.05, 0.2))
-        precio_usd = precio_bs / tasa_paralela
-        vol = rng.integers(1, 10)
-        metodo = rng.choice(metodos, p=[0.5, 0.35, 0.15])
-        tickets.append({
-            "id_ticket": i + 1,
-            "fecha": d,
-            "SKU": f"SKU-{rng.integers(1, 500)}",
-            "categoria_producto": cat,
-            "marca_tipo": marca,
-            "precio_bs": precio_bs,
-            "precio_usd": precio_usd,
-            "tasa_cambio_oficial": tasa_oficial,
-            "tasa_cambio_paralela": tasa_paralela,
-            "volumen_unidades": vol,
-            "metodo_pago": metodo,
-            "region": rng.choice(["Central", "Oriente", "Occidente", "Andes"], p=[0.4, 0.25, 0.2, 0.15]),
-            "formato_tienda": rng.choice(["Supermercado", "Farmacia", "Bodegón"], p=[0.5, 0.3, 0.2]),
-        })
-    return pd.DataFrame(tickets)
+    return generate_transactions(n)
+
+@st.cache_resource
+def get_sales_cube(n=55_000):
+    # Cubo de solo lectura: los filtros del sidebar suman celdas en vez de re-escanear las líneas
+    return SalesCube.from_frame(get_transactions(n))
+
+@overlay(get_transactions)
+def get_explorer_frame(df):
+    sub = df[["fecha", "categoria_producto", "marca_tipo", "precio_bs", "precio_usd", "volumen_unidades", "metodo_pago", "region", "formato_tienda"]]
+    return sub.assign(hora_del_dia=np.random.default_rng(303).integers(8, 21, len(sub)))
 
-@st.cache_data
-def get_association_flows():
-    # Flujos Harina -> Margarina, etc.
-    items = ["Harina", "Margarina", "Leche", "Pan", "Café", "Azúcar"]
-    rng = np.random.default_rng(202)
-    links = []
-    for i, a in enumerate(items):
-        for j, b in enumerate(items):
-            if i != j and rng.random() < 0.4:
-                links.append((a, b, int(rng.uniform(5, 40))))
-    return links
+@st.cache_data(show_spinner="Minando canastas…")
+def get_basket_rules(n=55_000, min_support=0.0001):
+    # Se mina una vez al soporte mínimo del control; soporte/confianza solo filtran estas reglas
+    return mine_transactions(get_transactions(n), min_support=min_support)
 
 df_ret = get_transactions()
+cubo = get_sales_cube()
 
 st.sidebar.header("Filtros")
-regiones = st.sidebar.multiselect("Región", options=sorted(df_ret["region"].unique()), default=sorted(df_ret["region"].unique()))
-formatos = st.sidebar.multiselect("Formato de tienda", options=sorted(df_ret["formato_tienda"].unique()), default=sorted(df_ret["formato_tienda"].unique()))
-df_f = df_ret[df_ret["region"].isin(regiones) & df_ret["formato_tienda"].isin(formatos)]
+regiones = st.sidebar.multiselect("Región", options=sorted(cubo.labels["region"]), default=sorted(cubo.labels["region"]))
+formatos = st.sidebar.multiselect("Formato de tienda", options=sorted(cubo.labels["formato_tienda"]), default=sorted(cubo.labels["formato_tienda"]))
+filtros = {"region": regiones, "formato_tienda": formatos}
 
-tab1, tab2, tab3, tab4 = st.tabs(["Inteligencia comercial", "Elasticidad y precios multimoneda", "Inventario y canastas", "Análisis exploratorio (PyGWalker)"])
+tab1, tab2, tab3, tab4 = lazy_tabs(["Inteligencia comercial", "Elasticidad y precios multimoneda", "Inventario y canastas", "Análisis exploratorio (PyGWalker)"], key="retail_tabs")
 
 with tab1:
-    st.subheader("KPIs")
-    vol_semanal = df_f["volumen_unidades"].sum() / (df_f["fecha"].max() - df_f["fecha"].min()).days * 7
-    ticket_prom = df_f.groupby("id_ticket").agg({"precio_usd": "sum"}).reset_index()["precio_usd"].mean()
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Volumen semanal (unidades, sim.)", f"{vol_semanal:,.0f}", "aprox. 17.7M mercado")
-    c2.metric("Ticket promedio (USD)", f"{ticket_prom:.2f}", "multimoneda")
-    c3.metric("Índice confianza consumidor (sim.)", "46%", "—")
-    st.subheader("Participación por categoría y marca (Treemap)")
-    part = df_f.groupby(["categoria_producto", "marca_tipo"])["precio_usd"].sum().reset_index()
-    part["participacion"] = part["precio_usd"] / part["precio_usd"].sum()
-    fig_treemap = px.treemap(part, path=["categoria_producto", "marca_tipo"], values="precio_usd", title="Participación (Tradicional ~61%)")
-st.plotly_chart(fig_treemap)
+    if tab_open(tab1):
+        st.subheader("KPIs")
+        kpis = retail_kpis(cubo, **filtros)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Volumen semanal (unidades, sim.)", f"{kpis.volumen_semanal:,.0f}", "aprox. 17.7M mercado")
+        c2.metric("Ticket promedio (USD)", f"{kpis.ticket_promedio:.2f}", "multimoneda")
+        c3.metric("Índice confianza consumidor (sim.)", "46%", "—")
+        st.subheader("Participación por categoría y marca (Treemap)")
+        part = category_share(cubo, **filtros)
+        fig_treemap = px.treemap(part, path=["categoria_producto", "marca_tipo"], values="precio_usd", title="Participación (Tradicional ~61%)")
+        st.plotly_chart(fig_treemap)
 
 with tab2:
-    st.subheader("Curva de demanda (precio vs tasa de cambio)")
-    costo_import = st.slider("Costo importado (USD)", 0.5, 2.0, 1.0, 0.1)
-    tc_oficial = st.slider("Tipo de cambio oficial (s_t)", 30.0, 50.0, 36.0, 0.5)
-    tc_paralelo = st.slider("Tipo de cambio paralelo (b_t)", 35.0, 60.0, 42.0, 0.5)
-    # Restricciones P >= s_t P*, P >= b_t P*
-    p_min_oficial = tc_oficial * costo_import
-    p_min_paralelo = tc_paralelo * costo_import
-    if p_min_paralelo > p_min_oficial * 1.5:
-        st.warning("Destrucción de demanda: precio de venta por debajo de umbral de arbitraje.")
-    precios = np.linspace(30, 80, 50)
-    demanda = 1000 - 8 * precios + 0.1 * tc_paralelo * precios
-    demanda = np.maximum(demanda, 0)
-    fig_dem = px.line(x=precios, y=demanda, labels={"x": "Precio (MN)", "y": "Volumen proyectado"})
-    fig_dem.add_vline(x=p_min_oficial, line_dash="dash", line_color="gray")
-    fig_dem.add_vline(x=p_min_paralelo, line_dash="dash", line_color="red")
-    st.plotly_chart(fig_dem)
+    if tab_open(tab2):
+        st.subheader("Curva de demanda (precio vs tasa de cambio)")
+        costo_import = st.slider("Costo importado (USD)", 0.5, 2.0, 1.0, 0.1)
+        tc_oficial = st.slider("Tipo de cambio oficial (s_t)", 30.0, 50.0, 36.0, 0.5)
+        tc_paralelo = st.slider("Tipo de cambio paralelo (b_t)", 35.0, 60.0, 42.0, 0.5)
+        # Restricciones P >= s_t P*, P >= b_t P*
+        curva = demand_curve(costo_import, tc_oficial, tc_paralelo)
+        if curva.demand_destruction:
+            st.warning("Destrucción de demanda: precio de venta por debajo de umbral de arbitraje.")
+        fig_dem = px.line(x=curva.precios, y=curva.demanda, labels={"x": "Precio (MN)", "y": "Volumen proyectado"})
+        fig_dem.add_vline(x=curva.p_min_oficial, line_dash="dash", line_color="gray")
+        fig_dem.add_vline(x=curva.p_min_paralelo, line_dash="dash", line_color="red")
+        st.plotly_chart(fig_dem)
 
 with tab3:
-    st.subheader("Reglas de asociación (afinidades de productos)")
-    soporte_min = st.number_input("Soporte mínimo (%)", 0.01, 0.5, 0.05, 0.01)
-    confianza_min = st.number_input("Confianza mínima (%)", 0.1, 0.9, 0.3, 0.05)
-    links = get_association_flows()
-    if links:
-        source = [l[0] for l in links]
-        target = [l[1] for l in links]
-        value = [l[2] for l in links]
-        all_nodes = list(set(source) | set(target))
-        node_idx = {n: i for i, n in enumerate(all_nodes)}
-        fig_sankey = go.Figure(data=[go.Sankey(
-            node=dict(label=all_nodes),
-            link=dict(source=[node_idx[s] for s in source], target=[node_idx[t] for t in target], value=value),
-        )])
-        fig_sankey.update_layout(title="Ej.: compran Harina → también Margarina (Soporte/Confianza aplicados)", height=450)
-        st.plotly_chart(fig_sankey)
+    if tab_open(tab3):
+        st.subheader("Reglas de asociación (afinidades de productos)")
+        soporte_min = st.number_input("Soporte mínimo (%)", 0.01, 0.5, 0.05, 0.01)
+        confianza_min = st.number_input("Confianza mínima (%)", 0.1, 0.9, 0.3, 0.05)
+        canastas = get_basket_rules()
+        reglas = canastas.filter(soporte_min / 100, confianza_min, top=30)
+        st.caption(f"{len(canastas.rules):,} reglas minadas sobre {canastas.n_baskets:,} tickets; {len(reglas)} más fuertes (lift) con los umbrales actuales.")
+        if len(reglas):
+            # Antecedentes a la izquierda y consecuentes a la derecha (nodos distintos, sin ciclos)
+            ante = list(dict.fromkeys(reglas["antecedente"]))
+            cons = list(dict.fromkeys(reglas["consecuente"]))
+            fig_sankey = go.Figure(data=[go.Sankey(
+                node=dict(label=ante + cons),
+                link=dict(
+                    source=[ante.index(a) for a in reglas["antecedente"]],
+                    target=[len(ante) + cons.index(c) for c in reglas["consecuente"]],
+                    value=reglas["conteo"].tolist(),
+                    customdata=np.column_stack([reglas["confianza"], reglas["lift"]]),
+                    hovertemplate="Confianza %{customdata[0]:.1%}<br>Lift %{customdata[1]:.1f}<extra></extra>",
+                ),
+            )])
+            fig_sankey.update_layout(title="Compran A → también B (tickets con ambos; soporte y confianza aplicados)", height=450)
+            st.plotly_chart(fig_sankey)
+            st.dataframe(reglas, hide_index=True)
+        else:
+            st.info("Ninguna regla cumple los umbrales de soporte y confianza.")
 
 with tab4:
-    st.subheader("Self-Service BI — Arrastrar y soltar variables")
-    try:
-        import pygwalker as pyg
-        sub = df_f[["fecha", "categoria_producto", "marca_tipo", "precio_bs", "precio_usd", "volumen_unidades", "metodo_pago", "region", "formato_tienda"]].copy()
-        sub["hora_del_dia"] = np.random.RandomState(303).integers(8, 21, len(sub))
-        pyg_html = pyg.walk(sub, return_html=True)
-        st.components.v1.html(pyg_html, height=800, scrolling=True)
-    except Exception as e:
-        st.info("PyGWalker no disponible en este entorno. Para análisis exploratorio, use la tabla filtrable a continuación.")
-        st.dataframe(df_f.head(5000))
+    if tab_open(tab4):
+        st.subheader("Self-Service BI — Arrastrar y soltar variables")
+        # Los datos quedan en el servidor; el navegador solo recibe agregados
+        render_explorer(get_explorer_frame(), version=get_explorer_frame.cache_version, key="retail", filtros=filtros, height=800)
@@ -1,10 +1,21 @@
 # CVEA Health Suite — Morbilidad, auditoría clínica, reservas, tarificación
+import os
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from theme import cvea_header
+from theme import cvea_header, lazy_import, lazy_tabs, tab_open
+from dataset_cache import persistent_dataset
+from datasets import shared_dataset
+from decimation import distribution_figure, series_trace
+from figures import ruin_fan_figure, ruin_time_figure
+from cvea_core import health_data
+from cvea_core.health import MODALIDADES, SINIESTRALIDAD_MODALIDAD, health_kpis, quote_premium
+from cvea_core.health_data import ClaimsStore, generate_claims
+from cvea_core.ruin import simulate_ruin
+from cvea_core.audit import audit_features, fit_audit_model
+from cvea_core.control_charts import AGRUPACIONES, GRAFICOS, OnlineControlChart
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title="CVEA Health Suite (CVEA-HS)", page_icon="🏥", layout="wide")
 cvea_header(
@@ -12,26 +23,40 @@ cvea_header(
     "Monitoreo epidemiológico, auditoría clínica, solvencia y tarificación — Datos simulados",
 )
 
-@st.cache_data
+@shared_dataset
+@persistent_dataset(depends=(health_data,))
 def get_health_claims(n=22_000):
-    rng = np.random.default_rng(111)
-    cie10 = [f"E11", "I10", "J00", "K21", "M54", "R50", "Z00", "A09", "N39", "E66"]
-    servicios = ["Consulta Triaje", "Ecograma Mamario", "Ecograma Prostático", "Telemedicina", "Consulta Especialista", "Laboratorio"]
-    clinicas = [f"Clínica {chr(65+i)}" for i in range(8)]
-    dates = pd.date_range("2023-01-01", periods=730, freq="D")
-    records = []
-    for i in range(n):
-        records.append({
-            "id_paciente": rng.integers(1, 8000),
-            "codigo_CIE10": rng.choice(cie10),
-            "tipo_servicio": rng.choice(servicios, p=[0.25, 0.1, 0.08, 0.15, 0.25, 0.17]),
-            "clinica_proveedora": rng.choice(clinicas),
-            "costo_facturado_usd": np.clip(rng.lognormal(5, 1.2), 20, 3000),
-            "limite_baremo_usd": np.clip(rng.lognormal(5, 0.9), 25, 2500),
-            "fecha_admision": rng.choice(dates),
-        })
-    return pd.DataFrame(records)
+    return generate_claims(n).to_frame()
+
+@st.cache_resource
+def get_claims_store(n=22_000):
+    # Se reconstruye desde el frame persistido: códigos y días, sin volver a simular
+    return ClaimsStore.from_frame(get_health_claims(n))
+
+@st.cache_data(show_spinner="Simulando trayectorias del fondo…")
+def get_ruin_simulation(inflacion_medica, n_paths):
+    return simulate_ruin(inflacion_medica=inflacion_medica, n_paths=n_paths, workers=os.cpu_count() or 1)
+
+@st.cache_resource(show_spinner="Ajustando modelo de auditoría…")
+def get_audit_model(n=22_000):
+    # Un ajuste por versión del dataset; el slider de sensibilidad solo consulta el índice ordenado
+    return fit_audit_model(get_health_claims(n))
+
+@st.cache_resource
+def get_control_monitor(by="clinica", n=22_000):
+    # Acumuladores en línea: nuevas facturas se agregan con monitor.update sin recorrer la historia
+    return OnlineControlChart.from_store(get_claims_store(n), by=by)
+
+@st.cache_data
+def get_cost_distribution_figure(n=22_000):
+    # Violín con puntos en muestras chicas; cajas desde cuantiles precalculados en carteras grandes
+    return distribution_figure(get_health_claims(n), "tipo_servicio", "costo_facturado_usd")
+
+@st.cache_data
+def get_new_claims(n=500, seed=2025):
+    return generate_claims(n, seed=seed).to_frame()
 
+claims = get_claims_store()
 df_h = get_health_claims()
 
 st.sidebar.header("Controles")
@@ -39,88 +64,82 @@ sensibilidad_auditoria = st.sidebar.slider("Sensibilidad de auditoría (umbral r
 inflacion_medica = st.sidebar.number_input("Inflación médica (% anual)", 0.0, 100.0, 25.0, 1.0) / 100
 inflacion_general = st.sidebar.number_input("Inflación general (% anual)", 0.0, 150.0, 40.0, 5.0) / 100
 
-tab1, tab2, tab3, tab4 = st.tabs(["Monitoreo epidemiológico", "Auditoría clínica", "Solvencia y reservas", "Tarificación y modalidades"])
+tab1, tab2, tab3, tab4 = lazy_tabs(["Monitoreo epidemiológico", "Auditoría clínica", "Solvencia y reservas", "Tarificación y modalidades"], key="health_tabs")
 
 with tab1:
-    st.subheader("KPIs")
-    admisiones_mes = len(df_h) / 24
-    tasa_adm = admisiones_mes / 8000 * 100
-    ent = len(df_h[df_h["codigo_CIE10"].str.startswith("E") | df_h["codigo_CIE10"].str.startswith("I")]) / len(df_h) * 100
-    tele = len(df_h[df_h["tipo_servicio"] == "Telemedicina"]) / len(df_h) * 100
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Tasa de admisión mensual (sim.)", f"{tasa_adm:.2f}%", "—")
-    c2.metric("Prevalencia ENT (sim.)", f"{ent:.1f}%", "—")
-    c3.metric("Uso telemedicina vs presencial", f"{tele:.1f}% telemedicina", "—")
-    st.subheader("Volumen de siniestros por tipo de servicio y clínica")
-    agg = df_h.groupby(["tipo_servicio", "clinica_proveedora"]).size().unstack(fill_value=0)
-    fig_map = px.imshow(agg, text_auto=True, aspect="auto", color_continuous_scale="Blues")
-    st.plotly_chart(fig_map)
+    if tab_open(tab1):
+        st.subheader("KPIs")
+        kpis = health_kpis(claims)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Tasa de admisión mensual (sim.)", f"{kpis.tasa_admision:.2f}%", "—")
+        c2.metric("Prevalencia ENT (sim.)", f"{kpis.prevalencia_ent:.1f}%", "—")
+        c3.metric("Uso telemedicina vs presencial", f"{kpis.telemedicina:.1f}% telemedicina", "—")
+        st.subheader("Volumen de siniestros por tipo de servicio y clínica")
+        agg = claims.volume_by_service_clinic()
+        fig_map = px.imshow(agg, text_auto=True, aspect="auto", color_continuous_scale="Blues")
+        st.plotly_chart(fig_map)
 
 with tab2:
-    st.subheader("Costo por procedimiento vs baremo")
-    fig_violin = px.violin(df_h, x="tipo_servicio", y="costo_facturado_usd", box=True, points="outliers")
-    st.plotly_chart(fig_violin)
-    # Shewhart-style: costo promedio diario
-    df_h["fecha"] = pd.to_datetime(df_h["fecha_admision"]).dt.date
-    daily = df_h.groupby("fecha")["costo_facturado_usd"].mean().reset_index()
-    daily["fecha"] = pd.to_datetime(daily["fecha"])
-    media = daily["costo_facturado_usd"].mean()
-    std = daily["costo_facturado_usd"].std() or 1
-    daily["LSC"] = media + 2 * std
-    daily["LIC"] = media - 2 * std
-    fig_control = go.Figure()
-    fig_control.add_trace(go.Scatter(x=daily["fecha"], y=daily["costo_facturado_usd"], name="Costo promedio diario"))
-    fig_control.add_trace(go.Scatter(x=daily["fecha"], y=daily["LSC"], line=dict(dash="dash", color="red"), name="LSC"))
-    fig_control.add_trace(go.Scatter(x=daily["fecha"], y=daily["LIC"], line=dict(dash="dash", color="red"), name="LIC"))
-    fig_control.update_layout(title="Gráfico de control (Shewhart) — Costo promedio por admisión", height=350)
-    st.plotly_chart(fig_control)
-    # Auditoría: Isolation Forest style - marcar outliers
-    from sklearn.ensemble import IsolationForest
-    X = df_h[["costo_facturado_usd", "limite_baremo_usd"]].copy()
-    X["ratio"] = X["costo_facturado_usd"] / (X["limite_baremo_usd"] + 1)
-    iso = IsolationForest(contamination=sensibilidad_auditoria, random_state=42)
-    df_h["_outlier"] = iso.fit_predict(X)
-    df_audit = df_h[df_h["_outlier"] == -1][["id_paciente", "tipo_servicio", "clinica_proveedora", "costo_facturado_usd", "limite_baremo_usd"]].head(200)
-    st.subheader("Facturas sugeridas para revisión (desviaciones)")
-    st.dataframe(df_audit)
+    if tab_open(tab2):
+        st.subheader("Costo por procedimiento vs baremo")
+        fig_violin = get_cost_distribution_figure()
+        st.plotly_chart(fig_violin)
+        # Gráficos de control en línea: límites por clínica / tipo de servicio
+        c1, c2, c3 = st.columns(3)
+        por = c1.selectbox("Límites por", list(AGRUPACIONES), format_func=AGRUPACIONES.get, index=1)
+        monitor = get_control_monitor(por)
+        grupo = c2.selectbox("Grupo", range(monitor.n_groups), format_func=lambda g: monitor.group_labels[g])
+        tipo = c3.radio("Gráfico", list(GRAFICOS), format_func=GRAFICOS.get, horizontal=True)
+        serie = monitor.chart(tipo, grupo)
+        nombre = {"shewhart": "Costo promedio diario", "ewma": "EWMA (z)", "cusum": "CUSUM C⁺"}[tipo]
+        fig_control = go.Figure()
+        fig_control.add_trace(series_trace(serie["fecha"], serie["valor"], name=nombre))
+        if tipo == "cusum":
+            fig_control.add_trace(go.Scatter(x=serie["fecha"], y=serie["valor_inferior"], name="CUSUM −C⁻"))
+        fig_control.add_trace(go.Scatter(x=serie["fecha"], y=serie["LSC"], line=dict(dash="dash", color="red"), name="LSC"))
+        fig_control.add_trace(go.Scatter(x=serie["fecha"], y=serie["LIC"], line=dict(dash="dash", color="red"), name="LIC"))
+        alarmas = serie[serie["alarma"]]
+        fig_control.add_trace(go.Scatter(x=alarmas["fecha"], y=alarmas["valor"], mode="markers", marker=dict(color="red", size=8), name="Alarma"))
+        fig_control.update_layout(title=f"Gráfico de control ({GRAFICOS[tipo]}) — {monitor.group_labels[grupo]}", height=350)
+        st.plotly_chart(fig_control)
+        st.dataframe(monitor.alarm_summary(tipo), hide_index=True)
+        # Auditoría: Isolation Forest ajustado una vez; la sensibilidad es un umbral sobre los puntajes
+        modelo_audit = get_audit_model()
+        filas = modelo_audit.flagged(sensibilidad_auditoria)
+        df_audit = df_h.iloc[filas[:200]][["id_paciente", "tipo_servicio", "clinica_proveedora", "costo_facturado_usd", "limite_baremo_usd"]].copy()
+        df_audit["puntaje_anomalia"] = -modelo_audit.score(audit_features(df_audit))
+        st.subheader("Facturas sugeridas para revisión (desviaciones)")
+        st.caption(f"{len(filas):,} de {len(df_h):,} facturas superan el umbral de revisión ({sensibilidad_auditoria:.0%}).")
+        st.dataframe(df_audit)
+        nuevas = get_new_claims()
+        marcadas = modelo_audit.flag_new(audit_features(nuevas), sensibilidad_auditoria)
+        st.metric("Lote de facturas nuevas marcadas (sin re-entrenar)", f"{marcadas.sum():,} / {len(nuevas):,}")
 
 with tab3:
-    st.subheader("Simulación Monte Carlo — Patrimonio del fondo a 5 años (Teoría de la ruina)")
-    np.random.seed(222)
-    años = 5
-    paths = 100
-    patrimonio_inicial = 5_000_000
-    ingresos_anuales = 3_200_000
-    gastos_base = 2_800_000
-    proy = np.zeros((paths, años + 1))
-    proy[:, 0] = patrimonio_inicial
-    for t in range(1, años + 1):
-        infl = (1 + inflacion_medica) ** t
-        gastos = gastos_base * infl * (1 + np.random.randn(paths) * 0.1)
-        proy[:, t] = proy[:, t - 1] + ingresos_anuales - gastos
-    proy = np.maximum(proy, 0)
-    fig_ruina = go.Figure()
-    for i in range(min(20, paths)):
-        fig_ruina.add_trace(go.Scatter(x=list(range(años + 1)), y=proy[i], mode="lines", line=dict(width=1, color="lightblue"), showlegend=False))
-    fig_ruina.add_trace(go.Scatter(x=list(range(años + 1)), y=proy.mean(axis=0), mode="lines", line=dict(width=3, color="darkblue"), name="Media"))
-    fig_ruina.update_layout(xaxis_title="Año", yaxis_title="Patrimonio (USD)", title="Proyección patrimonio (inflación médica aplicada)", height=400)
-    st.plotly_chart(fig_ruina)
+    if tab_open(tab3):
+        st.subheader("Simulación Monte Carlo — Patrimonio del fondo a 5 años (Teoría de la ruina)")
+        n_paths = st.select_slider("Número de trayectorias", [100_000, 1_000_000, 5_000_000], value=1_000_000)
+        ruina = get_ruin_simulation(inflacion_medica, n_paths)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Probabilidad de ruina a 5 años", f"{ruina.prob_ruin:.2%}", f"IC95% {ruina.ci[0]:.2%} – {ruina.ci[1]:.2%}")
+        anio_medio = ruina.mean_ruin_year()
+        c2.metric("Año medio de ruina (si ocurre)", f"{anio_medio:.1f}" if anio_medio is not None else "—", "—")
+        c3.metric("Trayectorias simuladas", f"{ruina.n_paths:,}", "—")
+        st.plotly_chart(ruin_fan_figure(ruina))
+        st.plotly_chart(ruin_time_figure(ruina))
 
 with tab4:
-    st.subheader("Rentabilidad por modalidad (embudo)")
-    modalidades = ["Tradicional", "Asistencia domiciliaria", "Telemedicina"]
-    siniestralidad = [0.72, 0.68, 0.55]
-    fig_funnel = px.funnel(x=siniestralidad, y=modalidades, title="Siniestralidad por modalidad")
-    st.plotly_chart(fig_funnel)
-    st.subheader("Simulador de primas (coaseguro, deducible, tope)")
-    coaseguro = st.number_input("Coaseguro (%)", 0, 50, 20)
-    deducible = st.number_input("Deducible (USD)", 0, 500, 100)
-    tope = st.number_input("Tope de cobertura (USD)", 1000, 50000, 10000)
-    prima_base = 80
-    prima_ajustada = prima_base * (1 - coaseguro / 100) * (1 + deducible / 1000) * (tope / 10000) ** 0.1
-    margen_suf = (prima_ajustada - 60) / prima_ajustada if prima_ajustada > 0 else 0
-    st.metric("Prima resultante (USD/mes)", f"{prima_ajustada:.2f}", "—")
-    if margen_suf >= 0.15:
-        st.success("Margen de suficiencia actuarial cumplido (≥15%).")
-    else:
-        st.warning("Margen por debajo del 15% — revisar tarifa para viabilidad del plan.")
+    if tab_open(tab4):
+        st.subheader("Rentabilidad por modalidad (embudo)")
+        fig_funnel = px.funnel(x=SINIESTRALIDAD_MODALIDAD, y=MODALIDADES, title="Siniestralidad por modalidad")
+        st.plotly_chart(fig_funnel)
+        st.subheader("Simulador de primas (coaseguro, deducible, tope)")
+        coaseguro = st.number_input("Coaseguro (%)", 0, 50, 20)
+        deducible = st.number_input("Deducible (USD)", 0, 500, 100)
+        tope = st.number_input("Tope de cobertura (USD)", 1000, 50000, 10000)
+        cotizacion = quote_premium(coaseguro, deducible, tope)
+        st.metric("Prima resultante (USD/mes)", f"{cotizacion.prima:.2f}", "—")
+        if cotizacion.sufficient:
+            st.success("Margen de suficiencia actuarial cumplido (≥15%).")
+        else:
+            st.warning("Margen por debajo del 15% — revisar tarifa para viabilidad del plan.")
@@ -2,9 +2,17 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from theme import cvea_header
+from theme import cvea_header, lazy_import, lazy_tabs, tab_open
+from dataset_cache import persistent_dataset
+from datasets import overlay, shared_dataset
+from explorer import render_explorer
+from cvea_core import control
+from cvea_core.control import budget_waterfall, failure_counts, fleet_kpis, fleet_vehicles, generate_logistics_data, oee
+from cvea_core.spatial import ESTADOS, SpatialGrid
+from cvea_core.reliability import fit_reliability, simulate_event_history
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 st.set_page_config(page_title="CVEA Control Suite (CVEA-CS)", page_icon="⚙️", layout="wide")
 cvea_header(
@@ -12,30 +20,32 @@ cvea_header(
     "Cadena de suministro, mantenimiento predictivo, gastos operativos y análisis exploratorio — Datos simulados",
 )
 
-@st.cache_data
+@shared_dataset
+@persistent_dataset(depends=(control,))
 def get_logistics_data(n=12_000):
-    rng = np.random.default_rng(333)
-    # Venezuela bounds approx
-    lat = 10.0 + rng.uniform(-2, 2, n)
-    lon = -66.5 + rng.uniform(-3, 3, n)
-    consumo = rng.lognormal(3, 0.5, n)
-    km = rng.lognormal(6, 0.4, n)
-    estado = rng.choice(["Activo", "En Mantenimiento", "Detenido"], n, p=[0.85, 0.10, 0.05])
-    tiempo_ciclo = rng.lognormal(4, 0.6, n)
-    costo = rng.lognormal(8, 0.5, n)
-    ids = [f"V{i}" for i in range(1, n // 100 + 1)] * 100
-    rng.shuffle(ids)
-    ids = ids[:n]
-    return pd.DataFrame({
-        "id_vehiculo": ids,
-        "lat": lat,
-        "lon": lon,
-        "consumo_combustible_litros": consumo,
-        "kilometros_recorridos": km,
-        "estado_operativo": estado,
-        "tiempo_ciclo_produccion": tiempo_ciclo,
-        "costo_operativo_usd": costo,
-    })
+    return generate_logistics_data(n)
+
+@overlay(get_logistics_data)
+def get_explorer_frame(df):
+    return df.assign(mes=np.random.default_rng(404).integers(1, 13, len(df)))
+
+@st.cache_resource(show_spinner="Agregando registros GPS en la rejilla…")
+def get_fleet_grid(n=12_000, levels=6):
+    # Rejilla precalculada una vez; cada resolución del mapa solo lee sus celdas
+    return SpatialGrid.from_frame(get_logistics_data(n), levels=levels)
+
+@overlay(get_logistics_data)
+def get_fleet_vehicles(df):
+    # Zona por latitud media del vehículo y turno asignado (fijo por vehículo)
+    return fleet_vehicles(df)
+
+@st.cache_data
+def get_failure_history(n=12_000):
+    return simulate_event_history(get_fleet_vehicles(n))
+
+@st.cache_resource(show_spinner="Ajustando confiabilidad Weibull…")
+def get_reliability_model(n=12_000):
+    return fit_reliability(get_failure_history(n))
 
 df_log = get_logistics_data()
 
@@ -44,77 +54,86 @@ variabilidad_combustible = st.sidebar.slider("Variabilidad precio/disponibilidad
 fecha_ini = st.sidebar.date_input("Fecha inicio auditoría", pd.Timestamp("2024-01-01"))
 fecha_fin = st.sidebar.date_input("Fecha fin auditoría", pd.Timestamp("2024-12-31"))
 
-tab1, tab2, tab3, tab4 = st.tabs(["Cadena de suministro y flotas", "Eficiencia industrial y mantenimiento", "Sostenibilidad y gastos", "Análisis exploratorio"])
+tab1, tab2, tab3, tab4 = lazy_tabs(["Cadena de suministro y flotas", "Eficiencia industrial y mantenimiento", "Sostenibilidad y gastos", "Análisis exploratorio"], key="control_tabs")
 
 with tab1:
-    st.subheader("KPIs logísticos")
-    costo_km = (df_log["costo_operativo_usd"].sum() / (df_log["kilometros_recorridos"].sum() + 1)) * (1 + variabilidad_combustible)
-    rend_comb = df_log["kilometros_recorridos"].sum() / (df_log["consumo_combustible_litros"].sum() + 1)
-    otif_sim = 0.88 + np.random.RandomState(1).uniform(0, 0.05)
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Costo por kilómetro (USD/km)", f"{costo_km:.2f}", f"{variabilidad_combustible*100:+.0f}% comb.")
-    c2.metric("Rendimiento combustible (km/L)", f"{rend_comb:.1f}", "—")
-    c3.metric("OTIF (On Time In Full)", f"{otif_sim:.1%}", "—")
-    st.subheader("Mapa de flota y rutas (centros → entregas)")
-    try:
-        import pydeck as pdk
-        centro = df_log.groupby("id_vehiculo").agg({"lat": "mean", "lon": "mean"}).reset_index().head(200)
-        view = pdk.ViewState(latitude=10.0, longitude=-66.5, zoom=5, pitch=40)
-        layer1 = pdk.Layer("ScatterplotLayer", centro, get_position=["lon", "lat"], get_radius=5000, get_color=[100, 150, 200], pickable=True)
-        r = pdk.Deck(layers=[layer1], initial_view_state=view, map_style="light")
-        st.pydeck_chart(r)
-    except Exception as e:
-        st.info("Mapa PyDeck no disponible. Mostrando muestra de coordenadas.")
-        st.dataframe(df_log[["id_vehiculo", "lat", "lon", "estado_operativo"]].drop_duplicates().head(100))
+    if tab_open(tab1):
+        st.subheader("KPIs logísticos")
+        kpis = fleet_kpis(df_log, variabilidad_combustible)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Costo por kilómetro (USD/km)", f"{kpis.costo_km:.2f}", f"{variabilidad_combustible*100:+.0f}% comb.")
+        c2.metric("Rendimiento combustible (km/L)", f"{kpis.rendimiento:.1f}", "—")
+        c3.metric("OTIF (On Time In Full)", f"{kpis.otif:.1%}", "—")
+        st.subheader("Mapa de flota y rutas (centros → entregas)")
+        try:
+            import pydeck as pdk
+            c1, c2 = st.columns(2)
+            n_gps = c1.select_slider("Registros GPS agregados", [12_000, 1_000_000, 3_000_000], value=12_000)
+            grid = get_fleet_grid(n_gps)
+            nivel = c2.select_slider("Resolución de la rejilla", list(range(grid.levels)), value=3,
+                                     format_func=lambda k: f"{grid.cell_size_km(k):,.0f} km")
+            celdas = grid.cells(nivel).copy()
+            riesgo = celdas[f"pct_{ESTADOS[1]}"] + celdas[f"pct_{ESTADOS[2]}"]
+            celdas["color"] = [[int(200 * r / max(riesgo.max(), 1e-9)) + 40, 110, 160, 180] for r in riesgo]
+            celdas["altura"] = celdas["registros"] / celdas["registros"].max() * 40_000
+            celdas[["consumo_medio", "costo_operativo_usd"]] = celdas[["consumo_medio", "costo_operativo_usd"]].round(1)
+            st.caption(f"{len(celdas):,} celdas para {int(celdas['registros'].sum()):,} registros; color = % en mantenimiento o detenido.")
+            view = pdk.ViewState(latitude=10.0, longitude=-66.5, zoom=5, pitch=40)
+            layer1 = pdk.Layer(
+                "PolygonLayer", celdas, get_polygon="poligono", get_fill_color="color", get_elevation="altura",
+                extruded=True, pickable=True,
+            )
+            tooltip = {"text": "Registros: {registros}\nConsumo medio: {consumo_medio} L\nCosto: {costo_operativo_usd} USD"}
+            r = pdk.Deck(layers=[layer1], initial_view_state=view, map_style="light", tooltip=tooltip)
+            st.pydeck_chart(r)
+        except Exception as e:
+            st.info("Mapa PyDeck no disponible. Mostrando muestra de coordenadas.")
+            st.dataframe(df_log[["id_vehiculo", "lat", "lon", "estado_operativo"]].drop_duplicates().head(100))
 
 with tab2:
-    st.subheader("OEE (Overall Equipment Effectiveness)")
-    oee_val = 0.72 + np.random.RandomState(44).uniform(-0.05, 0.05)
-    fig_gauge = go.Figure(go.Indicator(mode="gauge+number", value=oee_val * 100, number={"suffix": "%"}, gauge={"axis": {"range": [0, 100]}, "bar": {"color": "darkblue"}, "steps": [{"range": [0, 50], "color": "lightgray"}, {"range": [50, 75], "color": "gray"}, {"range": [75, 100], "color": "lightblue"}], "threshold": {"line": {"color": "red", "width": 4}, "value": 85}}))
-    fig_gauge.update_layout(title="OEE en tiempo real (simulado)", height=350)
-    st.plotly_chart(fig_gauge)
-    st.subheader("Frecuencia de fallas por zona/turno (heatmap)")
-    df_log["zona"] = pd.cut(df_log["lat"], 5, labels=["Z1", "Z2", "Z3", "Z4", "Z5"])
-    df_log["turno"] = np.random.RandomState(55).choice(["Mañana", "Tarde", "Noche"], len(df_log))
-    fallas = df_log.groupby(["zona", "turno"]).size().unstack(fill_value=0)
-    fig_heat = px.imshow(fallas, text_auto=True, aspect="auto", color_continuous_scale="Reds")
-    st.plotly_chart(fig_heat)
-    st.subheader("Curva de supervivencia — Probabilidad de falla a 30 días")
-    t = np.linspace(0, 30, 100)
-    # Weibull simplificado
-    shape, scale = 1.5, 25
-    surv = np.exp(-(t / scale) ** shape)
-    prob_falla_30 = 1 - surv[-1]
-    fig_surv = go.Figure()
-    fig_surv.add_trace(go.Scatter(x=t, y=surv, mode="lines", name="P(sin falla)"))
-    fig_surv.update_layout(xaxis_title="Días", yaxis_title="P(sin falla)", title=f"P(falla antes 30 días) ≈ {prob_falla_30:.1%}", height=350)
-    st.plotly_chart(fig_surv)
-    if st.button("Simular orden de mantenimiento preventivo"):
-        st.success("Orden ejecutada. Probabilidad de falla reiniciada (simulación).")
+    if tab_open(tab2):
+        st.subheader("OEE (Overall Equipment Effectiveness)")
+        oee_val = oee()
+        fig_gauge = go.Figure(go.Indicator(mode="gauge+number", value=oee_val * 100, number={"suffix": "%"}, gauge={"axis": {"range": [0, 100]}, "bar": {"color": "darkblue"}, "steps": [{"range": [0, 50], "color": "lightgray"}, {"range": [50, 75], "color": "gray"}, {"range": [75, 100], "color": "lightblue"}], "threshold": {"line": {"color": "red", "width": 4}, "value": 85}}))
+        fig_gauge.update_layout(title="OEE en tiempo real (simulado)", height=350)
+        st.plotly_chart(fig_gauge)
+        st.subheader("Frecuencia de fallas por zona/turno (heatmap)")
+        historial = get_failure_history()
+        fallas = failure_counts(historial)
+        fig_heat = px.imshow(fallas, text_auto=True, aspect="auto", color_continuous_scale="Reds")
+        st.plotly_chart(fig_heat)
+        st.subheader("Curva de supervivencia — Probabilidad de falla a 30 días")
+        modelo = get_reliability_model()
+        ranking = modelo.ranking(30)
+        vehiculo = st.selectbox("Vehículo", ranking["id_vehiculo"], help="Ordenados por probabilidad de falla a 30 días")
+        t = np.linspace(0, 30, 100)
+        surv = modelo.survival_curve(vehiculo, t)
+        fila = ranking.set_index("id_vehiculo").loc[vehiculo]
+        seg = modelo.segmentos.set_index(["zona", "turno"]).loc[(fila["zona"], fila["turno"])]
+        fig_surv = go.Figure()
+        fig_surv.add_trace(go.Scatter(x=t, y=surv, mode="lines", name=f"{vehiculo} (edad {fila['edad']:.0f} días)"))
+        fig_surv.add_trace(go.Scatter(x=t, y=np.exp(-(t / seg["escala"]) ** seg["forma"]), mode="lines", line=dict(dash="dash"), name=f"Segmento {fila['zona']}/{fila['turno']} (nuevo)"))
+        fig_surv.update_layout(xaxis_title="Días", yaxis_title="P(sin falla)", title=f"P(falla antes 30 días) ≈ {fila['prob_falla']:.1%} — Weibull k = {fila['forma']:.2f}, λ = {fila['escala']:.0f} ({fila['fuente']})", height=350)
+        st.plotly_chart(fig_surv)
+        st.dataframe(ranking.head(15)[["id_vehiculo", "zona", "turno", "fallas", "edad", "forma", "escala", "prob_falla"]], hide_index=True)
+        n_orden = st.number_input("Vehículos a intervenir (mayor riesgo primero)", 1, len(ranking), min(10, len(ranking)))
+        if st.button("Simular orden de mantenimiento preventivo"):
+            orden, antes, despues = modelo.maintenance_order(int(n_orden), 30)
+            st.success(f"Orden sobre {len(orden)} vehículos: fallas esperadas a 30 días {antes:.1f} → {despues:.1f} ({antes - despues:.1f} evitadas).")
+            st.dataframe(orden[["id_vehiculo", "zona", "turno", "prob_falla", "prob_falla_post"]], hide_index=True)
 
 with tab3:
-    st.subheader("Desglose presupuesto operativo (Waterfall)")
-    presupuesto = 2_500_000
-    diesel = -600_000
-    peajes = -80_000
-    mantenimiento = -120_000
-    depreciacion = -200_000
-    margen = presupuesto + diesel + peajes + mantenimiento + depreciacion
-    x = ["Presupuesto total", "Diesel", "Peajes", "Mantenimiento flota", "Depreciación", "Margen operativo neto"]
-    y = [presupuesto, diesel, peajes, mantenimiento, depreciacion, margen]
-    colors = ["blue" if v >= 0 else "red" for v in y]
-    fig_w = go.Figure(go.Bar(x=x, y=y, marker_color=colors, text=[f"{v:,.0f}" for v in y], textposition="outside"))
-    fig_w.update_layout(title="Cascada de gastos operativos", yaxis_title="USD", height=400)
-    st.plotly_chart(fig_w)
+    if tab_open(tab3):
+        st.subheader("Desglose presupuesto operativo (Waterfall)")
+        cascada = budget_waterfall()
+        x, y = list(cascada.index), cascada.tolist()
+        colors = ["blue" if v >= 0 else "red" for v in y]
+        fig_w = go.Figure(go.Bar(x=x, y=y, marker_color=colors, text=[f"{v:,.0f}" for v in y], textposition="outside"))
+        fig_w.update_layout(title="Cascada de gastos operativos", yaxis_title="USD", height=400)
+        st.plotly_chart(fig_w)
 
 with tab4:
-    st.subheader("Self-Service Analytics")
-    try:
-        import pygwalker as pyg
-        sub = df_log.copy()
-        sub["mes"] = np.random.RandomState(404).integers(1, 13, len(sub))
-        pyg_html = pyg.walk(sub, return_html=True)
-        st.components.v1.html(pyg_html, height=700, scrolling=True)
-    except Exception as e:
-        st.info("PyGWalker no disponible. Use la tabla para cruzar estado_operativo, tiempo_ciclo_produccion, etc.")
-        st.dataframe(df_log.head(2000))
+    if tab_open(tab4):
+        st.subheader("Self-Service Analytics")
+        # Los datos quedan en el servidor; el navegador solo recibe agregados
+        render_explorer(get_explorer_frame(), version=get_explorer_frame.cache_version, key="control")
@@ -1,6 +1,9 @@
-import streamlit as st
+import importlib.util
+import sys
 from pathlib import Path
 
+import streamlit as st
+
 # Directorio raíz del proyecto (dos niveles arriba de esta carpeta)
 ROOT = Path(__file__).resolve().parents[2]
 
@@ -137,3 +140,39 @@ def cvea_header(title: str, subtitle: str | None = None) -> None:
         if subtitle:
             st.markdown(f"<div class='cvea-header-subtitle'>{subtitle}</div>", unsafe_allow_html=True)
 
+
+def lazy_import(name: str):
+    """Módulo que se carga recién al primer acceso a un atributo (p. ej. `px.bar`).
+
+    Las páginas declaran así plotly, sklearn, pydeck, etc.: el costo de importarlos se paga solo
+    si se ejecuta la pestaña que los usa.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    padre, _, hijo = name.rpartition(".")
+    if padre:
+        setattr(sys.modules[padre], hijo, module)
+    return module
+
+
+def lazy_tabs(labels: list[str], key: str):
+    """Pestañas que ejecutan solo el contenido de la seleccionada (usar junto con `tab_open`).
+
+    Con versiones de Streamlit sin pestañas perezosas se comportan como `st.tabs` (todas abiertas).
+    """
+    try:
+        return st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
+
+
+def tab_open(tab) -> bool:
+    """True si la pestaña está seleccionada o si Streamlit no informa el estado."""
+    return getattr(tab, "open", None) is not False
@@ -1,8 +1,31 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 
+from dataset_cache import persistent_dataset
+from ingest import cache_version, ingest_directory, load_panel, load_rates
+
+MEDIDAS = ["PNC_USD", "Siniestros_Pagados_Netos_USD", "Resultado_Neto_USD"]
+
+# Boletines SUDEASEG reales: si el directorio existe y tiene archivos se usan en lugar de la simulación
+DIR_SUDEASEG = Path(os.environ.get("SUDEASEG_DIR", Path(__file__).parent / "data" / "sudeaseg"))
+CACHE_SUDEASEG = Path(os.environ.get("SUDEASEG_CACHE", Path(__file__).parent / "data" / "sudeaseg_parquet"))
+# Tasas {"YYYY-MM": Bs por USD} para boletines en bolívares; sin el archivo los montos se toman como USD
+TASAS_SUDEASEG = Path(os.environ.get("SUDEASEG_TASAS", DIR_SUDEASEG / "tasas.json"))
+
+
+def add_ratios(df: pd.DataFrame) -> pd.DataFrame:
+    df["Siniestralidad_Pagada"] = df["Siniestros_Pagados_Netos_USD"] / df["PNC_USD"]
+    df["ROE"] = df["Resultado_Neto_USD"] / df["Patrimonio_USD"]
+    df["Ratio_Gastos"] = df["Gastos_Generales_USD"] / df["PNC_USD"]
+    df["Ratio_Capital"] = df["Patrimonio_USD"] / df["Activos_Totales_USD"]
+    return df
+
 
 @st.cache_data
 def simulate_market_data(n_companies: int = 15, n_months: int = 36):
@@ -36,15 +59,32 @@ def simulate_market_data(n_companies: int = 15, n_months: int = 36):
                 )
             )
 
-    df = pd.DataFrame.from_records(records)
-    df["Siniestralidad_Pagada"] = df["Siniestros_Pagados_Netos_USD"] / df["PNC_USD"]
-    df["ROE"] = df["Resultado_Neto_USD"] / df["Patrimonio_USD"]
-    df["Ratio_Gastos"] = df["Gastos_Generales_USD"] / df["PNC_USD"]
-    df["Ratio_Capital"] = df["Patrimonio_USD"] / df["Activos_Totales_USD"]
-    return df
+    return add_ratios(pd.DataFrame.from_records(records))
+
+
+@st.cache_data(ttl=300, show_spinner="Sincronizando boletines SUDEASEG…")
+def sync_market_data() -> tuple[str, list[str]]:
+    """Ingiere boletines nuevos (incremental); devuelve la versión del panel (o "simulado") y los errores."""
+    if not DIR_SUDEASEG.is_dir():
+        return "simulado", []
+    try:
+        tasas = load_rates(TASAS_SUDEASEG) if TASAS_SUDEASEG.is_file() else None
+    except (OSError, ValueError) as e:
+        return "simulado", [f"{TASAS_SUDEASEG.name}: {e}"]
+    errores = ingest_directory(DIR_SUDEASEG, CACHE_SUDEASEG, tasas)["errores"]
+    version = cache_version(CACHE_SUDEASEG)
+    return (f"sudeaseg-{version}" if version else "simulado"), errores
+
+
+@st.cache_data
+def load_market_data(version: str) -> pd.DataFrame:
+    if version == "simulado":
+        return simulate_market_data()
+    return add_ratios(load_panel(CACHE_SUDEASEG))
 
 
 @st.cache_data
+@persistent_dataset()
 def simulate_portfolio(n_policies: int = 4000, start="2023-01-01", end="2025-12-31"):
     rng = np.random.default_rng(456)
     dates = pd.date_range(start, end, freq="D")
@@ -81,11 +121,125 @@ def simulate_portfolio(n_policies: int = 4000, start="2023-01-01", end="2025-12-
     return pol, sin
 
 
-def layout_header():
+@dataclass(frozen=True)
+class AggregateIndex:
+    """Sumas por (Empresa, Fecha) con acumulados a lo largo de Fecha.
+
+    `cum[e, t]` es la suma de las fechas 0..t-1 de la empresa e (con un cero inicial), de modo que
+    el total de cualquier periodo [i, j] es `cum[:, j + 1] - cum[:, i]`, sin volver a filtrar filas.
+    `filas` cuenta las filas de origen de cada celda: una celda sin filas no es un mes con total 0.
+    """
+
+    empresas: list
+    fechas: pd.DatetimeIndex
+    cells: np.ndarray  # (empresas, fechas, medidas)
+    cum: np.ndarray  # (empresas, fechas + 1, medidas)
+    filas: np.ndarray  # (empresas, fechas)
+    cum_filas: np.ndarray  # (empresas, fechas + 1)
+
+    def period(self, date_range) -> slice:
+        i = self.fechas.searchsorted(pd.to_datetime(date_range[0]), side="left")
+        j = self.fechas.searchsorted(pd.to_datetime(date_range[1]), side="right")
+        return slice(i, j)
+
+    def totals(self, date_range) -> np.ndarray:
+        """Totales por empresa en el periodo como diferencia de sumas prefijas: (empresas, medidas)."""
+        p = self.period(date_range)
+        return self.cum[:, p.stop] - self.cum[:, p.start]
+
+    def present(self, date_range) -> np.ndarray:
+        """Empresas con al menos una fila en el periodo: (empresas,) bool."""
+        p = self.period(date_range)
+        return self.cum_filas[:, p.stop] > self.cum_filas[:, p.start]
+
+
+def build_aggregate_index(df: pd.DataFrame) -> AggregateIndex:
+    empresas = df["Empresa"].unique().tolist()
+    fechas = pd.DatetimeIndex(np.sort(df["Fecha"].unique()))
+    e = pd.Categorical(df["Empresa"], categories=empresas).codes
+    t = fechas.get_indexer(df["Fecha"])
+    cells = np.zeros((len(empresas), len(fechas), len(MEDIDAS)))
+    # Montos faltantes cuentan como 0 (como groupby().sum()); un NaN acumulado anularía todos los
+    # totales posteriores de la empresa
+    np.add.at(cells, (e, t), df[MEDIDAS].fillna(0).to_numpy(dtype=float))
+    filas = np.bincount(e.astype(np.int64) * len(fechas) + t, minlength=len(empresas) * len(fechas)).reshape(len(empresas), len(fechas))
+    cum = np.concatenate([np.zeros((len(empresas), 1, len(MEDIDAS))), np.cumsum(cells, axis=1)], axis=1)
+    cum_filas = np.concatenate([np.zeros((len(empresas), 1), dtype=np.int64), np.cumsum(filas, axis=1)], axis=1)
+    return AggregateIndex(empresas=empresas, fechas=fechas, cells=cells, cum=cum, filas=filas, cum_filas=cum_filas)
+
+
+@st.cache_resource
+def get_aggregate_index(version: str):
+    return build_aggregate_index(load_market_data(version))
+
+
+@dataclass(frozen=True)
+class MarketView:
+    """Vista compartida por las páginas de mercado para un (periodo, empresa)."""
+
+    mercado: pd.DataFrame  # serie mensual del mercado
+    compania: pd.DataFrame  # serie mensual de la empresa seleccionada
+    resumen: pd.DataFrame  # totales del periodo por empresa
+
+
+def _serie(fechas, valores: np.ndarray) -> pd.DataFrame:
+    out = pd.DataFrame(valores, columns=MEDIDAS)
+    out.insert(0, "Fecha", fechas)
+    out["Siniestralidad_Pagada"] = out["Siniestros_Pagados_Netos_USD"] / out["PNC_USD"]
+    return out
+
+
+@st.cache_data
+def get_market_view(version: str, date_range, empresa_sel: str) -> MarketView:
+    idx = get_aggregate_index(version)
+    p = idx.period(date_range)
+    fechas = idx.fechas[p]
+    e = idx.empresas.index(empresa_sel)
+    # Como el groupby sobre filas: solo empresas y meses con datos de origen, no celdas vacías en 0
+    presentes = idx.present(date_range)
+    resumen = pd.DataFrame(idx.totals(date_range)[presentes], columns=MEDIDAS)
+    resumen.insert(0, "Empresa", np.asarray(idx.empresas, dtype=object)[presentes])
+    resumen = resumen.sort_values("Empresa").reset_index(drop=True)
+    resumen["Siniestralidad"] = resumen["Siniestros_Pagados_Netos_USD"] / resumen["PNC_USD"]
+    con_mercado = idx.filas[:, p].sum(axis=0) > 0
+    con_empresa = idx.filas[e, p] > 0
+    return MarketView(
+        mercado=_serie(fechas[con_mercado], idx.cells[:, p].sum(axis=0)[con_mercado]),
+        compania=_serie(fechas[con_empresa], idx.cells[e, p][con_empresa]),
+        resumen=resumen,
+    )
+
+
+@dataclass(frozen=True)
+class PortfolioView:
+    """Cartera técnica filtrada por ramos y canales, con sus totales por ramo."""
+
+    polizas: pd.DataFrame
+    siniestros: pd.DataFrame
+    primas_ramo: pd.DataFrame
+    pagos_ramo: pd.DataFrame
+
+
+def portfolio_view(pol: pd.DataFrame, sin: pd.DataFrame, ramos, canales) -> PortfolioView:
+    pol_f = pol[pol["Ramo"].isin(ramos) & pol["Canal_Distribucion"].isin(canales)]
+    sin_f = sin[sin["Ramo"].isin(ramos) & sin["Canal_Distribucion"].isin(canales)]
+    return PortfolioView(
+        polizas=pol_f,
+        siniestros=sin_f,
+        primas_ramo=pol_f.groupby("Ramo")["Prima_Neta_USD"].sum().reset_index(),
+        pagos_ramo=sin_f.groupby("Ramo")["Monto_Pagado_USD"].sum().reset_index(),
+    )
+
+
+def layout_header(version: str):
     st.title("Actuarial Insurtech – CVEA Suite Demo")
-    st.caption(
-        "Versión demostrativa en **Python / Streamlit** inspirada en ActuarialInsurtechCARAMELS. "
+    fuente = (
         "Los datos son simulados con fines pedagógicos."
+        if version == "simulado"
+        else f"Panel de mercado desde boletines SUDEASEG (`{DIR_SUDEASEG.name}`, versión {version.split('-')[-1]})."
+    )
+    st.caption(
+        "Versión demostrativa en **Python / Streamlit** inspirada en ActuarialInsurtechCARAMELS. " + fuente
     )
 
 
@@ -108,16 +262,9 @@ def sidebar_filters(df_market: pd.DataFrame):
     return date_range, empresa_sel
 
 
-def page_market_overview(df: pd.DataFrame, date_range):
+def page_market_overview(view: MarketView):
     st.subheader("1. Visión general del mercado")
-    df_period = df[(df["Fecha"] >= pd.to_datetime(date_range[0])) & (df["Fecha"] <= pd.to_datetime(date_range[1]))]
-
-    kpi = (
-        df_period.groupby("Fecha")[["PNC_USD", "Siniestros_Pagados_Netos_USD", "Resultado_Neto_USD"]]
-        .sum()
-        .reset_index()
-    )
-    kpi["Siniestralidad_Pagada"] = kpi["Siniestros_Pagados_Netos_USD"] / kpi["PNC_USD"]
+    kpi = view.mercado
 
     col1, col2, col3 = st.columns(3)
     col1.metric("PNC promedio mensual (USD)", f"{kpi['PNC_USD'].mean():,.0f}")
@@ -131,26 +278,12 @@ def page_market_overview(df: pd.DataFrame, date_range):
     col_b.plotly_chart(fig_sin, use_container_width=True)
 
 
-def page_company_vs_market(df: pd.DataFrame, date_range, empresa_sel: str):
+def page_company_vs_market(view: MarketView, empresa_sel: str):
     st.subheader("2. Mi compañía vs mercado")
-    df_period = df[(df["Fecha"] >= pd.to_datetime(date_range[0])) & (df["Fecha"] <= pd.to_datetime(date_range[1]))]
-
-    df_market = df_period.groupby("Fecha")[["PNC_USD", "Siniestros_Pagados_Netos_USD"]].sum().reset_index()
-    df_market["Siniestralidad_Pagada"] = df_market["Siniestros_Pagados_Netos_USD"] / df_market["PNC_USD"]
-    df_comp = (
-        df_period[df_period["Empresa"] == empresa_sel]
-        .groupby("Fecha")[["PNC_USD", "Siniestros_Pagados_Netos_USD"]]
-        .sum()
-        .reset_index()
-    )
-    df_comp["Siniestralidad_Pagada"] = df_comp["Siniestros_Pagados_Netos_USD"] / df_comp["PNC_USD"]
-
-    df_comp["Tipo"] = empresa_sel
-    df_market["Tipo"] = "Mercado"
     df_long = pd.concat(
         [
-            df_comp[["Fecha", "Siniestralidad_Pagada", "Tipo"]],
-            df_market[["Fecha", "Siniestralidad_Pagada", "Tipo"]],
+            view.compania[["Fecha", "Siniestralidad_Pagada"]].assign(Tipo=empresa_sel),
+            view.mercado[["Fecha", "Siniestralidad_Pagada"]].assign(Tipo="Mercado"),
         ]
     )
 
@@ -163,13 +296,7 @@ def page_company_vs_market(df: pd.DataFrame, date_range, empresa_sel: str):
     )
     st.plotly_chart(fig, use_container_width=True)
 
-    tabla_resumen = (
-        df_period.groupby("Empresa")[["PNC_USD", "Siniestros_Pagados_Netos_USD", "Resultado_Neto_USD"]]
-        .sum()
-        .assign(Siniestralidad=lambda x: x["Siniestros_Pagados_Netos_USD"] / x["PNC_USD"])
-        .reset_index()
-    )
-    st.dataframe(tabla_resumen.style.format({"PNC_USD": "{:,.0f}", "Siniestros_Pagados_Netos_USD": "{:,.0f}", "Resultado_Neto_USD": "{:,.0f}", "Siniestralidad": "{:.1%}"}))
+    st.dataframe(view.resumen.style.format({"PNC_USD": "{:,.0f}", "Siniestros_Pagados_Netos_USD": "{:,.0f}", "Resultado_Neto_USD": "{:,.0f}", "Siniestralidad": "{:.1%}"}))
 
 
 def page_portfolio(pol: pd.DataFrame, sin: pd.DataFrame):
@@ -183,26 +310,26 @@ def page_portfolio(pol: pd.DataFrame, sin: pd.DataFrame):
         default=sorted(pol["Canal_Distribucion"].unique()),
     )
 
-    pol_f = pol[pol["Ramo"].isin(ramo_sel) & pol["Canal_Distribucion"].isin(canal_sel)]
-    sin_f = sin[sin["Ramo"].isin(ramo_sel) & sin["Canal_Distribucion"].isin(canal_sel)]
+    cartera = portfolio_view(pol, sin, ramo_sel, canal_sel)
 
-    st.metric("Número de pólizas", f"{len(pol_f):,}")
-    st.metric("Número de siniestros", f"{len(sin_f):,}")
+    st.metric("Número de pólizas", f"{len(cartera.polizas):,}")
+    st.metric("Número de siniestros", f"{len(cartera.siniestros):,}")
 
-    primas_ramo = pol_f.groupby("Ramo")["Prima_Neta_USD"].sum().reset_index()
-    fig_primas = px.bar(primas_ramo, x="Ramo", y="Prima_Neta_USD", title="Prima neta por ramo")
+    fig_primas = px.bar(cartera.primas_ramo, x="Ramo", y="Prima_Neta_USD", title="Prima neta por ramo")
     st.plotly_chart(fig_primas, use_container_width=True)
 
-    if not sin_f.empty:
-        sin_ramo = sin_f.groupby("Ramo")["Monto_Pagado_USD"].sum().reset_index()
-        fig_sin = px.bar(sin_ramo, x="Ramo", y="Monto_Pagado_USD", title="Monto pagado por ramo")
+    if not cartera.siniestros.empty:
+        fig_sin = px.bar(cartera.pagos_ramo, x="Ramo", y="Monto_Pagado_USD", title="Monto pagado por ramo")
         st.plotly_chart(fig_sin, use_container_width=True)
 
 
 def main():
-    layout_header()
+    version, errores = sync_market_data()
+    layout_header(version)
+    if errores:
+        st.warning("Boletines SUDEASEG no ingeridos:\n\n" + "\n".join(f"- {e}" for e in errores))
 
-    df_market = simulate_market_data()
+    df_market = load_market_data(version)
     pol, sin = simulate_portfolio()
 
     date_range, empresa_sel = sidebar_filters(df_market)
@@ -215,10 +342,12 @@ def main():
         ]
     )
 
+    # Una sola vista por (periodo, empresa) compartida por ambas pestañas
+    view = get_market_view(version, tuple(date_range), empresa_sel)
     with tab1:
-        page_market_overview(df_market, date_range)
+        page_market_overview(view)
     with tab2:
-        page_company_vs_market(df_market, date_range, empresa_sel)
+        page_company_vs_market(view, empresa_sel)
     with tab3:
         page_portfolio(pol, sin)
 
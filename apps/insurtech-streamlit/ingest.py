@@ -0,0 +1,266 @@
+# Ingesta de boletines mensuales SUDEASEG (CSV/Excel) a una caché Parquet particionada
+#
+# Cada archivo de un directorio local se normaliza al esquema del panel de la app (Empresa, Fecha,
+# PNC_USD, …) y se escribe en `cache/year=YYYY/month=MM/<archivo con extensión>.parquet`. Un
+# manifiesto JSON guarda tamaño, fecha de modificación, hash y tasas de cambio usadas de cada archivo
+# ya procesado, de modo que una nueva corrida solo parsea los boletines nuevos o modificados. Un
+# archivo que no se puede leer queda en el resumen de errores y no detiene el resto. La lectura del
+# panel completo es un `read_table` con memory-map sobre las particiones, sin volver a abrir hojas
+# de cálculo.
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MONTOS = [
+    "PNC_USD",
+    "Siniestros_Pagados_Netos_USD",
+    "Gastos_Generales_USD",
+    "Resultado_Neto_USD",
+    "Capital_Social_Suscrito_USD",
+    "Activos_Totales_USD",
+    "Reservas_Tecnicas_Netas_USD",
+    "Patrimonio_USD",
+]
+COLUMNAS = ["Empresa", "Fecha"] + MONTOS
+
+# Encabezados habituales de los boletines (normalizados: minúsculas, sin acentos, "_" como separador)
+ALIAS = {
+    "empresa": "Empresa",
+    "empresa_de_seguros": "Empresa",
+    "compania": "Empresa",
+    "empresas_de_seguros": "Empresa",
+    "fecha": "Fecha",
+    "periodo": "Fecha",
+    "mes": "Fecha",
+    "pnc": "PNC_USD",
+    "primas_netas_cobradas": "PNC_USD",
+    "siniestros_pagados_netos": "Siniestros_Pagados_Netos_USD",
+    "siniestros_pagados": "Siniestros_Pagados_Netos_USD",
+    "gastos_generales": "Gastos_Generales_USD",
+    "gastos_de_administracion": "Gastos_Generales_USD",
+    "resultado_neto": "Resultado_Neto_USD",
+    "resultado_del_ejercicio": "Resultado_Neto_USD",
+    "capital_social_suscrito": "Capital_Social_Suscrito_USD",
+    "capital_suscrito": "Capital_Social_Suscrito_USD",
+    "activos_totales": "Activos_Totales_USD",
+    "total_activo": "Activos_Totales_USD",
+    "reservas_tecnicas_netas": "Reservas_Tecnicas_Netas_USD",
+    "reservas_tecnicas": "Reservas_Tecnicas_Netas_USD",
+    "patrimonio": "Patrimonio_USD",
+    "patrimonio_propio_no_comprometido": "Patrimonio_USD",
+}
+ESQUEMA = pa.schema([("Empresa", pa.string()), ("Fecha", pa.timestamp("us"))] + [(c, pa.float64()) for c in MONTOS])
+EXTENSIONES = {".csv", ".txt", ".xlsx", ".xls"}
+MANIFIESTO = "_manifest.json"
+_PERIODO = re.compile(r"(20\d{2})[-_. ]?(0[1-9]|1[0-2])(?!\d)")
+
+
+def _normalize(name) -> str:
+    s = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    s = re.sub(r"[^0-9a-zA-Z]+", "_", s).strip("_").lower()
+    return re.sub(r"_(usd|bs|ves)$", "", s)
+
+
+def _to_number(col: pd.Series) -> pd.Series:
+    """Convierte montos con formato local ("1.234.567,89") o estándar a float."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float)
+    s = col.astype(str).str.strip().str.replace(r"[^\d,.\-()]", "", regex=True)
+    negativo = s.str.startswith("(") & s.str.endswith(")")
+    s = s.str.strip("()")
+    # Formato local: la coma es el último separador, o solo hay puntos de miles ("10.000")
+    coma_decimal = s.str.fullmatch(r"-?[\d.]*,\d*") | s.str.fullmatch(r"-?\d{1,3}(\.\d{3})+")
+    s = s.where(~coma_decimal, s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    s = s.where(coma_decimal, s.str.replace(",", "", regex=False))
+    out = pd.to_numeric(s, errors="coerce").astype(float)
+    return out.where(~negativo, -out)
+
+
+def period_from_name(path: Path) -> pd.Timestamp | None:
+    """Primer día del mes indicado en el nombre del archivo (p. ej. boletin_2024-03.xlsx)."""
+    m = _PERIODO.search(path.stem)
+    return pd.Timestamp(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def read_bulletin(path: Path, tasas: dict[str, float] | None = None) -> pd.DataFrame:
+    """Lee un boletín y lo lleva al esquema del panel.
+
+    La fecha sale de una columna Fecha/Periodo/Mes o, si no existe, del nombre del archivo.
+    Con `tasas` ({"YYYY-MM": Bs por USD}) los montos se convierten de bolívares a dólares.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        raw = pd.read_excel(path)
+    else:
+        raw = pd.read_csv(path, sep=None, engine="python", dtype=str, encoding_errors="replace")
+    raw.columns = [ALIAS.get(_normalize(c), c) for c in raw.columns]
+    raw = raw.loc[:, ~raw.columns.duplicated()]
+    if "Empresa" not in raw.columns:
+        raise ValueError(f"{path.name}: no se encontró la columna de empresa")
+    df = pd.DataFrame({"Empresa": raw["Empresa"].astype(str).str.strip()})
+    if "Fecha" in raw.columns:
+        df["Fecha"] = pd.to_datetime(raw["Fecha"], dayfirst=True, errors="coerce").dt.to_period("M").dt.to_timestamp()
+    else:
+        periodo = period_from_name(path)
+        if periodo is None:
+            raise ValueError(f"{path.name}: sin columna de fecha ni periodo AAAA-MM en el nombre")
+        df["Fecha"] = periodo
+    for c in MONTOS:
+        df[c] = _to_number(raw[c]) if c in raw.columns else np.nan
+    # Filas de totales o vacías del boletín
+    df = df[df["Empresa"].ne("") & ~df["Empresa"].str.lower().str.startswith(("total", "nan")) & df["Fecha"].notna()]
+    if tasas:
+        tasa = df["Fecha"].dt.strftime("%Y-%m").map(tasas)
+        if tasa.isna().any():
+            raise ValueError(f"{path.name}: falta la tasa de cambio de algún periodo")
+        df[MONTOS] = df[MONTOS].div(tasa.to_numpy(), axis=0)
+    return df.reset_index(drop=True)
+
+
+def load_rates(path) -> dict[str, float]:
+    """Tasas de cambio desde un JSON {"YYYY-MM": Bs por USD}."""
+    raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    tasas = {}
+    for periodo, tasa in raw.items():
+        m = _PERIODO.fullmatch(str(periodo).strip())
+        if m is None:
+            raise ValueError(f"{Path(path).name}: periodo inválido {periodo!r} (se espera AAAA-MM)")
+        tasas[f"{m.group(1)}-{m.group(2)}"] = float(tasa)
+    return tasas
+
+
+def _rates_key(tasas: dict[str, float] | None) -> str | None:
+    if not tasas:
+        return None
+    return hashlib.sha256(json.dumps(sorted(tasas.items())).encode()).hexdigest()[:16]
+
+
+def _fingerprint(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_manifest(cache_dir: Path) -> dict:
+    p = cache_dir / MANIFIESTO
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+
+def _remove_parts(cache_dir: Path, partes: list[str]) -> None:
+    for parte in partes:
+        (cache_dir / parte).unlink(missing_ok=True)
+
+
+def ingest_directory(source_dir, cache_dir, tasas: dict[str, float] | None = None) -> dict:
+    """Sincroniza la caché Parquet con los boletines de `source_dir` (solo nuevos o modificados).
+
+    Devuelve un resumen con los archivos procesados, omitidos, eliminados y con errores. Un archivo
+    se considera sin cambios si coinciden las tasas usadas y tamaño y fecha de modificación, o en su
+    defecto el hash del contenido. Un archivo con error conserva sus particiones anteriores (si las
+    tenía) y se reintenta en la siguiente corrida.
+    """
+    source_dir, cache_dir = Path(source_dir), Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(cache_dir)
+    archivos = sorted(p for p in source_dir.iterdir() if p.is_file() and p.suffix.lower() in EXTENSIONES)
+    resumen = {"procesados": [], "omitidos": [], "eliminados": [], "errores": []}
+    clave_tasas = _rates_key(tasas)
+
+    for path in archivos:
+        previo = manifest.get(path.name)
+        huella = _fingerprint(path)
+        vigente = previo is not None and previo.get("tasas") == clave_tasas
+        if vigente and all(previo[k] == v for k, v in huella.items()):
+            resumen["omitidos"].append(path.name)
+            continue
+        sha = _sha256(path)
+        if vigente and previo["sha256"] == sha:
+            previo.update(huella)
+            resumen["omitidos"].append(path.name)
+            continue
+        try:
+            df = read_bulletin(path, tasas)
+        except Exception as e:  # un boletín ilegible no detiene la sincronización del resto
+            resumen["errores"].append(str(e) if str(e).startswith(path.name) else f"{path.name}: {type(e).__name__}: {e}")
+            continue
+        if previo:
+            _remove_parts(cache_dir, previo["partes"])
+        partes = []
+        for fecha, grupo in df.groupby("Fecha", sort=True):
+            # Partición por archivo completo (con extensión): boletin_2024-03.csv y .xlsx no se pisan
+            destino = Path(f"year={fecha.year}") / f"month={fecha.month:02d}" / f"{path.name}.parquet"
+            (cache_dir / destino).parent.mkdir(parents=True, exist_ok=True)
+            tabla = pa.Table.from_pandas(grupo[COLUMNAS], schema=ESQUEMA, preserve_index=False)
+            pq.write_table(tabla, cache_dir / destino)
+            partes.append(destino.as_posix())
+        manifest[path.name] = {**huella, "sha256": sha, "tasas": clave_tasas, "filas": len(df), "partes": partes}
+        resumen["procesados"].append(path.name)
+
+    presentes = {p.name for p in archivos}
+    for nombre in [n for n in manifest if n not in presentes]:
+        _remove_parts(cache_dir, manifest.pop(nombre)["partes"])
+        resumen["eliminados"].append(nombre)
+
+    tmp = cache_dir / (MANIFIESTO + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(cache_dir / MANIFIESTO)
+    return resumen
+
+
+def cache_version(cache_dir) -> str | None:
+    """Huella del contenido de la caché (hash de los archivos ingeridos); None si está vacía."""
+    manifest = _load_manifest(Path(cache_dir))
+    if not manifest:
+        return None
+    # mtime incluido: decide qué boletín prevalece ante filas repetidas (ver load_panel)
+    firmas = json.dumps(sorted((n, m["sha256"], m.get("tasas"), m["mtime_ns"]) for n, m in manifest.items()))
+    return hashlib.sha256(firmas.encode()).hexdigest()[:16]
+
+
+def load_panel(cache_dir) -> pd.DataFrame:
+    """Panel completo desde la caché (lectura con memory-map de las particiones del manifiesto).
+
+    Si dos boletines traen la misma (Empresa, Fecha), p. ej. un boletín reemitido
+    (boletin_2024-03_v2.csv), queda la fila del archivo modificado más recientemente.
+    """
+    cache_dir = Path(cache_dir)
+    manifest = _load_manifest(cache_dir)
+    # Orden de precedencia: fecha de modificación y, a igualdad, nombre del archivo
+    orden = sorted(manifest, key=lambda n: (manifest[n]["mtime_ns"], n))
+    partes = [cache_dir / parte for nombre in orden for parte in manifest[nombre]["partes"]]
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS)
+    tabla = pa.concat_tables([pq.read_table(p, memory_map=True, columns=COLUMNAS) for p in partes])
+    panel = tabla.to_pandas().drop_duplicates(["Empresa", "Fecha"], keep="last")
+    return panel.sort_values(["Empresa", "Fecha"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingesta incremental de boletines SUDEASEG a Parquet.")
+    parser.add_argument("origen", help="Directorio con los boletines CSV/Excel")
+    parser.add_argument("cache", help="Directorio de la caché Parquet particionada")
+    parser.add_argument("--tasas", help='JSON {"YYYY-MM": Bs por USD} para convertir boletines en bolívares')
+    args = parser.parse_args()
+    resumen = ingest_directory(args.origen, args.cache, load_rates(args.tasas) if args.tasas else None)
+    print(", ".join(f"{k}: {len(v)}" for k, v in resumen.items()))
+    for error in resumen["errores"]:
+        print(f"ERROR {error}", file=sys.stderr)
+    sys.exit(1 if resumen["errores"] else 0)